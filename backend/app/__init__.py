@@ -1,25 +1,50 @@
 import os
 from flask import Flask
-from app.extensions import db, migrate, cors
+from werkzeug.middleware.proxy_fix import ProxyFix
+from config import config
+from app.serialization import SurveyJSONProvider
+from app.extensions import db, sqlite_tuning, read_replica, migrate, cors, survey_cache, principal_cache, password_hasher, ingestion_queue, live_updates, request_metrics, response_compression, rate_limiter
 
-def create_app(config_name='default'):
+def create_app(config_name=None):
     app = Flask(__name__)
     
-    # Load configuration
-    if config_name == 'testing':
-        app.config.from_object('config.TestingConfig')
-    elif config_name == 'production':
-        app.config.from_object('config.ProductionConfig')
-    else:
-        app.config.from_object('config.DevelopmentConfig')
+    # Load configuration：未指定时读取 FLASK_CONFIG 环境变量，未知名称回退到 default
+    if config_name is None:
+        config_name = os.environ.get('FLASK_CONFIG') or 'default'
+    app.config.from_object(config.get(config_name, config['default']))
+    # JSON 序列化：优先使用 orjson，并按 Accept 协商 MessagePack
+    app.json = SurveyJSONProvider(app)
     
     # Initialize extensions with app
     db.init_app(app)
+    sqlite_tuning.init_app(app, db)
+    read_replica.init_app(app, db, sqlite_tuning)
     migrate.init_app(app, db)
     cors.init_app(app)
+    survey_cache.init_app(app)
+    principal_cache.init_app(app)
+    password_hasher.init_app(app)
+    ingestion_queue.init_app(app)
+    live_updates.init_app(app, session=db.session)
+    request_metrics.init_app(app, db, read_replica)
+    # 在指标之后注册：after_request 逆序执行，压缩先完成，指标记录的是压缩后的响应大小
+    response_compression.init_app(app)
+    rate_limiter.init_app(app)
+    
+    # 部署在反向代理之后时，按 X-Forwarded-For 还原客户端地址（限流按 IP 计数依赖它）
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     
     # Register blueprints
     from app.api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
-    return app
\ No newline at end of file
+    return app
+
+def shutdown_app(app):
+    # 优雅退出：先写完异步队列中已认领的提交，结束实时推送连接，再停止哈希线程池并关闭数据库连接池
+    ingestion_queue.stop()
+    live_updates.close()
+    password_hasher.shutdown()
+    with app.app_context():
+        db.engine.dispose()
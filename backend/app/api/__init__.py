@@ -2,4 +2,4 @@ from flask import Blueprint
 
 api_bp = Blueprint('api', __name__)
 
-from app.api import routes
\ No newline at end of file
+from app.api import routes, commands
\ No newline at end of file
@@ -0,0 +1,164 @@
+from sqlalchemy import distinct, func, literal, null, select, union_all
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.api.models import Option, SurveyResponse, QuestionResponse
+from app.api.tallies import current_answer, format_results
+
+# 可以用于筛选和交叉分析的题型：单选、多选
+CHOICE_TYPES = (1, 2)
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def _choice_question(question_id, questions_dict):
+    question = questions_dict.get(question_id)
+    if question is None:
+        raise AnalyticsError(f'Question {question_id} does not belong to this survey')
+    if question.type not in CHOICE_TYPES:
+        raise AnalyticsError(f'Question {question_id} is not a choice question')
+    return question
+
+
+def parse_filters(included, excluded, questions_dict, options_dict):
+    # 每个条件形如 "问题id:选项id[,选项id...]"：included 要求选择了其中任一选项，excluded 要求一个都没选；
+    # 多个条件之间为"且"。返回 [(question_id, (option_id, ...), negate)]
+    filters = []
+    for values, negate in ((included, False), (excluded, True)):
+        for value in values:
+            question_part, _, option_part = value.partition(':')
+            try:
+                question_id = int(question_part)
+                option_ids = tuple(sorted({int(o) for o in option_part.split(',')}))
+            except ValueError:
+                raise AnalyticsError(f'Invalid filter "{value}", expected question_id:option_id[,option_id...]')
+            _choice_question(question_id, questions_dict)
+            for option_id in option_ids:
+                option = options_dict.get(option_id)
+                if option is None or option.question_id != question_id:
+                    raise AnalyticsError(f'Option {option_id} does not belong to question {question_id}')
+            filters.append((question_id, option_ids, negate))
+    return filters
+
+
+def answer_conditions(respondent, filters):
+    # 把条件转换为按响应关联的 EXISTS / NOT EXISTS 子查询：respondent 为外层查询中的 survey_response_id 列，
+    # 每个条件是对 (question_id, survey_response_id, option_id) 索引的一次点查，外层行数多大都不会退化
+    conditions = []
+    for question_id, option_ids, negate in filters:
+        answer = aliased(QuestionResponse)
+        chosen = select(answer.id).where(
+            answer.question_id == question_id,
+            answer.survey_response_id == respondent,
+            answer.option_id.in_(option_ids)
+        ).exists()
+        conditions.append(~chosen if negate else chosen)
+    return conditions
+
+
+def load_filtered_results(survey_id, filters, questions_dict, options_dict):
+    # 与 /results 相同的结构，但只统计满足条件的响应；多选题中每个被选中的选项各计一次，
+    # 百分比的分母为回答了该问题的响应数。先按条件求出响应集合，再用 IN 在问题回答中分组统计；
+    # 与计数表一致，选项已被删除的回答不计入
+    base = select(SurveyResponse.id).where(
+        SurveyResponse.survey_id == survey_id, *answer_conditions(SurveyResponse.id, filters)
+    )
+    matched = [QuestionResponse.survey_response_id.in_(base.scalar_subquery())] if filters else []
+    question_ids = list(questions_dict)
+    choice_ids = [q.id for q in questions_dict.values() if q.type in CHOICE_TYPES]
+    respondent = func.count(distinct(QuestionResponse.survey_response_id))
+
+    counts = {(0, 0): db.session.execute(select(func.count()).select_from(base.subquery())).scalar()}
+    if choice_ids:
+        for question_id, option_id, count in db.session.execute(
+            select(QuestionResponse.question_id, QuestionResponse.option_id, respondent).join(
+                Option, Option.id == QuestionResponse.option_id
+            ).where(
+                QuestionResponse.question_id.in_(choice_ids), *matched
+            ).group_by(QuestionResponse.question_id, QuestionResponse.option_id)
+        ):
+            counts[(question_id, option_id)] = count
+    if question_ids:
+        for question_id, count in db.session.execute(
+            select(QuestionResponse.question_id, respondent).outerjoin(
+                Option, Option.id == QuestionResponse.option_id
+            ).where(
+                QuestionResponse.question_id.in_(question_ids), current_answer(), *matched
+            ).group_by(QuestionResponse.question_id)
+        ):
+            counts[(question_id, 0)] = count
+
+    results = format_results(survey_id, counts, questions_dict, options_dict)
+    results['filters'] = _describe_filters(filters)
+    return results
+
+
+def load_crosstab(survey_id, row_id, column_id, filters, questions_dict, options_dict):
+    # 两道选择题的交叉表：cells[i][j] 为同时选择了第 i 个行选项和第 j 个列选项的响应数。
+    # 只统计两题都作答的响应；多选题中一个响应可以落在多个单元格，因此行/列合计按响应去重，不等于单元格之和
+    row_question = _choice_question(row_id, questions_dict)
+    column_question = _choice_question(column_id, questions_dict)
+    row_options = [o for o in options_dict.values() if o.question_id == row_id]
+    column_options = [o for o in options_dict.values() if o.question_id == column_id]
+
+    a = aliased(QuestionResponse)
+    b = aliased(QuestionResponse)
+    # 选择题的回答总有 option_id，不再额外过滤 NULL，使两侧都只用 (question_id, survey_response_id, option_id) 覆盖索引；
+    # 只保留仍存在的选项（按主键的点查），与计数表一致
+    pairs = select(
+        a.survey_response_id.label('respondent'), a.option_id.label('row_option'), b.option_id.label('column_option')
+    ).join(b, b.survey_response_id == a.survey_response_id).where(
+        a.question_id == row_id, b.question_id == column_id,
+        a.option_id.in_([o.id for o in row_options]), b.option_id.in_([o.id for o in column_options])
+    )
+    pairs = pairs.where(*answer_conditions(a.survey_response_id, filters))
+    # 配对结果作为 CTE 只计算一次（被引用多次时数据库会将其物化），
+    # 单元格、行合计、列合计和总数在一条 UNION ALL 查询中完成
+    pairs = pairs.cte('pairs')
+    count = func.count(distinct(pairs.c.respondent))
+    query = union_all(
+        select(literal('cell'), pairs.c.row_option, pairs.c.column_option, count).group_by(
+            pairs.c.row_option, pairs.c.column_option
+        ),
+        select(literal('row'), pairs.c.row_option, null(), count).group_by(pairs.c.row_option),
+        select(literal('column'), null(), pairs.c.column_option, count).group_by(pairs.c.column_option),
+        select(literal('all'), null(), null(), count)
+    )
+    cells, row_totals, column_totals, total = {}, {}, {}, 0
+    for kind, row_option, column_option, n in db.session.execute(query):
+        if kind == 'cell':
+            cells[(row_option, column_option)] = n
+        elif kind == 'row':
+            row_totals[row_option] = n
+        elif kind == 'column':
+            column_totals[column_option] = n
+        else:
+            total = n
+
+    return {
+        'survey_id': survey_id,
+        'row': _describe_question(row_question, row_options),
+        'column': _describe_question(column_question, column_options),
+        'respondents': total,
+        'cells': [[cells.get((r.id, c.id), 0) for c in column_options] for r in row_options],
+        'row_totals': [row_totals.get(r.id, 0) for r in row_options],
+        'column_totals': [column_totals.get(c.id, 0) for c in column_options],
+        'filters': _describe_filters(filters)
+    }
+
+
+def _describe_question(question, options):
+    return {
+        'question_id': question.id,
+        'question_text': question.text,
+        'question_type': question.type,
+        'options': [{'option_id': o.id, 'text': o.text} for o in options]
+    }
+
+
+def _describe_filters(filters):
+    return [
+        {'question_id': question_id, 'option_ids': list(option_ids), 'exclude': negate}
+        for question_id, option_ids, negate in filters
+    ]
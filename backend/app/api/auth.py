@@ -0,0 +1,91 @@
+import os
+from functools import wraps
+from flask import jsonify, request
+import jwt
+from app.extensions import principal_cache
+from app.api.models import User
+
+# 密钥用于JWT token签名
+SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
+
+
+class Principal:
+    # 已认证用户的只读快照，可以安全地跨请求缓存
+    __slots__ = ('id', 'username', 'email', 'is_admin', 'created_at')
+
+    def __init__(self, id, username, email, is_admin, created_at):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.is_admin = is_admin
+        self.created_at = created_at
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.is_admin, user.created_at)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'is_admin': self.is_admin,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+def _bearer_token():
+    token = request.headers.get('Authorization')
+    # 移除Bearer前缀
+    if token and token.startswith('Bearer '):
+        token = token[7:]
+    return token
+
+
+def _decode(token):
+    data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    if 'user_id' not in data:
+        raise jwt.InvalidTokenError('Token has no user_id')
+    return data
+
+
+def authenticate(token):
+    # 命中缓存时既不解码 token 也不查询数据库；缓存条目不会活过 token 的 exp
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    data = _decode(token)
+    version = principal_cache.version(data['user_id'])
+    user = User.query.filter_by(id=data['user_id']).first()
+    if user is None:
+        raise jwt.InvalidTokenError('User no longer exists')
+    principal = Principal.from_user(user)
+    if 'exp' in data:
+        principal_cache.set(token, user.id, version, principal, data['exp'])
+    return principal
+
+
+def token_required(f=None, claims_only=False):
+    # @token_required 向路由传入 current_user（Principal）；
+    # @token_required(claims_only=True) 只传入解码后的 claims，不访问数据库
+    if f is None:
+        return lambda func: token_required(func, claims_only=claims_only)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = _bearer_token()
+        if not token:
+            return jsonify({'message': 'Token is missing'}), 401
+        try:
+            current_user = _decode(token) if claims_only else authenticate(token)
+        except jwt.ExpiredSignatureError:
+            return jsonify({'message': 'Token has expired'}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'message': 'Token is invalid'}), 401
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+
+def invalidate_user(user_id):
+    principal_cache.invalidate_user(user_id)
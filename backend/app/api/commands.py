@@ -0,0 +1,97 @@
+import click
+from flask import current_app
+from sqlalchemy import func
+from app.api import api_bp
+from app.extensions import db, ingestion_queue
+from app.api.models import Survey
+from app.api.tallies import rebuild_tallies
+from app.api.counters import reconcile_counters
+from app.api.timeseries import rebuild_rollups, prune_rollups
+from app.api.search import rebuild_search_index, search_backend
+from app.api.query_plans import check_query_plans
+
+
+@api_bp.cli.command('rebuild-tallies')
+@click.option('--survey-id', type=int, default=None, help='Only rebuild the tallies of this survey.')
+def rebuild_tallies_command(survey_id):
+    """Recompute result tallies from question responses."""
+    rebuild_tallies(survey_id)
+    db.session.commit()
+    click.echo('Result tallies rebuilt.')
+
+
+@api_bp.cli.command('rebuild-rollups')
+@click.option('--survey-id', type=int, default=None, help='Only rebuild the time buckets of this survey.')
+def rebuild_rollups_command(survey_id):
+    """Recompute response time buckets from survey responses."""
+    rebuild_rollups(survey_id)
+    db.session.commit()
+    click.echo('Response rollups rebuilt.')
+
+
+@api_bp.cli.command('prune-rollups')
+def prune_rollups_command():
+    """Delete minute buckets older than TIMESERIES_MINUTE_RETENTION_HOURS."""
+    count = prune_rollups()
+    db.session.commit()
+    click.echo(f'Pruned {count} minute bucket(s).')
+
+
+@api_bp.cli.command('rebuild-search-index')
+@click.option('--survey-id', type=int, default=None, help='Only reindex the answers of this survey.')
+def rebuild_search_index_command(survey_id):
+    """Rebuild the full-text index of free-text answers."""
+    count = rebuild_search_index(survey_id)
+    db.session.commit()
+    click.echo(f'Indexed {count} text answer(s) with the {search_backend()} backend.')
+
+
+@api_bp.cli.command('reconcile-counters')
+@click.option('--repair', is_flag=True, help='Correct drifted counters and prune expired hourly buckets.')
+def reconcile_counters_command(repair):
+    """Compare the survey-stats counters with the source tables."""
+    drift, stale = reconcile_counters(repair=repair)
+    for name, (stored, expected) in sorted(drift.items()):
+        click.echo(f'{name}: stored={stored} expected={expected}')
+    if not repair:
+        if drift:
+            raise click.ClickException(f'{len(drift)} counter(s) drifted; rerun with --repair to fix them.')
+        click.echo('Survey counters are consistent.')
+        return
+    db.session.commit()
+    click.echo(f'Repaired {len(drift)} counter(s), pruned {len(stale)} expired bucket(s).')
+
+
+@api_bp.cli.command('check-query-plans')
+@click.option('--survey-id', type=int, default=None, help='Survey used to fill route parameters.')
+@click.option('--verbose', is_flag=True, help='Print the plan of every statement.')
+def check_query_plans_command(survey_id, verbose):
+    """Check that the main route queries use indexes."""
+    if survey_id is None:
+        survey_id = db.session.query(func.min(Survey.id)).scalar()
+        if survey_id is None:
+            raise click.ClickException('No survey found; create one or pass --survey-id.')
+
+    failures = 0
+    for entry in check_query_plans(current_app._get_current_object(), survey_id):
+        ok = not entry['full_scans'] and not entry['error']
+        failures += not ok
+        if entry['error']:
+            click.echo(f"[ERROR] {entry['url']}: {entry['error']}")
+        elif verbose or not ok:
+            click.echo(f"[{'ok' if ok else 'FULL SCAN'}] {entry['url']}")
+            click.echo('  ' + ' '.join(entry['statement'].split()))
+            for line in entry['plan']:
+                click.echo(f'    {line}')
+    if failures:
+        raise click.ClickException(f'{failures} statement(s) scan a hot table without an index or a route ran no queries.')
+    click.echo('All route queries use indexes.')
+
+
+@api_bp.cli.command('drain-ingest-queue')
+def drain_ingest_queue_command():
+    """Write all queued submissions to the database."""
+    if not ingestion_queue.enabled:
+        raise click.ClickException('INGEST_MODE is not set to queue.')
+    count = ingestion_queue.drain()
+    click.echo(f'Wrote {count} queued submission(s).')
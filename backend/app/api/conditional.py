@@ -0,0 +1,32 @@
+import hashlib
+from flask import current_app, request
+from app.serialization import representation, vary_on_accept
+
+
+def make_etag(version):
+    # 由版本信息生成强 ETag；MessagePack 响应的字节不同，另加格式后缀
+    parts = [str(part) for part in version]
+    if representation() != 'json':
+        parts.append(representation())
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def apply_cache_control(response):
+    cache_control = current_app.config['CACHE_CONTROL'].get(request.endpoint)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def not_modified(etag):
+    # If-None-Match 命中时直接返回 304，不再加载调查内容；按弱比较匹配，压缩响应带的是弱 ETag
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return apply_cache_control(vary_on_accept(response))
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    return apply_cache_control(response)
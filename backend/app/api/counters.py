@@ -0,0 +1,123 @@
+import datetime
+from collections import Counter
+from flask import current_app
+from sqlalchemy import bindparam, func
+from app.extensions import db
+from app.api.models import Survey, SurveyResponse, SurveyCounter
+from app.api.increments import increment_rows
+
+counters = SurveyCounter.__table__
+
+TOTAL_SURVEYS = 'surveys'
+PUBLISHED_SURVEYS = 'published_surveys'
+TOTAL_RESPONSES = 'responses'
+TOTALS = (TOTAL_SURVEYS, PUBLISHED_SURVEYS, TOTAL_RESPONSES)
+HOUR_FORMAT = '%Y-%m-%dT%H'
+
+
+def hour_key(moment):
+    return 'responses@' + moment.strftime(HOUR_FORMAT)
+
+
+def bump_counters(deltas):
+    # 在当前事务中按 {name: delta} 增减计数，不存在的计数行会被创建
+    rows = [{'name': name, 'value': delta} for name, delta in deltas.items() if delta]
+    increment_rows(counters, ('name',), 'value', rows)
+
+
+def retract_responses(created_at):
+    # created_at: 被删除响应的创建时间列表；已移出保留窗口的小时桶不再扣减
+    cutoff = _window_start(_retention_hours())
+    deltas = Counter({TOTAL_RESPONSES: -len(created_at)})
+    for moment in created_at:
+        if moment >= cutoff:
+            deltas[hour_key(moment)] -= 1
+    bump_counters(deltas)
+
+
+def record_responses(count, now=None):
+    now = now or datetime.datetime.utcnow()
+    bump_counters({TOTAL_RESPONSES: count, hour_key(now): count})
+
+
+def retract_survey_responses(survey_id):
+    # 删除调查前扣减其全部响应：总数直接取该调查的响应数，按小时计数只处理保留窗口内的响应
+    total = db.session.query(func.count(SurveyResponse.id)).filter(SurveyResponse.survey_id == survey_id).scalar()
+    deltas = Counter({TOTAL_RESPONSES: -total})
+    cutoff = _window_start(_retention_hours())
+    for (created_at,) in db.session.query(SurveyResponse.created_at).filter(
+        SurveyResponse.survey_id == survey_id, SurveyResponse.created_at >= cutoff
+    ):
+        deltas[hour_key(created_at)] -= 1
+    bump_counters(deltas)
+
+
+def _retention_hours():
+    return current_app.config.get('SURVEY_COUNTER_RETENTION_HOURS', 168)
+
+
+def _window_start(hours, now=None):
+    now = now or datetime.datetime.utcnow()
+    return now.replace(minute=0, second=0, microsecond=0) - datetime.timedelta(hours=hours - 1)
+
+
+def _hour_keys(hours, now=None):
+    start = _window_start(hours, now)
+    return [hour_key(start + datetime.timedelta(hours=i)) for i in range(hours)]
+
+
+def load_survey_stats(recent_hours):
+    # 只读取汇总表中的固定行：三个总数加上最近 recent_hours 个小时桶
+    names = list(TOTALS) + _hour_keys(recent_hours)
+    values = dict(db.session.query(SurveyCounter.name, SurveyCounter.value).filter(SurveyCounter.name.in_(names)))
+    return {
+        'total_surveys': values.get(TOTAL_SURVEYS, 0),
+        'published_surveys': values.get(PUBLISHED_SURVEYS, 0),
+        'total_responses': values.get(TOTAL_RESPONSES, 0),
+        'recent_responses': sum(values.get(name, 0) for name in names[3:]),
+        'recent_hours': recent_hours
+    }
+
+
+def expected_counters(retention_hours, now=None):
+    # 从源表重新计算保留窗口内应有的全部计数
+    expected = {
+        TOTAL_SURVEYS: db.session.query(func.count(Survey.id)).scalar(),
+        PUBLISHED_SURVEYS: db.session.query(func.count(Survey.id)).filter(Survey.is_published.is_(True)).scalar(),
+        TOTAL_RESPONSES: db.session.query(func.count(SurveyResponse.id)).scalar(),
+    }
+    for name in _hour_keys(retention_hours, now):
+        expected[name] = 0
+    for (created_at,) in db.session.query(SurveyResponse.created_at).filter(
+        SurveyResponse.created_at >= _window_start(retention_hours, now)
+    ).execution_options(yield_per=10000):
+        name = hour_key(created_at)
+        if name in expected:
+            expected[name] += 1
+    return expected
+
+
+def reconcile_counters(repair=False, retention_hours=None, now=None):
+    # 比较汇总表与源表，返回 {name: (stored, expected)} 形式的偏差；
+    # repair=True 时修正偏差并删除保留窗口之外的小时桶
+    retention_hours = retention_hours or _retention_hours()
+    expected = expected_counters(retention_hours, now)
+    stored = dict(db.session.query(SurveyCounter.name, SurveyCounter.value))
+
+    drift = {
+        name: (stored.get(name), value)
+        for name, value in expected.items()
+        if stored.get(name, 0) != value or (name in TOTALS and name not in stored)
+    }
+    stale = [name for name in stored if name not in expected]
+
+    if repair:
+        updates = [{'b_name': name, 'value': value} for name, (current, value) in drift.items() if current is not None]
+        if updates:
+            db.session.execute(counters.update().where(counters.c.name == bindparam('b_name')), updates)
+        inserts = [{'name': name, 'value': value} for name, (current, value) in drift.items() if current is None]
+        if inserts:
+            db.session.execute(counters.insert(), inserts)
+        if stale:
+            db.session.execute(counters.delete().where(counters.c.name.in_(stale)))
+    return drift, stale
@@ -0,0 +1,113 @@
+import datetime
+from sqlalchemy import func
+from app.extensions import db, survey_cache
+from app.api.models import Survey, Question, Option, ResultTally
+from app.api.serializers import SURVEY_COLUMNS, QUESTION_COLUMNS, OPTION_COLUMNS, survey_row, question_row, option_row
+from app.api.tallies import response_counts, response_total_condition
+
+PUBLISHED_SURVEYS_KEY = 'published-surveys'
+
+
+def survey_key(survey_id):
+    return f'survey:{survey_id}'
+
+
+def _load_definitions(*criteria):
+    # 三条列查询分别取调查、问题和选项，不构造 ORM 对象；问题和选项按 id 排列（与原关系加载的顺序一致）
+    surveys = db.session.query(*SURVEY_COLUMNS).filter(*criteria).order_by(Survey.id).all()
+    if not surveys:
+        return []
+    questions = db.session.query(*QUESTION_COLUMNS).join(Survey, Question.survey_id == Survey.id).filter(
+        *criteria
+    ).order_by(Question.id).all()
+    options = db.session.query(*OPTION_COLUMNS).join(Question, Option.question_id == Question.id).join(
+        Survey, Question.survey_id == Survey.id
+    ).filter(*criteria).order_by(Option.id).all()
+
+    options_by_question = {}
+    for option in options:
+        options_by_question.setdefault(option.question_id, []).append(option_row(option))
+    questions_by_survey = {}
+    for question in questions:
+        questions_by_survey.setdefault(question.survey_id, []).append(
+            question_row(question, options_by_question.get(question.id, []))
+        )
+
+    definitions = []
+    for survey in surveys:
+        survey_data = survey_row(survey, response_count=0)
+        # 定义会写入缓存（redis 后端以 JSON 保存），时间先转为字符串
+        survey_data['created_at'] = survey.created_at.isoformat()
+        survey_data['updated_at'] = survey.updated_at.isoformat()
+        survey_data['questions'] = questions_by_survey.get(survey.id, [])
+        definitions.append(survey_data)
+    return definitions
+
+
+def _load_survey(survey_id):
+    definitions = _load_definitions(Survey.id == survey_id)
+    return definitions[0] if definitions else None
+
+
+def _load_published():
+    return _load_definitions(Survey.is_published == True)
+
+
+def _with_response_counts(definitions):
+    # 响应数变化频繁，不放入缓存，读取时从计数表补上
+    counts = response_counts([d['id'] for d in definitions])
+    return [dict(d, response_count=counts.get(d['id'], 0)) for d in definitions]
+
+
+def get_survey_definition(survey_id, version=None):
+    # version 为 survey_version() 的结果：缓存中的定义与其 updated_at 不一致时重新加载
+    is_fresh = None if version is None else (lambda d: d['updated_at'] == version[1])
+    survey_data = survey_cache.get_or_load(survey_key(survey_id), lambda: _load_survey(survey_id), is_fresh)
+    if survey_data is None:
+        return None
+    return _with_response_counts([survey_data])[0]
+
+
+def get_published_definitions(version=None):
+    # version 为 published_version() 的结果：缓存中的列表与其数量、id 之和、最大 updated_at 不一致时重新加载
+    is_fresh = None if version is None else (lambda defs: _published_key(defs) == tuple(version[:3]))
+    return _with_response_counts(survey_cache.get_or_load(PUBLISHED_SURVEYS_KEY, _load_published, is_fresh))
+
+
+def definition_version(survey_data):
+    # 由实际返回的定义计算版本，与 survey_version() 的格式一致，保证 ETag 与响应体对应
+    return (survey_data['id'], survey_data['updated_at'], survey_data['response_count'])
+
+
+def _published_key(definitions):
+    if not definitions:
+        return (0, 0, '')
+    updated_at = max(datetime.datetime.fromisoformat(d['updated_at']) for d in definitions)
+    return (len(definitions), sum(d['id'] for d in definitions), updated_at.isoformat())
+
+
+def published_definitions_version(definitions):
+    return _published_key(definitions) + (sum(d['response_count'] for d in definitions),)
+
+
+def invalidate_survey(survey_id):
+    survey_cache.delete(survey_key(survey_id), PUBLISHED_SURVEYS_KEY)
+
+
+def survey_version(survey_id):
+    # 只读取 updated_at 和响应数，用于生成 ETag，不加载问题和选项
+    row = db.session.query(Survey.updated_at, ResultTally.count).outerjoin(
+        ResultTally, response_total_condition(Survey.id)
+    ).filter(Survey.id == survey_id).first()
+    if row is None:
+        return None
+    return (survey_id, row.updated_at.isoformat(), row.count or 0)
+
+
+def published_version():
+    # 已发布调查的数量、id 之和以及最大 updated_at 共同反映列表的增删和修改
+    row = db.session.query(
+        func.count(Survey.id), func.sum(Survey.id), func.max(Survey.updated_at), func.sum(ResultTally.count)
+    ).outerjoin(ResultTally, response_total_condition(Survey.id)).filter(Survey.is_published == True).one()
+    count, id_sum, updated_at, responses = row
+    return (count, id_sum or 0, updated_at.isoformat() if updated_at else '', responses or 0)
@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from sqlalchemy import select
+from app.extensions import db
+from app.api.models import SurveyResponse, QuestionResponse
+from app.api.loaders import render_answer
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# 每次从数据库游标取出的行数，以及每累计多少条响应向客户端输出一次
+FETCH_SIZE = 1000
+FLUSH_EVERY = 200
+# CSV 单元格中会被电子表格解释为公式的开头字符
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+MULTI_CHOICE_SEPARATOR = '; '
+
+
+def iter_wide_rows(survey_id, questions_dict, options_dict):
+    # 使用服务端游标按响应 id 顺序读取，每条响应产出一行：
+    # (response_id, created_at, user_id, {question_id: answer})
+    stmt = select(
+        SurveyResponse.id,
+        SurveyResponse.created_at,
+        SurveyResponse.user_id,
+        QuestionResponse.question_id,
+        QuestionResponse.option_id,
+        QuestionResponse.text_response
+    ).select_from(SurveyResponse).outerjoin(
+        QuestionResponse, QuestionResponse.survey_response_id == SurveyResponse.id
+    ).where(
+        SurveyResponse.survey_id == survey_id
+    ).order_by(SurveyResponse.id, QuestionResponse.id).execution_options(
+        stream_results=True, yield_per=FETCH_SIZE
+    )
+
+    current = None
+    answers = {}
+    for row in db.session.execute(stmt):
+        if current is None or row.id != current[0]:
+            if current is not None:
+                yield current + (_join_answers(answers),)
+            current = (row.id, row.created_at, row.user_id)
+            answers = {}
+
+        question = questions_dict.get(row.question_id)
+        if not question:
+            continue
+        if question.type == 3:
+            answer = row.text_response
+        elif row.option_id:
+            answer = render_answer(question.type, options_dict.get(row.option_id), row.text_response)
+        else:
+            continue
+        if answer is not None:
+            answers.setdefault(question.id, []).append(answer)
+
+    if current is not None:
+        yield current + (_join_answers(answers),)
+
+
+def _join_answers(answers):
+    return {q_id: MULTI_CHOICE_SEPARATOR.join(values) for q_id, values in answers.items()}
+
+
+def _header(questions_dict):
+    return ['response_id', 'created_at', 'user_id'] + [q.text for q in questions_dict.values()]
+
+
+def _cells(row, questions_dict):
+    response_id, created_at, user_id, answers = row
+    return [response_id, created_at.isoformat(), user_id] + [answers.get(q_id, '') for q_id in questions_dict]
+
+
+def _csv_safe(values):
+    # 以 = + - @（及制表符、回车）开头的文本会被电子表格当作公式执行，前面加单引号使其按文本显示；
+    # XLSX 使用内联字符串单元格，不会被当作公式，无需处理
+    return [f"'{value}" if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+            for value in values]
+
+
+def generate_csv(rows, questions_dict):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 带 BOM 以便 Excel 正确识别中文
+    buffer.write('\ufeff')
+    writer.writerow(_csv_safe(_header(questions_dict)))
+    for i, row in enumerate(rows, 1):
+        writer.writerow(_csv_safe(_cells(row, questions_dict)))
+        if i % FLUSH_EVERY == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_ndjson(rows, questions_dict):
+    lines = []
+    for response_id, created_at, user_id, answers in rows:
+        lines.append(json.dumps({
+            'response_id': response_id,
+            'created_at': created_at.isoformat(),
+            'user_id': user_id,
+            'answers': {str(q_id): answer for q_id, answer in answers.items()}
+        }, ensure_ascii=False))
+        if len(lines) >= FLUSH_EVERY:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class _StreamBuffer(io.RawIOBase):
+    # 不可寻址的写缓冲区，zipfile 会改用 data descriptor 以流式写出压缩包
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_STATIC_PARTS = [
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Responses" sheetId="1" r:id="rId1"/></sheets>'
+     '</workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+]
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None or value == '':
+            cells.append('<c/>')
+        elif isinstance(value, int) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub('', str(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+def generate_xlsx(rows, questions_dict):
+    # 只包含一个工作表的最小 XLSX，单元格使用内联字符串，无需共享字符串表
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS:
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(_header(questions_dict)).encode('utf-8'))
+            for i, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(_cells(row, questions_dict)).encode('utf-8'))
+                if i % FLUSH_EVERY == 0:
+                    chunk = buffer.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+GENERATORS = {
+    'csv': generate_csv,
+    'ndjson': generate_ndjson,
+    'xlsx': generate_xlsx,
+}
+
+
+def generate_export(export_format, survey_id, questions_dict, options_dict):
+    rows = iter_wide_rows(survey_id, questions_dict, options_dict)
+    return GENERATORS[export_format](rows, questions_dict)
@@ -0,0 +1,35 @@
+from app.extensions import db
+
+
+def _upsert_statement(dialect_name, table, keys, column):
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={column: table.c[column] + stmt.excluded[column]}
+    )
+
+
+def increment_rows(table, keys, column, rows):
+    # 在当前事务中把 rows（包含 keys 各列和增量 column 的字典）累加到计数表，不存在的行会被创建
+    if not rows:
+        return
+    stmt = _upsert_statement(db.session.get_bind().dialect.name, table, keys, column)
+    if stmt is not None:
+        db.session.execute(stmt, rows)
+        return
+
+    # 其他数据库：先尝试更新，不存在时再插入
+    for row in rows:
+        result = db.session.execute(
+            table.update().where(*[table.c[key] == row[key] for key in keys]).values(
+                {column: table.c[column] + row[column]}
+            )
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(**row))
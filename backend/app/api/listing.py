@@ -0,0 +1,83 @@
+import base64
+import datetime
+import json
+from sqlalchemy import and_, or_
+from app.extensions import db
+from app.api.models import Survey, ResultTally
+from app.api.tallies import response_total_condition
+from app.api.serializers import SURVEY_COLUMNS, survey_row
+
+SORT_COLUMNS = {
+    'id': Survey.id,
+    'title': Survey.title,
+    'created_at': Survey.created_at,
+    'updated_at': Survey.updated_at,
+}
+
+_DATETIME_SORTS = ('created_at', 'updated_at')
+
+
+class ListingError(ValueError):
+    pass
+
+
+def encode_cursor(sort, value, survey_id):
+    if sort in _DATETIME_SORTS:
+        value = value.isoformat()
+    raw = json.dumps([value, survey_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(sort, cursor):
+    try:
+        value, survey_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if sort in _DATETIME_SORTS:
+            value = datetime.datetime.fromisoformat(value)
+        return value, int(survey_id)
+    except (ValueError, TypeError):
+        raise ListingError('Invalid cursor')
+
+
+def list_surveys(sort='id', order='asc', cursor=None, limit=None, is_published=None, title=None):
+    # 一条列查询返回调查及其响应数（来自计数表），按 (排序列, id) 做 keyset 分页
+    if sort not in SORT_COLUMNS:
+        raise ListingError('Unsupported sort column')
+    if order not in ('asc', 'desc'):
+        raise ListingError('order must be asc or desc')
+
+    column = SORT_COLUMNS[sort]
+    descending = order == 'desc'
+
+    query = db.session.query(*SURVEY_COLUMNS, ResultTally.count.label('response_count')).outerjoin(
+        ResultTally, response_total_condition(Survey.id)
+    )
+    if is_published is not None:
+        query = query.filter(Survey.is_published == is_published)
+    if title:
+        query = query.filter(Survey.title.contains(title, autoescape=True))
+
+    if cursor is not None:
+        value, last_id = decode_cursor(sort, cursor)
+        if sort == 'id':
+            query = query.filter(Survey.id < last_id if descending else Survey.id > last_id)
+        elif descending:
+            query = query.filter(or_(column < value, and_(column == value, Survey.id < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, Survey.id > last_id)))
+
+    if descending:
+        query = query.order_by(column.desc(), Survey.id.desc())
+    else:
+        query = query.order_by(column.asc(), Survey.id.asc())
+
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, sort), last.id)
+
+    return [survey_row(row, row.response_count or 0) for row in rows], next_cursor
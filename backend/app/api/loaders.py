@@ -0,0 +1,116 @@
+from app.extensions import db
+from app.api.models import Question, Option, SurveyResponse, QuestionResponse
+
+
+def load_survey_definition(survey_id):
+    # 一次性加载调查的所有问题和选项，返回 {id: row} 映射
+    questions = db.session.query(
+        Question.id, Question.text, Question.type
+    ).filter(Question.survey_id == survey_id).order_by(Question.order, Question.id).all()
+
+    options = db.session.query(
+        Option.id, Option.question_id, Option.text
+    ).join(Question, Option.question_id == Question.id).filter(
+        Question.survey_id == survey_id
+    ).order_by(Option.question_id, Option.order, Option.id).all()
+
+    questions_dict = {q.id: q for q in questions}
+    options_dict = {o.id: o for o in options}
+    return questions_dict, options_dict
+
+
+def render_answer(question_type, option, text_response):
+    # 将一条回答渲染为可读文本（与原 get_survey_responses 的输出保持一致）
+    if question_type == 3:  # Text question
+        return text_response
+    # 如果有文本响应，说明是"其他"选项
+    if text_response:
+        # 如果选项文本是"其他"，则只显示用户输入的内容
+        if option and option.text == "其他":
+            return text_response
+        return f"{option.text}: {text_response}" if option else f"Other: {text_response}"
+    return option.text if option else 'Unknown option'
+
+
+def load_survey_responses(survey_id, questions_dict, options_dict, cursor=None, limit=None):
+    # 按 SurveyResponse.id 做游标分页，每页固定两条查询：
+    # 一条取响应，一条按 id 区间取该页所有问题回答
+    query = db.session.query(
+        SurveyResponse.id, SurveyResponse.survey_id, SurveyResponse.user_id, SurveyResponse.created_at
+    ).filter(SurveyResponse.survey_id == survey_id)
+    if cursor is not None:
+        query = query.filter(SurveyResponse.id > cursor)
+    query = query.order_by(SurveyResponse.id)
+    if limit is not None:
+        # 多取一条用于判断是否还有下一页
+        query = query.limit(limit + 1)
+    responses = query.all()
+
+    next_cursor = None
+    if limit is not None and len(responses) > limit:
+        responses = responses[:limit]
+        next_cursor = responses[-1].id
+
+    if not responses:
+        return [], next_cursor
+
+    question_responses = db.session.query(
+        QuestionResponse.survey_response_id,
+        QuestionResponse.question_id,
+        QuestionResponse.option_id,
+        QuestionResponse.text_response
+    ).join(SurveyResponse, QuestionResponse.survey_response_id == SurveyResponse.id).filter(
+        SurveyResponse.survey_id == survey_id,
+        SurveyResponse.id.between(responses[0].id, responses[-1].id)
+    ).order_by(QuestionResponse.survey_response_id, QuestionResponse.id).all()
+
+    grouped = {}
+    for qr in question_responses:
+        grouped.setdefault(qr.survey_response_id, []).append(qr)
+
+    result = []
+    for response in responses:
+        processed_responses = []
+        for qr in grouped.get(response.id, ()):
+            question = questions_dict.get(qr.question_id)
+            if not question:
+                continue
+
+            response_info = {
+                'question_id': qr.question_id,
+                'question_text': question.text,
+                'question_type': question.type
+            }
+
+            if question.type == 3:  # Text question
+                response_info['response'] = qr.text_response
+            else:  # Choice question
+                if qr.option_id:
+                    option = options_dict.get(qr.option_id)
+                    response_info['response'] = render_answer(question.type, option, qr.text_response)
+                    response_info['option_id'] = qr.option_id
+                else:
+                    response_info['response'] = 'No response'
+
+            processed_responses.append(response_info)
+
+        result.append({
+            'id': response.id,
+            'survey_id': response.survey_id,
+            'user_id': response.user_id,
+            'created_at': response.created_at,
+            'question_responses': processed_responses
+        })
+
+    return result, next_cursor
+
+
+def iter_survey_responses(survey_id, questions_dict, options_dict, page_size):
+    # 按游标逐页读取全部响应，每次产出一页，内存中只保留当前页
+    cursor = None
+    while True:
+        page, cursor = load_survey_responses(survey_id, questions_dict, options_dict, cursor=cursor, limit=page_size)
+        if page:
+            yield page
+        if cursor is None:
+            return
@@ -1,21 +1,24 @@
-from app.extensions import db
+from app.extensions import db, password_hasher
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, nullable=False, default=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
+    # 哈希在有界线程池中计算，方法和参数由 PASSWORD_HASH_METHOD 配置
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -35,13 +38,22 @@ class Survey(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # 已发布调查列表及按更新时间排序
+        db.Index('ix_surveys_is_published_updated_at', 'is_published', 'updated_at'),
+    )
+    
     # Relationship to questions
     questions = db.relationship('Question', backref='survey', lazy=True, cascade='all, delete-orphan')
     
     # Relationship to responses
     responses = db.relationship('SurveyResponse', backref='survey', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def count_responses(self):
+        # 使用 COUNT 查询，避免为了计数加载所有响应
+        return SurveyResponse.query.filter_by(survey_id=self.id).count()
+    
+    def to_dict(self, response_count=None):
         return {
             'id': self.id,
             'title': self.title,
@@ -49,7 +61,7 @@ class Survey(db.Model):
             'is_published': self.is_published,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'response_count': len(self.responses)
+            'response_count': self.count_responses() if response_count is None else response_count
         }
 
 class Question(db.Model):
@@ -61,6 +73,10 @@ class Question(db.Model):
     required = db.Column(db.Boolean, nullable=False, default=False)  # False: not required, True: required
     order = db.Column(db.Integer, nullable=False, default=0)
     
+    __table_args__ = (
+        db.Index('ix_questions_survey_id_order', 'survey_id', 'order'),
+    )
+    
     # Relationship to options
     options = db.relationship('Option', backref='question', lazy=True, cascade='all, delete-orphan')
     
@@ -82,6 +98,10 @@ class Option(db.Model):
     text = db.Column(db.String(255), nullable=False)
     order = db.Column(db.Integer, nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_options_question_id_order', 'question_id', 'order'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -97,6 +117,11 @@ class SurveyResponse(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
+    __table_args__ = (
+        # 按调查做游标分页和导出（survey_id 过滤、id 排序）
+        db.Index('ix_survey_responses_survey_id_id', 'survey_id', 'id'),
+    )
+    
     # Relationship to question responses
     question_responses = db.relationship('QuestionResponse', backref='survey_response', lazy=True, cascade='all, delete-orphan')
     
@@ -119,6 +144,14 @@ class QuestionResponse(db.Model):
     option_id = db.Column(db.Integer, db.ForeignKey('options.id'), nullable=True)  # For choice questions
     text_response = db.Column(db.Text, nullable=True)  # For text questions
     
+    __table_args__ = (
+        db.Index('ix_question_responses_survey_response_id', 'survey_response_id'),
+        # 计数表重建及按问题/选项统计
+        db.Index('ix_question_responses_question_id_option_id', 'question_id', 'option_id'),
+        # 筛选与交叉分析：按问题取出 (响应, 选项)，以及按 (问题, 响应) 查找另一道题的回答，均不回表
+        db.Index('ix_question_responses_question_id_survey_response_id', 'question_id', 'survey_response_id', 'option_id'),
+    )
+    
     # Relationships
     question = db.relationship('Question')
     option = db.relationship('Option')
@@ -130,4 +163,84 @@ class QuestionResponse(db.Model):
             'question_id': self.question_id,
             'option_id': self.option_id,
             'text_response': self.text_response
-        }
\ No newline at end of file
+        }
+
+class ResultTally(db.Model):
+    # 按 (survey_id, question_id, option_id) 增量维护的计数表，用于快速汇总调查结果
+    # option_id = 0 的行记录回答了该问题的响应数，question_id = option_id = 0 的行记录调查的总响应数
+    __tablename__ = 'result_tallies'
+    survey_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    question_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    option_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'survey_id': self.survey_id,
+            'question_id': self.question_id,
+            'option_id': self.option_id,
+            'count': self.count
+        }
+
+class IngestReceipt(db.Model):
+    # 异步写入模式下，记录队列回执与写入的响应之间的对应关系，用于崩溃恢复时去重
+    __tablename__ = 'ingest_receipts'
+    receipt = db.Column(db.String(32), primary_key=True)
+    survey_response_id = db.Column(db.Integer, db.ForeignKey('survey_responses.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'receipt': self.receipt,
+            'survey_response_id': self.survey_response_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+class SurveyCounter(db.Model):
+    # 仪表盘统计的汇总计数，由创建/发布/删除/提交等操作在同一事务中增量维护
+    # name 为 surveys、published_surveys、responses，或 responses@<小时> 形式的按小时响应数
+    __tablename__ = 'survey_counters'
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'value': self.value
+        }
+
+class ResponseRollup(db.Model):
+    # 按时间桶（minute/hour/day）汇总的响应数，提交时增量维护；
+    # 主键 (survey_id, bucket, bucket_start) 使时间序列查询成为一次索引范围扫描
+    __tablename__ = 'response_rollups'
+    survey_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bucket = db.Column(db.String(8), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'survey_id': self.survey_id,
+            'bucket': self.bucket,
+            'bucket_start': self.bucket_start.isoformat(),
+            'count': self.count
+        }
+
+class AnswerTerm(db.Model):
+    # 文本回答的倒排索引（数据库不支持 FTS5 时使用），每个 (调查, 词项, 回答) 一行，tf 为词频；
+    # 主键以 (survey_id, term) 开头，使按调查检索成为一次索引范围扫描
+    __tablename__ = 'answer_terms'
+    survey_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    term = db.Column(db.String(64), primary_key=True)
+    question_response_id = db.Column(db.Integer, primary_key=True, autoincrement=False, index=True)
+    question_id = db.Column(db.Integer, nullable=False)
+    tf = db.Column(db.Integer, nullable=False, default=1)
+    
+    def to_dict(self):
+        return {
+            'survey_id': self.survey_id,
+            'term': self.term,
+            'question_response_id': self.question_response_id,
+            'question_id': self.question_id,
+            'tf': self.tf
+        }
@@ -0,0 +1,97 @@
+import re
+from sqlalchemy import event, text
+from app.extensions import db, read_replica, survey_cache
+
+# 数据量随响应增长的表，这些表上的查询必须走索引
+HOT_TABLES = ('survey_responses', 'question_responses', 'questions', 'options', 'result_tallies', 'response_rollups',
+              'answer_terms')
+
+ROUTES = (
+    '/api/surveys?limit=50',
+    '/api/surveys/{survey_id}',
+    '/api/published-surveys',
+    '/api/survey-responses/{survey_id}?limit=50',
+    '/api/surveys/{survey_id}/results',
+    '/api/surveys/{survey_id}/timeseries?bucket=hour',
+    '/api/surveys/{survey_id}/search?q=survey',
+    '/api/surveys/{survey_id}/export?format=ndjson',
+)
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def capture_statements(app, url):
+    # 通过测试客户端请求路由，记录其执行的所有 SELECT 语句及参数；
+    # 报表接口经 read_replica 路由到只读连接，主库、各个 bind 和只读连接上的语句都要记录
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engines = set(db.engines.values())
+    if read_replica.engine is not None:
+        engines.add(read_replica.engine)
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        survey_cache.clear()
+        response = app.test_client().get(url)
+        response.get_data()
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def explain(connection, statement, parameters):
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[-1] for row in rows]
+    if dialect == 'postgresql':
+        # 小表上规划器可能更愿意顺序扫描，这里关闭以检查是否存在可用索引
+        connection.execute(text('SET LOCAL enable_seqscan = off'))
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters)
+        return [row[0] for row in rows]
+    raise RuntimeError(f'Query plan checks are not supported on {dialect}')
+
+
+def full_scans(dialect, plan):
+    pattern = _SQLITE_SCAN if dialect == 'sqlite' else _POSTGRES_SCAN
+    tables = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) in HOT_TABLES:
+            tables.append(match.group(1))
+    return tables
+
+
+def check_query_plans(app, survey_id, routes=ROUTES):
+    # 返回每条语句的执行计划以及其中未使用索引的热点表；没有记录到语句的路由以 error 标出
+    report = []
+    with app.app_context():
+        captured = [
+            (route.format(survey_id=survey_id), capture_statements(app, route.format(survey_id=survey_id)))
+            for route in routes
+        ]
+        with db.engine.connect() as connection:
+            dialect = connection.dialect.name
+            for url, statements in captured:
+                if not statements:
+                    # 没有记录到任何语句说明检查本身失效（如查询走了未监听的连接），按失败处理
+                    report.append({'url': url, 'statement': None, 'plan': [], 'full_scans': [],
+                                   'error': 'no statements captured'})
+                for statement, parameters in statements:
+                    with connection.begin():
+                        plan = explain(connection, statement, parameters)
+                    report.append({
+                        'url': url,
+                        'statement': statement,
+                        'plan': plan,
+                        'full_scans': full_scans(dialect, plan),
+                        'error': None,
+                    })
+    return report
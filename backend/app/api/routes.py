@@ -1,35 +1,48 @@
-from flask import jsonify, request
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
 from app.api import api_bp
-from app.extensions import db
+from app.extensions import (
+    db, read_replica, survey_cache, principal_cache, password_hasher, ingestion_queue, live_updates, request_metrics,
+    rate_limiter
+)
 from app.api.models import User, Survey, Question, Option, SurveyResponse, QuestionResponse
+from app.api.loaders import load_survey_definition, load_survey_responses, iter_survey_responses
+from app.api.serializers import USER_COLUMNS, user_row
+from app.api.tallies import retract_submission, drop_tallies, load_survey_results
+from app.api.export import EXPORT_FORMATS, generate_export
+from app.api.submissions import SubmissionError, load_answer_map, parse_submission, write_submissions, drop_receipts
+from app.api.definitions import (
+    get_survey_definition, get_published_definitions, invalidate_survey, survey_version, published_version,
+    definition_version, published_definitions_version
+)
+from app.api.conditional import make_etag, not_modified, with_etag
+from app.api.listing import ListingError, list_surveys
+from app.api.counters import (
+    TOTAL_SURVEYS, PUBLISHED_SURVEYS, bump_counters, load_survey_stats, retract_responses, retract_survey_responses
+)
+from app.api.timeseries import TimeseriesError, parse_range, load_timeseries, drop_rollups, retract_rollups
+from app.api.analytics import AnalyticsError, parse_filters, load_filtered_results, load_crosstab
+from app.api.search import SearchError, search_answers, unindex_response, unindex_survey
+from app.api.survey_diff import diff_survey_questions, apply_survey_diff
+from app.api.auth import SECRET_KEY, token_required, invalidate_user
+from app.passwords import HashingBusyError
+from app.live import SubscriberLimitError, format_event
+from app.serialization import vary_on_accept, wants_msgpack
+from sqlalchemy import text, update
+from sqlalchemy.exc import SQLAlchemyError
 import datetime
-from functools import wraps
-import os
-
-# 密钥用于JWT token签名
-SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
+import time
 
 # 直接使用jwt模块的函数
 import jwt
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
-            return jsonify({'message': 'Token is missing'}), 401
-        try:
-            # 移除Bearer前缀
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = User.query.filter_by(id=data['user_id']).first()
-        except:
-            return jsonify({'message': 'Token is invalid'}), 401
-        return f(current_user, *args, **kwargs)
-    return decorated
+@api_bp.errorhandler(HashingBusyError)
+def handle_hashing_busy(e):
+    response = jsonify({'message': 'Server is busy, please try again later'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 @api_bp.route('/register', methods=['POST'])
+@rate_limiter.limit
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -66,6 +79,7 @@ def register():
     }), 201
 
 @api_bp.route('/login', methods=['POST'])
+@rate_limiter.limit
 def login():
     data = request.get_json()
     username = data.get('username')
@@ -80,6 +94,11 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({'message': 'Invalid username or password'}), 401
     
+    # 哈希参数变化后，登录成功时按新参数重新哈希
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+    
     # 生成token
     token = jwt.encode({
         'user_id': user.id,
@@ -99,11 +118,8 @@ def get_users(current_user):
     if not current_user.is_admin:
         return jsonify({'message': 'Permission denied'}), 403
     
-    users = User.query.all()
-    result = []
-    for user in users:
-        result.append(user.to_dict())
-    return jsonify(result)
+    users = db.session.query(*USER_COLUMNS).order_by(User.id).all()
+    return jsonify([user_row(user) for user in users])
 
 @api_bp.route('/users/<int:user_id>', methods=['GET'])
 @token_required
@@ -151,6 +167,8 @@ def update_user(current_user, user_id):
         user.set_password(data['password'])
     
     db.session.commit()
+    # 用户信息或权限变化后，使其已缓存的认证信息失效
+    invalidate_user(user_id)
     return jsonify(user.to_dict())
 
 @api_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -166,35 +184,46 @@ def delete_user(current_user, user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_user(user_id)
     return jsonify({'message': 'User deleted successfully'}), 200
 
 @api_bp.route('/surveys', methods=['GET'])
+@read_replica.route
 def get_surveys():
-    surveys = Survey.query.all()
-    result = []
-    for survey in surveys:
-        survey_data = survey.to_dict()
-        result.append(survey_data)
-    return jsonify(result)
+    # 支持 keyset 分页（cursor + limit）、排序（sort/order）以及按发布状态和标题筛选
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit <= 0:
+        return jsonify({'message': 'limit must be a positive integer'}), 400
+    
+    is_published = request.args.get('is_published')
+    if is_published is not None:
+        is_published = is_published.lower() in ('1', 'true', 'yes')
+    
+    try:
+        result, next_cursor = list_surveys(
+            sort=request.args.get('sort', 'id'),
+            order=request.args.get('order', 'asc').lower(),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            is_published=is_published,
+            title=request.args.get('title')
+        )
+    except ListingError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    response = jsonify(result)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @api_bp.route('/survey-stats', methods=['GET'])
+@read_replica.route
 def get_survey_stats():
-    total_surveys = Survey.query.count()
-    published_surveys = Survey.query.filter_by(is_published=True).count()
-    
-    # 计算总响应数
-    total_responses = db.session.query(db.func.sum(
-        db.session.query(db.func.count(SurveyResponse.id))
-        .filter(SurveyResponse.survey_id == Survey.id)
-        .correlate(Survey)
-        .as_scalar()
-    )).scalar() or 0
-    
-    return jsonify({
-        'total_surveys': total_surveys,
-        'published_surveys': published_surveys,
-        'total_responses': total_responses
-    })
+    # 只读取 survey_counters 汇总表；hours 为统计最近响应数的小时数，不超过计数的保留时长
+    recent_hours = request.args.get('hours', current_app.config['SURVEY_STATS_RECENT_HOURS'], type=int)
+    if recent_hours is None or not 0 < recent_hours <= current_app.config['SURVEY_COUNTER_RETENTION_HOURS']:
+        return jsonify({'message': 'hours must be between 1 and the counter retention'}), 400
+    return jsonify(load_survey_stats(recent_hours))
 
 @api_bp.route('/surveys', methods=['POST'])
 def create_survey():
@@ -206,6 +235,7 @@ def create_survey():
     # Create new survey
     survey = Survey(title=title, description=description)
     db.session.add(survey)
+    bump_counters({TOTAL_SURVEYS: 1})
     db.session.flush()  # Get the ID of the new survey
     
     # Create each question
@@ -246,10 +276,19 @@ def create_survey():
 
 @api_bp.route('/surveys/<int:survey_id>', methods=['GET'])
 def get_survey(survey_id):
-    survey = Survey.query.get_or_404(survey_id)
-    survey_data = survey.to_dict()
-    survey_data['questions'] = [q.to_dict() for q in survey.questions]
-    return jsonify(survey_data)
+    version = survey_version(survey_id)
+    if version is None:
+        abort(404)
+    etag = make_etag(version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    
+    # ETag 由实际返回的定义计算：缓存与数据库不一致时会重新加载，ETag 始终对应响应体
+    survey_data = get_survey_definition(survey_id, version)
+    if survey_data is None:
+        abort(404)
+    return with_etag(jsonify(survey_data), make_etag(definition_version(survey_data)))
 
 @api_bp.route('/surveys/<int:survey_id>', methods=['PUT'])
 def update_survey(survey_id):
@@ -259,150 +298,339 @@ def update_survey(survey_id):
     # Update survey fields
     survey.title = data.get('title', survey.title)
     survey.description = data.get('description', survey.description)
-    survey.is_published = data.get('is_published', survey.is_published)
-    
-    # Update questions if provided
+    was_published = survey.is_published
+    survey.is_published = bool(data.get('is_published', survey.is_published))
+    if survey.is_published != was_published:
+        # 与 publish/unpublish 接口一致，在同一事务中调整已发布调查的汇总计数
+        bump_counters({PUBLISHED_SURVEYS: 1 if survey.is_published else -1})
+    
+    # Update questions if provided：按 id 对比新旧问题和选项，只执行必要的增删改
+    changes = None
     if 'questions' in data:
-        questions_data = data.get('questions', [])
-        
-        # Delete existing questions (cascade will delete options)
-        for question in survey.questions:
-            db.session.delete(question)
-        
-        # Create new questions
-        for i, question_data in enumerate(questions_data):
-            text = question_data.get('text')
-            type = question_data.get('type')
-            required = question_data.get('required', False)
-            options = question_data.get('options', [])
-            
-            # Create new question
-            question = Question(
-                survey_id=survey.id,
-                text=text,
-                type=type,
-                required=required,
-                order=i
-            )
-            db.session.add(question)
-            db.session.flush()  # Get the ID of the new question
-            
-            # Create options for the question
-            for j, option_text in enumerate(options):
-                option = Option(
-                    question_id=question.id,
-                    text=option_text,
-                    order=j
-                )
-                db.session.add(option)
-    
-    # Update timestamp
-    survey.updated_at = db.func.current_timestamp()
+        changes = apply_survey_diff(diff_survey_questions(survey.id, data.get('questions') or []))
+    
+    # Update timestamp（使用微秒精度，保证同一秒内的多次修改也会生成新的 ETag）
+    survey.updated_at = datetime.datetime.utcnow()
     
     # Commit all changes
     db.session.commit()
+    invalidate_survey(survey.id)
     
     # Return the updated survey
-    survey_data = survey.to_dict()
-    survey_data['questions'] = [q.to_dict() for q in survey.questions]
+    survey_data = get_survey_definition(survey.id)
+    if changes is not None:
+        survey_data['changes'] = changes
     
     return jsonify(survey_data)
 
 @api_bp.route('/surveys/<int:survey_id>', methods=['DELETE'])
 def delete_survey(survey_id):
     survey = Survey.query.get_or_404(survey_id)
+    drop_tallies(survey.id)
+    retract_survey_responses(survey.id)
+    drop_rollups(survey.id)
+    unindex_survey(survey.id)
+    drop_receipts(survey_id=survey.id)
+    bump_counters({TOTAL_SURVEYS: -1, PUBLISHED_SURVEYS: -1 if survey.is_published else 0})
     db.session.delete(survey)
     db.session.commit()
+    invalidate_survey(survey_id)
     return jsonify({'message': 'Survey deleted successfully'}), 200
 
 @api_bp.route('/surveys/<int:survey_id>/publish', methods=['POST'])
 def publish_survey(survey_id):
     survey = Survey.query.get_or_404(survey_id)
-    survey.is_published = True
-    survey.updated_at = db.func.current_timestamp()
+    # 条件更新：只有状态确实发生变化时才调整已发布计数，并发重复请求不会重复计数
+    changed = db.session.execute(
+        update(Survey).where(Survey.id == survey_id, Survey.is_published.is_(False))
+        .values(is_published=True, updated_at=datetime.datetime.utcnow())
+    ).rowcount
+    if changed:
+        bump_counters({PUBLISHED_SURVEYS: 1})
     db.session.commit()
+    invalidate_survey(survey.id)
     return jsonify({'message': 'Survey published successfully', 'survey': survey.to_dict()}), 200
 
 @api_bp.route('/surveys/<int:survey_id>/unpublish', methods=['POST'])
 def unpublish_survey(survey_id):
     survey = Survey.query.get_or_404(survey_id)
-    survey.is_published = False
-    survey.updated_at = db.func.current_timestamp()
+    # 条件更新：只有状态确实发生变化时才调整已发布计数，并发重复请求不会重复计数
+    changed = db.session.execute(
+        update(Survey).where(Survey.id == survey_id, Survey.is_published.is_(True))
+        .values(is_published=False, updated_at=datetime.datetime.utcnow())
+    ).rowcount
+    if changed:
+        bump_counters({PUBLISHED_SURVEYS: -1})
     db.session.commit()
+    invalidate_survey(survey.id)
     return jsonify({'message': 'Survey unpublished successfully', 'survey': survey.to_dict()}), 200
 
 @api_bp.route('/published-surveys', methods=['GET'])
 def get_published_surveys():
-    surveys = Survey.query.filter_by(is_published=True).all()
-    result = []
-    for survey in surveys:
-        survey_data = survey.to_dict()
-        survey_data['questions'] = [q.to_dict() for q in survey.questions]
-        result.append(survey_data)
-    return jsonify(result)
+    version = published_version()
+    cached = not_modified(make_etag(version))
+    if cached is not None:
+        return cached
+    definitions = get_published_definitions(version)
+    return with_etag(jsonify(definitions), make_etag(published_definitions_version(definitions)))
+
+@api_bp.route('/hashing/stats', methods=['GET'])
+def get_hashing_stats():
+    return jsonify(password_hasher.stats())
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        'surveys': survey_cache.stats(),
+        'principals': principal_cache.stats()
+    })
+
+@api_bp.route('/live/stats', methods=['GET'])
+def get_live_stats():
+    return jsonify(live_updates.stats())
+
+@api_bp.route('/read-replica/stats', methods=['GET'])
+def get_read_replica_stats():
+    return jsonify(read_replica.stats())
+
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus 抓取端点
+    return Response(request_metrics.render() + rate_limiter.render(), mimetype='text/plain; version=0.0.4')
+
+@api_bp.route('/rate-limit/stats', methods=['GET'])
+def get_rate_limit_stats():
+    return jsonify(rate_limiter.stats())
+
+@api_bp.route('/health', methods=['GET'])
+def health_check():
+    # 就绪检查：数据库可查询、异步写入队列可访问时返回 200，否则返回 503
+    checks = {}
+    try:
+        db.session.execute(text('SELECT 1'))
+        checks['database'] = 'ok'
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception('Health check: database unavailable')
+        checks['database'] = 'unavailable'
+    if ingestion_queue.enabled:
+        try:
+            checks['ingest_queue'] = ingestion_queue.stats()
+        except Exception:
+            current_app.logger.exception('Health check: ingest queue unavailable')
+            checks['ingest_queue'] = 'unavailable'
+    healthy = 'unavailable' not in checks.values()
+    return jsonify({'status': 'ok' if healthy else 'unavailable', 'checks': checks}), 200 if healthy else 503
+
+@api_bp.route('/surveys/<int:survey_id>/results', methods=['GET'])
+@read_replica.route
+def get_survey_results(survey_id):
+    # 没有筛选条件时直接读取预先维护的计数表，开销只与选项数量相关；
+    # filter=问题id:选项id[,选项id] / exclude=... 可重复，按条件筛选响应后在数据库中分组统计
+    Survey.query.get_or_404(survey_id)
+    questions_dict, options_dict = load_survey_definition(survey_id)
+    try:
+        filters = _answer_filters(questions_dict, options_dict)
+    except AnalyticsError as e:
+        return jsonify({'message': str(e)}), 400
+    if filters:
+        return jsonify(load_filtered_results(survey_id, filters, questions_dict, options_dict))
+    return jsonify(load_survey_results(survey_id, questions_dict, options_dict))
+
+@api_bp.route('/surveys/<int:survey_id>/crosstab', methods=['GET'])
+@read_replica.route
+def get_survey_crosstab(survey_id):
+    # row/column 为两道选择题的 id，支持与 /results 相同的 filter/exclude 条件
+    Survey.query.get_or_404(survey_id)
+    questions_dict, options_dict = load_survey_definition(survey_id)
+    row_id = request.args.get('row', type=int)
+    column_id = request.args.get('column', type=int)
+    if row_id is None or column_id is None:
+        return jsonify({'message': 'row and column question ids are required'}), 400
+    try:
+        filters = _answer_filters(questions_dict, options_dict)
+        return jsonify(load_crosstab(survey_id, row_id, column_id, filters, questions_dict, options_dict))
+    except AnalyticsError as e:
+        return jsonify({'message': str(e)}), 400
+
+def _answer_filters(questions_dict, options_dict):
+    return parse_filters(
+        request.args.getlist('filter'), request.args.getlist('exclude'), questions_dict, options_dict
+    )
+
+@api_bp.route('/surveys/<int:survey_id>/timeseries', methods=['GET'])
+@read_replica.route
+def get_survey_timeseries(survey_id):
+    # bucket 为 minute/hour/day，start/end 为 ISO 8601 时间（UTC），返回补零后的连续序列
+    bucket = request.args.get('bucket', 'hour')
+    try:
+        start, end, points = parse_range(
+            bucket,
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            max_points=current_app.config['TIMESERIES_MAX_POINTS']
+        )
+    except TimeseriesError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    Survey.query.get_or_404(survey_id)
+    return jsonify(load_timeseries(survey_id, bucket, start, end, points))
+
+@api_bp.route('/surveys/<int:survey_id>/search', methods=['GET'])
+@read_replica.route
+def search_survey_answers(survey_id):
+    # 检索文本题回答和"其他"选项的文本；q 为查询词（中文按字/双字匹配），可用 question_id 限定问题，
+    # 结果按相关度排序，limit/cursor 分页，下一页的 cursor 在 X-Next-Cursor 响应头中返回
+    try:
+        question_id = request.args.get('question_id', type=int)
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({'message': 'limit and cursor must be integers'}), 400
+    if not 1 <= limit <= current_app.config['SEARCH_MAX_LIMIT'] or offset < 0:
+        return jsonify({'message': f"limit must be between 1 and {current_app.config['SEARCH_MAX_LIMIT']}"}), 400
+    
+    Survey.query.get_or_404(survey_id)
+    try:
+        results, next_offset = search_answers(
+            survey_id, request.args.get('q', ''), question_id=question_id, limit=limit, offset=offset
+        )
+    except SearchError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    response = jsonify({'survey_id': survey_id, 'query': request.args.get('q', ''), 'results': results})
+    if next_offset is not None:
+        response.headers['X-Next-Cursor'] = str(next_offset)
+    return response
+
+@api_bp.route('/surveys/<int:survey_id>/live', methods=['GET'])
+def stream_survey_results(survey_id):
+    # Server-Sent Events：先发送一次完整结果（snapshot），之后推送每次提交/删除响应带来的计数增量（tally）；
+    # 连接积压过多或调查的问题、选项被修改时重新发送 snapshot，客户端收到 snapshot 时应以其为准重置本地状态
+    Survey.query.get_or_404(survey_id)
+    try:
+        subscription = live_updates.subscribe(survey_id)
+    except SubscriberLimitError:
+        response = jsonify({'message': 'Too many live subscribers, please try again later'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    heartbeat = current_app.config['LIVE_HEARTBEAT']
+    timeout = current_app.config['LIVE_STREAM_TIMEOUT']
+    
+    def snapshot():
+        questions_dict, options_dict = load_survey_definition(survey_id)
+        results = load_survey_results(survey_id, questions_dict, options_dict)
+        # 长连接期间不占用数据库连接
+        db.session.close()
+        return results
+    
+    try:
+        initial = snapshot()
+    except Exception:
+        subscription.close()
+        raise
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            yield format_event('snapshot', initial)
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                message = subscription.get(min(heartbeat, remaining))
+                if message is False:
+                    return
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield format_event('snapshot', snapshot())
+                elif message is None:
+                    yield ': keep-alive\n\n'
+                elif message.get('refresh'):
+                    yield format_event('snapshot', snapshot())
+                else:
+                    yield format_event('tally', message)
+        finally:
+            subscription.close()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 关闭反向代理（如 nginx）的响应缓冲
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@api_bp.route('/surveys/<int:survey_id>/export', methods=['GET'])
+@read_replica.route
+def export_survey_responses(survey_id):
+    # 以宽表格式流式导出：每条响应一行，每个问题一列
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': 'Unsupported export format'}), 400
+    
+    Survey.query.get_or_404(survey_id)
+    questions_dict, options_dict = load_survey_definition(survey_id)
+    
+    def generate():
+        # 生成器在视图返回后才执行，需要在其内部重新进入只读范围
+        with read_replica.reads():
+            yield from generate_export(export_format, survey_id, questions_dict, options_dict)
+    
+    response = Response(
+        stream_with_context(generate()),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=survey-{survey_id}.{export_format}'
+    return response
 
 @api_bp.route('/survey-responses/<int:survey_id>', methods=['GET'])
+@read_replica.route
 def get_survey_responses(survey_id):
-    # Get all responses for a specific survey
-    survey_responses = SurveyResponse.query.filter_by(survey_id=survey_id).all()
-    result = []
+    # 游标分页参数：cursor 为上一页最后一个响应的 id，limit 为每页条数（不传则返回全部）
+    cursor = request.args.get('cursor', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit <= 0:
+        return jsonify({'message': 'limit must be a positive integer'}), 400
     
     # Get the survey to access questions and options
-    survey = Survey.query.get_or_404(survey_id)
-    questions_dict = {q.id: q for q in survey.questions}
-    options_dict = {}
-    for question in survey.questions:
-        options_dict.update({o.id: o for o in question.options})
-    
-    for response in survey_responses:
-        response_data = response.to_dict()
+    Survey.query.get_or_404(survey_id)
+    questions_dict, options_dict = load_survey_definition(survey_id)
+    
+    page_size = current_app.config['RESPONSES_STREAM_PAGE_SIZE']
+    if limit is None and page_size and not wants_msgpack():
+        # 不分页时以流式 JSON 数组输出：逐页查询、逐页序列化，不在内存中构造完整的响应体
+        def generate():
+            with read_replica.reads():
+                separator = '['
+                for page in iter_survey_responses(survey_id, questions_dict, options_dict, page_size):
+                    yield separator + ','.join(current_app.json.dumps(item, separators=(',', ':')) for item in page)
+                    separator = ','
+                yield ']\n' if separator == ',' else '[]\n'
         
-        # Get all question responses for this survey response
-        question_responses = QuestionResponse.query.filter_by(survey_response_id=response.id).all()
-        
-        # Process question responses to make them more readable
-        processed_responses = []
-        for qr in question_responses:
-            question = questions_dict.get(qr.question_id)
-            if not question:
-                continue
-                
-            response_info = {
-                'question_id': qr.question_id,
-                'question_text': question.text,
-                'question_type': question.type
-            }
-            
-            if question.type == 3:  # Text question
-                response_info['response'] = qr.text_response
-            else:  # Choice question
-                if qr.option_id:
-                    option = options_dict.get(qr.option_id)
-                    # 如果有文本响应，说明是"其他"选项
-                    if qr.text_response:
-                        # 如果选项文本是"其他"，则只显示用户输入的内容
-                        if option and option.text == "其他":
-                            response_info['response'] = qr.text_response
-                        else:
-                            response_info['response'] = f"{option.text}: {qr.text_response}" if option else f"Other: {qr.text_response}"
-                    else:
-                        response_info['response'] = option.text if option else 'Unknown option'
-                    response_info['option_id'] = qr.option_id
-                else:
-                    response_info['response'] = 'No response'
-            
-            processed_responses.append(response_info)
-        
-        response_data['question_responses'] = processed_responses
-        result.append(response_data)
+        return vary_on_accept(Response(stream_with_context(generate()), mimetype='application/json'))
+    
+    result, next_cursor = load_survey_responses(
+        survey_id, questions_dict, options_dict, cursor=cursor, limit=limit
+    )
     
-    return jsonify(result)
+    response = jsonify(result)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
 
 @api_bp.route('/survey-responses/<int:response_id>', methods=['DELETE'])
 def delete_survey_response(response_id):
     # Get the survey response
     survey_response = SurveyResponse.query.get_or_404(response_id)
     
+    # 先扣减结果计数、汇总计数并移除全文索引，再删除响应
+    retract_submission(survey_response)
+    retract_responses([survey_response.created_at])
+    retract_rollups([(survey_response.survey_id, survey_response.created_at)])
+    unindex_response(survey_response.id)
+    drop_receipts(survey_response_id=survey_response.id)
+    
     # Delete the survey response (cascade will delete question responses)
     db.session.delete(survey_response)
     db.session.commit()
@@ -410,122 +638,91 @@ def delete_survey_response(response_id):
     return jsonify({'message': 'Survey response deleted successfully'}), 200
 
 @api_bp.route('/submit', methods=['POST'])
+@rate_limiter.limit
+@rate_limiter.idempotent
 def submit_survey():
     data = request.get_json()
-    survey_id = data.get('survey_id')
-    responses = data.get('responses', {})
-    other_texts = data.get('otherTexts', {})  # 获取其他选项文本
-    
-    # Create a new survey response
-    survey_response = SurveyResponse(survey_id=survey_id)
-    db.session.add(survey_response)
-    db.session.flush()  # Get the ID of the new survey response
-    
-    # Save each question response
-    for question_id, response in responses.items():
-        # Check if this is a multi-choice question (handled differently in frontend)
-        if isinstance(question_id, str) and '-' in question_id:
-            # This is a multi-choice question, handled separately
-            continue
-            
-        # Convert question_id to integer
+    try:
+        survey_id = int(data.get('survey_id'))
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'message': 'survey_id is required'}), 400
+    
+    # 一条查询预加载问题和选项，代替逐题查询
+    answer_map = load_answer_map([survey_id])
+    if survey_id not in answer_map:
+        return jsonify({'message': 'Survey not found'}), 404
+    
+    try:
+        survey_id, answers = parse_submission(data, answer_map)
+    except SubmissionError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # 异步写入模式：提交进入本地持久队列，由后台线程批量写库
+    if ingestion_queue.enabled:
+        receipt = ingestion_queue.enqueue(survey_id, answers)
+        return jsonify({'message': 'Survey submission accepted', 'receipt_id': receipt}), 202
+    
+    # 批量写入响应和问题回答，并在同一事务中更新结果计数表
+    survey_response_id, = write_submissions([(survey_id, answers)])
+    
+    # Commit all changes
+    db.session.commit()
+    
+    return jsonify({'message': 'Survey submitted successfully', 'survey_response_id': survey_response_id})
+
+@api_bp.route('/submit/receipts/<receipt_id>', methods=['GET'])
+def get_submission_receipt(receipt_id):
+    if not ingestion_queue.enabled:
+        return jsonify({'message': 'Submission queue is disabled'}), 404
+    status = ingestion_queue.receipt_status(receipt_id)
+    if status is None:
+        return jsonify({'message': 'Receipt not found'}), 404
+    return jsonify(status)
+
+@api_bp.route('/submit/queue', methods=['GET'])
+def get_submission_queue():
+    if not ingestion_queue.enabled:
+        return jsonify({'mode': 'sync', 'depth': 0, 'lag_seconds': 0.0})
+    return jsonify(ingestion_queue.stats())
+
+@api_bp.route('/submit/batch', methods=['POST'])
+@rate_limiter.limit
+def submit_survey_batch():
+    data = request.get_json()
+    submissions = data.get('submissions') if isinstance(data, dict) else data
+    if not isinstance(submissions, list):
+        return jsonify({'message': 'submissions must be a list'}), 400
+    
+    max_size = current_app.config['SUBMIT_BATCH_MAX_SIZE']
+    if len(submissions) > max_size:
+        return jsonify({'message': f'At most {max_size} submissions are allowed per batch'}), 413
+    
+    # 一次性预加载本批次涉及的所有调查的问题和选项
+    survey_ids = set()
+    for item in submissions:
         try:
-            q_id = int(question_id)
-        except ValueError:
+            survey_ids.add(int(item.get('survey_id')))
+        except (AttributeError, TypeError, ValueError):
             continue
-            
-        # Get the question to determine its type
-        question = Question.query.get(q_id)
-        if not question:
-            continue
-            
-        # Create question response based on question type
-        if question.type == 3:  # Text question
-            question_response = QuestionResponse(
-                survey_response_id=survey_response.id,
-                question_id=q_id,
-                text_response=response
-            )
-        else:  # Choice question (single or multiple)
-            # Handle multiple choice responses
-            if isinstance(response, list):
-                # Multiple choice - create a response for each selected option
-                for option_id in response:
-                    try:
-                        opt_id = int(option_id)
-                        # 检查是否是"其他"选项并包含文本
-                        other_text_key = f"{q_id}-{opt_id}"
-                        if other_text_key in other_texts and other_texts[other_text_key]:
-                            question_response = QuestionResponse(
-                                survey_response_id=survey_response.id,
-                                question_id=q_id,
-                                option_id=opt_id,
-                                text_response=other_texts[other_text_key]  # 保存其他选项文本
-                            )
-                        else:
-                            question_response = QuestionResponse(
-                                survey_response_id=survey_response.id,
-                                question_id=q_id,
-                                option_id=opt_id
-                            )
-                        db.session.add(question_response)
-                    except ValueError:
-                        continue
-                continue  # Skip the db.session.add at the end of the loop
-            else:  # Single choice
-                try:
-                    option_id = int(response)
-                    # 检查是否是"其他"选项并包含文本
-                    other_text_key = f"{q_id}"
-                    if other_text_key in other_texts and other_texts[other_text_key]:
-                        question_response = QuestionResponse(
-                            survey_response_id=survey_response.id,
-                            question_id=q_id,
-                            option_id=option_id,
-                            text_response=other_texts[other_text_key]  # 保存其他选项文本
-                        )
-                    else:
-                        question_response = QuestionResponse(
-                            survey_response_id=survey_response.id,
-                            question_id=q_id,
-                            option_id=option_id
-                        )
-                except ValueError:
-                    continue
-        
-        db.session.add(question_response)
+    answer_map = load_answer_map(list(survey_ids)) if survey_ids else {}
     
-    # Handle multi-choice questions (from the frontend implementation)
-    for question_id, selected_options in data.get('selectedOptions', {}).items():
+    results = []
+    accepted = []
+    for index, item in enumerate(submissions):
         try:
-            q_id = int(question_id)
-        except ValueError:
-            continue
-            
-        # Create a response for each selected option
-        for option_id in selected_options:
-            try:
-                opt_id = int(option_id)
-                # 检查是否是"其他"选项并包含文本
-                other_text_key = f"{q_id}-{opt_id}"
-                if other_text_key in other_texts and other_texts[other_text_key]:
-                    question_response = QuestionResponse(
-                        survey_response_id=survey_response.id,
-                        question_id=q_id,
-                        option_id=opt_id,
-                        text_response=other_texts[other_text_key]  # 保存其他选项文本
-                    )
-                else:
-                    question_response = QuestionResponse(
-                        survey_response_id=survey_response.id,
-                        question_id=q_id,
-                        option_id=opt_id
-                    )
-                db.session.add(question_response)
-            except ValueError:
-                continue
+            accepted.append((index, parse_submission(item, answer_map)))
+        except SubmissionError as e:
+            results.append({'index': index, 'status': 'error', 'message': str(e)})
     
-    # Commit all changes
+    response_ids = write_submissions([parsed for _, parsed in accepted])
     db.session.commit()
     
-    return jsonify({'message': 'Survey submitted successfully', 'survey_response_id': survey_response.id})
\ No newline at end of file
+    for (index, _), survey_response_id in zip(accepted, response_ids):
+        results.append({'index': index, 'status': 'ok', 'survey_response_id': survey_response_id})
+    results.sort(key=lambda r: r['index'])
+    
+    return jsonify({
+        'accepted': len(accepted),
+        'rejected': len(submissions) - len(accepted),
+        'results': results
+    })
@@ -0,0 +1,276 @@
+import html
+import re
+import unicodedata
+from collections import Counter
+from flask import current_app
+from sqlalchemy import case, event, func, insert, text
+from app.extensions import db
+from app.api.models import Question, SurveyResponse, QuestionResponse, AnswerTerm
+
+terms = AnswerTerm.__table__
+
+FTS_TABLE = 'answer_fts'
+FTS_DDL = (f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+           'tokens, survey_id UNINDEXED, question_id UNINDEXED, tokenize = "unicode61")')
+CHUNK_SIZE = 5000
+
+# 中日韩文字（汉字、假名、谚文）的连续片段切成单字/双字，其余字母数字按单词切分
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_TOKEN = re.compile(rf'(?P<cjk>[{_CJK}]+)|(?P<word>(?:(?![{_CJK}])[^\W_])+)')
+
+# 每个数据库连接 URL 检测一次是否可用 FTS5
+_backends = {}
+
+
+class SearchError(ValueError):
+    pass
+
+
+def _normalize(value):
+    # 旧客户端可能把数字等非字符串作为文本回答提交，按其文本形式索引
+    return unicodedata.normalize('NFKC', '' if value is None else str(value)).lower()
+
+
+def tokenize(value, query=False):
+    # 单词原样作为词项；中日韩片段索引时同时生成单字和相邻双字，
+    # 查询时长度大于 1 的片段只用双字，以减少误匹配
+    tokens = []
+    for match in _TOKEN.finditer(_normalize(value)):
+        word = match.group()
+        if match.lastgroup == 'word':
+            tokens.append(word)
+            continue
+        bigrams = [word[i:i + 2] for i in range(len(word) - 1)]
+        if query:
+            tokens.extend(bigrams or [word])
+        else:
+            tokens.extend(word)
+            tokens.extend(bigrams)
+    return tokens
+
+
+def _fts5_available(connection):
+    if connection.dialect.name != 'sqlite':
+        return False
+    return 'ENABLE_FTS5' in {row[0] for row in connection.exec_driver_sql('PRAGMA compile_options')}
+
+
+@event.listens_for(terms, 'after_create')
+def _create_fts_table(target, connection, **kw):
+    # create_all 时一并创建 FTS5 虚拟表（迁移中也会创建）
+    if _fts5_available(connection):
+        connection.exec_driver_sql(FTS_DDL)
+
+
+@event.listens_for(terms, 'before_drop')
+def _drop_fts_table(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def search_backend():
+    # SEARCH_BACKEND：auto（SQLite 支持 FTS5 时使用 FTS5，否则使用 answer_terms 倒排表）、fts5 或 terms
+    configured = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if configured != 'auto':
+        return configured
+    connection = db.session.connection()
+    key = str(connection.engine.url)
+    if key not in _backends:
+        _backends[key] = 'fts5' if _fts5_available(connection) else 'terms'
+    return _backends[key]
+
+
+def ensure_fts_table():
+    db.session.execute(text(FTS_DDL))
+
+
+def index_answers(rows):
+    # rows: [(question_response_id, survey_id, question_id, text)]，只索引非空文本
+    rows = [row for row in rows if row[3]]
+    if not rows:
+        return
+    if search_backend() == 'fts5':
+        db.session.execute(
+            text(f'INSERT INTO {FTS_TABLE} (rowid, tokens, survey_id, question_id) '
+                 'VALUES (:id, :tokens, :survey_id, :question_id)'),
+            [{'id': qr_id, 'tokens': ' '.join(tokenize(value)), 'survey_id': survey_id, 'question_id': question_id}
+             for qr_id, survey_id, question_id, value in rows]
+        )
+        return
+    term_rows = []
+    for qr_id, survey_id, question_id, value in rows:
+        for term, tf in Counter(tokenize(value)).items():
+            term_rows.append({'term': term[:64], 'question_response_id': qr_id,
+                              'survey_id': survey_id, 'question_id': question_id, 'tf': tf})
+    for start in range(0, len(term_rows), CHUNK_SIZE):
+        db.session.execute(insert(terms), term_rows[start:start + CHUNK_SIZE])
+
+
+def unindex_answers(question_response_ids):
+    if not question_response_ids:
+        return
+    if search_backend() == 'fts5':
+        db.session.execute(
+            text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'),
+            [{'id': qr_id} for qr_id in question_response_ids]
+        )
+        return
+    db.session.execute(terms.delete().where(terms.c.question_response_id.in_(question_response_ids)))
+
+
+def unindex_response(survey_response_id):
+    ids = [row[0] for row in db.session.query(QuestionResponse.id).filter(
+        QuestionResponse.survey_response_id == survey_response_id,
+        QuestionResponse.text_response.isnot(None)
+    )]
+    unindex_answers(ids)
+
+
+def unindex_survey(survey_id):
+    if search_backend() == 'fts5':
+        db.session.execute(text(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ('
+            'SELECT question_responses.id FROM question_responses '
+            'JOIN survey_responses ON question_responses.survey_response_id = survey_responses.id '
+            'WHERE survey_responses.survey_id = :survey_id)'
+        ), {'survey_id': survey_id})
+        return
+    db.session.execute(terms.delete().where(terms.c.survey_id == survey_id))
+
+
+def _answer_rows(survey_id=None):
+    query = db.session.query(
+        QuestionResponse.id, SurveyResponse.survey_id, QuestionResponse.question_id, QuestionResponse.text_response
+    ).join(SurveyResponse, QuestionResponse.survey_response_id == SurveyResponse.id).filter(
+        QuestionResponse.text_response.isnot(None), QuestionResponse.text_response != ''
+    )
+    if survey_id is not None:
+        query = query.filter(SurveyResponse.survey_id == survey_id)
+    return query.order_by(QuestionResponse.id).execution_options(yield_per=CHUNK_SIZE)
+
+
+def rebuild_search_index(survey_id=None):
+    # 从 QuestionResponse 全量重建索引，返回索引的回答数；FTS5 虚拟表不存在时先创建
+    if search_backend() == 'fts5':
+        ensure_fts_table()
+        if survey_id is None:
+            db.session.execute(text(f'DELETE FROM {FTS_TABLE}'))
+        else:
+            unindex_survey(survey_id)
+    elif survey_id is None:
+        db.session.execute(terms.delete())
+    else:
+        unindex_survey(survey_id)
+
+    # 先读完再写入，避免在同一连接上边读边写
+    rows = [tuple(row) for row in _answer_rows(survey_id)]
+    for start in range(0, len(rows), CHUNK_SIZE):
+        index_answers(rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+def _ranked_fts(survey_id, tokens, question_id, limit, offset):
+    match = ' '.join(f'"{token}"' for token in tokens)
+    sql = (f'SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} '
+           f'WHERE {FTS_TABLE} MATCH :match AND survey_id = :survey_id')
+    params = {'match': match, 'survey_id': survey_id, 'limit': limit, 'offset': offset}
+    if question_id is not None:
+        sql += ' AND question_id = :question_id'
+        params['question_id'] = question_id
+    sql += ' ORDER BY score, rowid LIMIT :limit OFFSET :offset'
+    # bm25 越小越相关，这里取反使分数越大越相关
+    return [(row[0], -row[1]) for row in db.session.execute(text(sql), params)]
+
+
+def _ranked_terms(survey_id, tokens, question_id, limit, offset):
+    # 所有词项都必须出现；分数为各词项的 tf / df 之和
+    unique = sorted(set(tokens))
+    base = [terms.c.survey_id == survey_id, terms.c.term.in_(unique)]
+    if question_id is not None:
+        base.append(terms.c.question_id == question_id)
+    df = dict(db.session.query(terms.c.term, func.count()).filter(*base).group_by(terms.c.term))
+    if len(df) < len(unique):
+        return []
+    weight = case({term: 1.0 / count for term, count in df.items()}, value=terms.c.term)
+    score = func.sum(terms.c.tf * weight).label('score')
+    rows = db.session.query(terms.c.question_response_id, score).filter(*base).group_by(
+        terms.c.question_response_id
+    ).having(func.count() == len(unique)).order_by(score.desc(), terms.c.question_response_id)
+    return [(row[0], float(row[1])) for row in rows.limit(limit).offset(offset)]
+
+
+def snippet(value, tokens, width=40):
+    # 以第一个命中位置为中心截取片段，命中的词用 <mark> 标出，其余内容做 HTML 转义
+    normalized = _normalize(value)
+    if len(normalized) != len(value):
+        normalized = value.lower()
+    spans = []
+    for token in sorted(set(tokens), key=len, reverse=True):
+        for match in re.finditer(re.escape(token), normalized):
+            if not any(s < match.end() and match.start() < e for s, e in spans):
+                spans.append((match.start(), match.end()))
+    merged = []
+    for s, e in sorted(spans):
+        # 相邻的命中合并为一个 <mark>
+        if merged and merged[-1][1] == s:
+            merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    spans = merged
+    center = spans[0][0] if spans else 0
+    start = max(0, center - width // 2)
+    end = min(len(value), start + width)
+    parts = ['…' if start > 0 else '']
+    cursor = start
+    for s, e in spans:
+        if e <= start or s >= end:
+            continue
+        s, e = max(s, start), min(e, end)
+        parts.append(html.escape(value[cursor:s]))
+        parts.append('<mark>' + html.escape(value[s:e]) + '</mark>')
+        cursor = e
+    parts.append(html.escape(value[cursor:end]))
+    parts.append('…' if end < len(value) else '')
+    return ''.join(parts)
+
+
+def search_answers(survey_id, query, question_id=None, limit=20, offset=0):
+    # 返回 (结果列表, 下一页 offset)；结果按相关度排序
+    tokens = tokenize(query, query=True)
+    if not tokens:
+        raise SearchError('Query must contain at least one word or character')
+    ranked_page = _ranked_fts if search_backend() == 'fts5' else _ranked_terms
+    ranked = ranked_page(survey_id, tokens, question_id, limit + 1, offset)
+
+    next_offset = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        next_offset = offset + limit
+    if not ranked:
+        return [], None
+
+    scores = dict(ranked)
+    answers = {
+        row.id: row for row in db.session.query(
+            QuestionResponse.id, QuestionResponse.survey_response_id, QuestionResponse.question_id,
+            QuestionResponse.option_id, QuestionResponse.text_response, Question.text.label('question_text')
+        ).join(Question, QuestionResponse.question_id == Question.id).filter(QuestionResponse.id.in_(list(scores)))
+    }
+
+    results = []
+    for qr_id, score in ranked:
+        row = answers.get(qr_id)
+        if row is None:
+            # 问题已被删除的旧回答
+            continue
+        results.append({
+            'question_response_id': row.id,
+            'survey_response_id': row.survey_response_id,
+            'question_id': row.question_id,
+            'question_text': row.question_text,
+            'option_id': row.option_id,
+            'text': row.text_response,
+            'snippet': snippet(row.text_response, tokenize(query)),
+            'score': round(score, 6)
+        })
+    return results, next_offset
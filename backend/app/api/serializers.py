@@ -0,0 +1,51 @@
+from app.api.models import User, Survey, Question, Option
+
+# 只读列表接口直接查询这些列，得到元组后组装字典，不构造 ORM 对象；
+# 时间字段保留 datetime，由 JSON provider 统一输出 ISO 8601，字段与各模型的 to_dict 一致
+USER_COLUMNS = (User.id, User.username, User.email, User.is_admin, User.created_at)
+SURVEY_COLUMNS = (Survey.id, Survey.title, Survey.description, Survey.is_published, Survey.created_at, Survey.updated_at)
+QUESTION_COLUMNS = (Question.id, Question.survey_id, Question.text, Question.type, Question.required, Question.order)
+OPTION_COLUMNS = (Option.id, Option.question_id, Option.text, Option.order)
+
+
+def user_row(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'email': row.email,
+        'is_admin': row.is_admin,
+        'created_at': row.created_at
+    }
+
+
+def survey_row(row, response_count):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'is_published': row.is_published,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at,
+        'response_count': response_count
+    }
+
+
+def question_row(row, options):
+    return {
+        'id': row.id,
+        'survey_id': row.survey_id,
+        'text': row.text,
+        'type': row.type,
+        'required': row.required,
+        'order': row.order,
+        'options': options
+    }
+
+
+def option_row(row):
+    return {
+        'id': row.id,
+        'question_id': row.question_id,
+        'text': row.text,
+        'order': row.order
+    }
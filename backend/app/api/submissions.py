@@ -0,0 +1,176 @@
+import datetime
+from collections import Counter
+from sqlalchemy import delete, insert, select
+from app.extensions import db
+from app.api.models import Survey, Question, Option, SurveyResponse, QuestionResponse, IngestReceipt
+from app.api.tallies import tally_deltas, apply_tally_deltas
+from app.api.counters import record_responses
+from app.api.timeseries import record_rollups
+from app.api.search import index_answers
+
+
+class SubmissionError(ValueError):
+    pass
+
+
+def load_answer_map(survey_ids):
+    # 一条查询预加载所有相关调查的问题类型和选项：
+    # {survey_id: {question_id: (question_type, {option_id, ...})}}
+    answer_map = {}
+    rows = db.session.query(
+        Question.survey_id, Question.id, Question.type, Option.id
+    ).outerjoin(Option, Option.question_id == Question.id).filter(
+        Question.survey_id.in_(survey_ids)
+    ).all()
+    for survey_id, question_id, question_type, option_id in rows:
+        questions = answer_map.setdefault(survey_id, {})
+        _, option_ids = questions.setdefault(question_id, (question_type, set()))
+        if option_id is not None:
+            option_ids.add(option_id)
+
+    # 没有问题的调查也可以提交
+    missing = set(survey_ids) - set(answer_map)
+    if missing:
+        for (survey_id,) in db.session.query(Survey.id).filter(Survey.id.in_(missing)):
+            answer_map[survey_id] = {}
+    return answer_map
+
+
+def _text(value, field):
+    # 文本回答只接受字符串或 null；旧客户端提交的数字按文本形式保存，布尔值、列表和对象视为无效提交
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise SubmissionError(f'{field} must be a string')
+
+
+def parse_submission(data, answer_map):
+    # 把前端提交的数据解析为 (question_id, option_id, text_response) 列表
+    if not isinstance(data, dict):
+        raise SubmissionError('Submission must be an object')
+    try:
+        survey_id = int(data.get('survey_id'))
+    except (TypeError, ValueError):
+        raise SubmissionError('survey_id is required')
+    questions = answer_map.get(survey_id)
+    if questions is None:
+        raise SubmissionError('Survey not found')
+
+    responses = data.get('responses') or {}
+    selected_options = data.get('selectedOptions') or {}
+    other_texts = data.get('otherTexts') or {}  # 获取其他选项文本
+    if not all(isinstance(d, dict) for d in (responses, selected_options, other_texts)):
+        raise SubmissionError('responses, selectedOptions and otherTexts must be objects')
+
+    answers = []
+
+    def add_option(q_id, option_ids, option_id, multiple):
+        try:
+            opt_id = int(option_id)
+        except (TypeError, ValueError):
+            return
+        if opt_id not in option_ids:
+            return
+        # 检查是否是"其他"选项并包含文本
+        other_text_key = f"{q_id}-{opt_id}" if multiple else f"{q_id}"
+        answers.append((q_id, opt_id, _text(other_texts.get(other_text_key), f'otherTexts.{other_text_key}') or None))
+
+    # Save each question response
+    for question_id, response in responses.items():
+        # Multi-choice questions are sent separately in selectedOptions
+        if '-' in question_id:
+            continue
+        try:
+            q_id = int(question_id)
+        except ValueError:
+            continue
+        if q_id not in questions:
+            continue
+        question_type, option_ids = questions[q_id]
+
+        if question_type == 3:  # Text question
+            answers.append((q_id, None, _text(response, f'responses.{q_id}')))
+        elif isinstance(response, list):
+            # Multiple choice - create a response for each selected option
+            for option_id in response:
+                add_option(q_id, option_ids, option_id, True)
+        else:  # Single choice
+            add_option(q_id, option_ids, response, False)
+
+    # Handle multi-choice questions (from the frontend implementation)
+    for question_id, options in selected_options.items():
+        try:
+            q_id = int(question_id)
+        except ValueError:
+            continue
+        if q_id not in questions or not isinstance(options, list):
+            continue
+        _, option_ids = questions[q_id]
+        for option_id in options:
+            add_option(q_id, option_ids, option_id, True)
+
+    return survey_id, answers
+
+
+def write_submissions(submissions, user_id=None, receipts=None):
+    # submissions: [(survey_id, answers)]；使用 executemany 批量写入，
+    # 并在同一事务中更新结果计数表、汇总计数、时间桶和文本回答的全文索引。返回新建的 SurveyResponse id 列表
+    # receipts 为异步写入队列的回执号，与响应在同一事务中记录
+    if not submissions:
+        return []
+
+    # 同一批次使用同一个创建时间，汇总计数和时间桶与响应记录保持一致
+    now = datetime.datetime.utcnow()
+    result = db.session.execute(
+        insert(SurveyResponse.__table__).returning(
+            SurveyResponse.__table__.c.id, sort_by_parameter_order=True
+        ),
+        [{'survey_id': survey_id, 'user_id': user_id, 'created_at': now} for survey_id, _ in submissions]
+    )
+    response_ids = [row[0] for row in result]
+
+    rows = []
+    surveys = []
+    counts = Counter()
+    for response_id, (survey_id, answers) in zip(response_ids, submissions):
+        submitted = [(response_id, q_id, opt_id) for q_id, opt_id, _ in answers]
+        counts.update(tally_deltas(survey_id, 1, submitted))
+        rows.extend(
+            {'survey_response_id': response_id, 'question_id': q_id,
+             'option_id': opt_id, 'text_response': text}
+            for q_id, opt_id, text in answers
+        )
+        surveys.extend(survey_id for _ in answers)
+
+    if any(row['text_response'] for row in rows):
+        # 有文本回答时取回新行的 id，写入全文索引
+        table = QuestionResponse.__table__
+        result = db.session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+        index_answers([
+            (qr_id, survey_id, row['question_id'], row['text_response'])
+            for qr_id, survey_id, row in zip((r[0] for r in result), surveys, rows)
+        ])
+    elif rows:
+        db.session.execute(insert(QuestionResponse.__table__), rows)
+    if receipts:
+        db.session.execute(insert(IngestReceipt.__table__), [
+            {'receipt': receipt, 'survey_response_id': response_id}
+            for receipt, response_id in zip(receipts, response_ids)
+        ])
+    apply_tally_deltas(counts)
+    record_responses(len(response_ids), now=now)
+    record_rollups((survey_id, now) for survey_id, _ in submissions)
+    return response_ids
+
+
+def drop_receipts(survey_id=None, survey_response_id=None):
+    # 删除响应或调查时一并删除其异步写入回执（外键也设置了 ON DELETE CASCADE，SQLite 默认不检查外键时同样需要）
+    stmt = delete(IngestReceipt)
+    if survey_response_id is not None:
+        stmt = stmt.where(IngestReceipt.survey_response_id == survey_response_id)
+    else:
+        stmt = stmt.where(IngestReceipt.survey_response_id.in_(
+            select(SurveyResponse.id).where(SurveyResponse.survey_id == survey_id)
+        ))
+    db.session.execute(stmt)
@@ -0,0 +1,182 @@
+from sqlalchemy import bindparam, insert, select
+from app.extensions import db, live_updates
+from app.api.models import Question, Option
+from app.api.tallies import rebuild_tallies
+
+questions_table = Question.__table__
+options_table = Option.__table__
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_options(options):
+    # 选项既可以是字符串，也可以是 {'id': ..., 'text': ...}
+    result = []
+    for order, option in enumerate(options or []):
+        if isinstance(option, dict):
+            result.append((_as_int(option.get('id')), option.get('text'), order))
+        else:
+            result.append((None, option, order))
+    return result
+
+
+def _diff_options(question_id, incoming, existing, changes):
+    # existing: {option_id: (text, order)}；先按 id 匹配，没有 id 的按文本匹配剩余的旧选项
+    unmatched = dict(existing)
+    by_text = {}
+    for option_id, (text, _) in existing.items():
+        by_text.setdefault(text, []).append(option_id)
+
+    pending = []
+    for option_id, text, order in incoming:
+        if option_id in unmatched:
+            pending.append((option_id, text, order))
+            del unmatched[option_id]
+        else:
+            pending.append((None, text, order))
+
+    for option_id, text, order in pending:
+        if option_id is None:
+            candidates = [i for i in by_text.get(text, ()) if i in unmatched]
+            if candidates:
+                option_id = candidates[0]
+                del unmatched[option_id]
+        if option_id is None:
+            changes['option_inserts'].append({'question_id': question_id, 'text': text, 'order': order})
+        elif existing[option_id] != (text, order):
+            changes['option_updates'].append({'b_id': option_id, 'text': text, 'order': order})
+
+    changes['option_deletes'].extend(unmatched)
+
+
+def diff_survey_questions(survey_id, questions_data):
+    # 计算新提交的问题列表与数据库中已有问题之间的差异，只返回需要执行的增删改
+    existing_questions = {
+        row.id: row for row in db.session.query(
+            Question.id, Question.text, Question.type, Question.required, Question.order
+        ).filter(Question.survey_id == survey_id)
+    }
+    existing_options = {}
+    for row in db.session.query(Option.id, Option.question_id, Option.text, Option.order).join(
+        Question, Option.question_id == Question.id
+    ).filter(Question.survey_id == survey_id):
+        existing_options.setdefault(row.question_id, {})[row.id] = (row.text, row.order)
+
+    changes = {
+        'survey_id': survey_id,
+        'question_inserts': [], 'question_updates': [], 'question_deletes': [],
+        'option_inserts': [], 'option_updates': [], 'option_deletes': [],
+        'new_question_options': [],
+    }
+
+    matched = set()
+    for order, question_data in enumerate(questions_data):
+        question_id = _as_int(question_data.get('id'))
+        values = {
+            'text': question_data.get('text'),
+            'type': question_data.get('type'),
+            'required': question_data.get('required', False),
+            'order': order,
+        }
+        options = _normalize_options(question_data.get('options', []))
+
+        if question_id in existing_questions and question_id not in matched:
+            matched.add(question_id)
+            current = existing_questions[question_id]
+            if (current.text, current.type, current.required, current.order) != \
+                    (values['text'], values['type'], values['required'], values['order']):
+                changes['question_updates'].append(dict(values, b_id=question_id))
+            _diff_options(question_id, options, existing_options.get(question_id, {}), changes)
+        else:
+            changes['question_inserts'].append(dict(values, survey_id=survey_id))
+            changes['new_question_options'].append(options)
+
+    for question_id in existing_questions:
+        if question_id not in matched:
+            changes['question_deletes'].append(question_id)
+            changes['option_deletes'].extend(existing_options.get(question_id, {}))
+
+    return changes
+
+
+def apply_survey_diff(changes):
+    # 以批量语句执行差异，返回各类变更的 id 以及受影响的行数
+    rows_touched = 0
+
+    # 删除选项或问题后，在同一事务中按剩余的回答重算受影响问题的计数：
+    # 只选了被删除选项的响应不再计为回答了该问题，被删除的问题不再有计数行
+    affected = set(changes['question_deletes'])
+    if changes['option_deletes']:
+        affected.update(db.session.scalars(
+            select(options_table.c.question_id).where(options_table.c.id.in_(changes['option_deletes']))
+        ))
+        result = db.session.execute(options_table.delete().where(options_table.c.id.in_(changes['option_deletes'])))
+        rows_touched += result.rowcount
+
+    if changes['question_deletes']:
+        result = db.session.execute(
+            questions_table.delete().where(questions_table.c.id.in_(changes['question_deletes']))
+        )
+        rows_touched += result.rowcount
+
+    if affected:
+        rebuild_tallies(changes['survey_id'], question_ids=affected)
+
+    if changes['question_updates']:
+        result = db.session.execute(
+            questions_table.update().where(questions_table.c.id == bindparam('b_id')),
+            changes['question_updates']
+        )
+        rows_touched += result.rowcount
+
+    if changes['option_updates']:
+        result = db.session.execute(
+            options_table.update().where(options_table.c.id == bindparam('b_id')),
+            changes['option_updates']
+        )
+        rows_touched += result.rowcount
+
+    inserted_questions = []
+    if changes['question_inserts']:
+        result = db.session.execute(
+            insert(questions_table).returning(questions_table.c.id, sort_by_parameter_order=True),
+            changes['question_inserts']
+        )
+        inserted_questions = [row[0] for row in result]
+        rows_touched += len(inserted_questions)
+        for question_id, options in zip(inserted_questions, changes['new_question_options']):
+            changes['option_inserts'].extend(
+                {'question_id': question_id, 'text': text, 'order': order} for _, text, order in options
+            )
+
+    inserted_options = []
+    if changes['option_inserts']:
+        result = db.session.execute(
+            insert(options_table).returning(options_table.c.id, sort_by_parameter_order=True),
+            changes['option_inserts']
+        )
+        inserted_options = [row[0] for row in result]
+        rows_touched += len(inserted_options)
+
+    # 重算计数不经过增量发布，问题和选项的变化也无法用增量表达：提交后让实时订阅者重新获取完整结果
+    if rows_touched:
+        live_updates.stage_refresh(db.session, changes['survey_id'])
+
+    return {
+        'questions': {
+            'inserted': inserted_questions,
+            'updated': [u['b_id'] for u in changes['question_updates']],
+            'deleted': list(changes['question_deletes']),
+        },
+        'options': {
+            'inserted': inserted_options,
+            'updated': [u['b_id'] for u in changes['option_updates']],
+            'deleted': list(changes['option_deletes']),
+        },
+        'rows_touched': rows_touched,
+    }
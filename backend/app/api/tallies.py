@@ -0,0 +1,179 @@
+from collections import Counter
+from sqlalchemy import and_, bindparam, distinct, func, insert, literal, select
+from app.extensions import db, live_updates
+from app.api.models import Question, Option, SurveyResponse, QuestionResponse, ResultTally
+from app.api.increments import increment_rows
+
+tallies = ResultTally.__table__
+
+
+def tally_deltas(survey_id, response_count, question_responses):
+    # question_responses: 可迭代的 (survey_response_id, question_id, option_id)
+    counts = Counter()
+    counts[(survey_id, 0, 0)] += response_count
+    answered = set()
+    for survey_response_id, question_id, option_id in question_responses:
+        answered.add((survey_response_id, question_id))
+        if option_id:
+            counts[(survey_id, question_id, option_id)] += 1
+    for _, question_id in answered:
+        counts[(survey_id, question_id, 0)] += 1
+    return counts
+
+
+def apply_tally_deltas(counts, sign=1):
+    # 在当前事务中更新计数表；sign=1 为新增提交，sign=-1 为删除响应
+    rows = [
+        {'survey_id': s, 'question_id': q, 'option_id': o, 'count': n}
+        for (s, q, o), n in counts.items() if n
+    ]
+    if not rows:
+        return
+    # 事务提交后推送给实时订阅者
+    live_updates.stage(db.session, counts, sign)
+
+    if sign < 0:
+        # 扣减只更新已有的行，避免为已删除的问题插入负数计数
+        stmt = tallies.update().where(
+            tallies.c.survey_id == bindparam('b_survey_id'),
+            tallies.c.question_id == bindparam('b_question_id'),
+            tallies.c.option_id == bindparam('b_option_id')
+        ).values(count=tallies.c.count - bindparam('b_count'))
+        db.session.execute(stmt, [
+            {'b_survey_id': r['survey_id'], 'b_question_id': r['question_id'],
+             'b_option_id': r['option_id'], 'b_count': r['count']}
+            for r in rows
+        ])
+        return
+
+    increment_rows(tallies, ('survey_id', 'question_id', 'option_id'), 'count', rows)
+
+
+def current_answer():
+    # 回答的选项已在编辑调查时删除的，不再计入结果；文本回答没有选项
+    return (QuestionResponse.option_id.is_(None)) | (Option.id.isnot(None))
+
+
+def retract_submission(survey_response):
+    rows = db.session.query(
+        QuestionResponse.survey_response_id, QuestionResponse.question_id, QuestionResponse.option_id
+    ).outerjoin(Option, Option.id == QuestionResponse.option_id).filter(
+        QuestionResponse.survey_response_id == survey_response.id, current_answer()
+    ).all()
+    apply_tally_deltas(tally_deltas(survey_response.survey_id, 1, rows), sign=-1)
+
+
+def drop_tallies(survey_id, question_ids=None):
+    stmt = tallies.delete().where(tallies.c.survey_id == survey_id)
+    if question_ids is not None:
+        stmt = stmt.where(tallies.c.question_id.in_(question_ids))
+    db.session.execute(stmt)
+
+
+def rebuild_tallies(survey_id=None, question_ids=None):
+    # 从 QuestionResponse 全量重算计数表，只统计仍属于该调查的问题和选项；
+    # 指定 question_ids 时只重算这些问题的计数（调查的总响应数不变）
+    if survey_id is None:
+        db.session.execute(tallies.delete())
+    else:
+        drop_tallies(survey_id, question_ids)
+
+    columns = ['survey_id', 'question_id', 'option_id', 'count']
+
+    totals = select(
+        SurveyResponse.survey_id, literal(0), literal(0), func.count(SurveyResponse.id)
+    ).group_by(SurveyResponse.survey_id)
+
+    answers = select(
+        SurveyResponse.survey_id, QuestionResponse.question_id
+    ).select_from(QuestionResponse).join(
+        SurveyResponse, QuestionResponse.survey_response_id == SurveyResponse.id
+    ).join(
+        Question, (Question.id == QuestionResponse.question_id) & (Question.survey_id == SurveyResponse.survey_id)
+    ).outerjoin(Option, Option.id == QuestionResponse.option_id).where(current_answer())
+
+    options = answers.add_columns(
+        QuestionResponse.option_id, func.count(QuestionResponse.id)
+    ).where(QuestionResponse.option_id.isnot(None)).group_by(
+        SurveyResponse.survey_id, QuestionResponse.question_id, QuestionResponse.option_id
+    )
+
+    respondents = answers.add_columns(
+        literal(0), func.count(distinct(QuestionResponse.survey_response_id))
+    ).group_by(SurveyResponse.survey_id, QuestionResponse.question_id)
+
+    if survey_id is not None:
+        totals = totals.where(SurveyResponse.survey_id == survey_id)
+        options = options.where(SurveyResponse.survey_id == survey_id)
+        respondents = respondents.where(SurveyResponse.survey_id == survey_id)
+
+    queries = (totals, options, respondents)
+    if question_ids is not None:
+        queries = (
+            options.where(QuestionResponse.question_id.in_(question_ids)),
+            respondents.where(QuestionResponse.question_id.in_(question_ids)),
+        )
+    for query in queries:
+        db.session.execute(insert(tallies).from_select(columns, query))
+
+
+def response_total_condition(survey_id_column):
+    # 连接计数表中记录调查总响应数的行
+    return and_(
+        ResultTally.survey_id == survey_id_column,
+        ResultTally.question_id == 0,
+        ResultTally.option_id == 0
+    )
+
+
+def response_counts(survey_ids):
+    # 从计数表读取各调查的总响应数，{survey_id: count}
+    rows = db.session.query(ResultTally.survey_id, ResultTally.count).filter(
+        ResultTally.survey_id.in_(survey_ids),
+        ResultTally.question_id == 0,
+        ResultTally.option_id == 0
+    )
+    return dict(rows.all())
+
+
+def load_survey_results(survey_id, questions_dict, options_dict):
+    counts = {
+        (row.question_id, row.option_id): row.count
+        for row in db.session.query(
+            ResultTally.question_id, ResultTally.option_id, ResultTally.count
+        ).filter(ResultTally.survey_id == survey_id)
+    }
+    return format_results(survey_id, counts, questions_dict, options_dict)
+
+
+def format_results(survey_id, counts, questions_dict, options_dict):
+    # counts 与计数表的行结构相同：{(question_id, option_id): n}，(question_id, 0) 为回答该问题的响应数，(0, 0) 为总响应数
+    options_by_question = {}
+    for option in options_dict.values():
+        options_by_question.setdefault(option.question_id, []).append(option)
+
+    questions = []
+    for question in questions_dict.values():
+        respondents = counts.get((question.id, 0), 0)
+        options = []
+        for option in options_by_question.get(question.id, ()):
+            count = counts.get((question.id, option.id), 0)
+            options.append({
+                'option_id': option.id,
+                'text': option.text,
+                'count': count,
+                'percentage': round(count * 100.0 / respondents, 2) if respondents else 0.0
+            })
+        questions.append({
+            'question_id': question.id,
+            'question_text': question.text,
+            'question_type': question.type,
+            'respondents': respondents,
+            'options': options
+        })
+
+    return {
+        'survey_id': survey_id,
+        'total_responses': counts.get((0, 0), 0),
+        'questions': questions
+    }
@@ -0,0 +1,156 @@
+import datetime
+from collections import Counter
+from flask import current_app
+from sqlalchemy import bindparam, insert
+from app.extensions import db
+from app.api.models import SurveyResponse, ResponseRollup
+from app.api.increments import increment_rows
+
+rollups = ResponseRollup.__table__
+
+BUCKETS = {
+    'minute': datetime.timedelta(minutes=1),
+    'hour': datetime.timedelta(hours=1),
+    'day': datetime.timedelta(days=1),
+}
+
+# 未指定 start 时默认返回的桶数
+DEFAULT_POINTS = {'minute': 60, 'hour': 48, 'day': 30}
+
+CHUNK_SIZE = 10000
+
+
+class TimeseriesError(ValueError):
+    pass
+
+
+def truncate(moment, bucket):
+    if bucket == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if bucket == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_deltas(responses):
+    # responses: 可迭代的 (survey_id, created_at)；返回每个时间桶的增量
+    counts = Counter()
+    for survey_id, created_at in responses:
+        for bucket in BUCKETS:
+            counts[(survey_id, bucket, truncate(created_at, bucket))] += 1
+    return counts
+
+
+def _rows(counts):
+    return [
+        {'survey_id': s, 'bucket': b, 'bucket_start': t, 'count': n}
+        for (s, b, t), n in counts.items() if n
+    ]
+
+
+def record_rollups(responses):
+    increment_rows(rollups, ('survey_id', 'bucket', 'bucket_start'), 'count', _rows(rollup_deltas(responses)))
+
+
+def retract_rollups(responses):
+    # 扣减只更新已有的行
+    rows = _rows(rollup_deltas(responses))
+    if not rows:
+        return
+    db.session.execute(
+        rollups.update().where(
+            rollups.c.survey_id == bindparam('b_survey_id'),
+            rollups.c.bucket == bindparam('b_bucket'),
+            rollups.c.bucket_start == bindparam('b_bucket_start')
+        ).values(count=rollups.c.count - bindparam('b_count')),
+        [{'b_survey_id': r['survey_id'], 'b_bucket': r['bucket'],
+          'b_bucket_start': r['bucket_start'], 'b_count': r['count']} for r in rows]
+    )
+
+
+def drop_rollups(survey_id):
+    db.session.execute(rollups.delete().where(rollups.c.survey_id == survey_id))
+
+
+def _minute_cutoff(now=None):
+    # 早于该时间的按分钟时间桶已被清理
+    hours = current_app.config.get('TIMESERIES_MINUTE_RETENTION_HOURS', 48)
+    return truncate(now or datetime.datetime.utcnow(), 'minute') - datetime.timedelta(hours=hours)
+
+
+def prune_rollups(now=None):
+    # 删除保留时长之外的按分钟时间桶，返回删除的行数；按小时和按天的桶数量增长很慢，一直保留
+    result = db.session.execute(rollups.delete().where(
+        rollups.c.bucket == 'minute', rollups.c.bucket_start < _minute_cutoff(now)
+    ))
+    return result.rowcount
+
+
+def rebuild_rollups(survey_id=None):
+    # 从 SurveyResponse 全量重算时间桶，按分钟的桶只保留保留时长之内的
+    if survey_id is None:
+        db.session.execute(rollups.delete())
+    else:
+        drop_rollups(survey_id)
+
+    query = db.session.query(SurveyResponse.survey_id, SurveyResponse.created_at)
+    if survey_id is not None:
+        query = query.filter(SurveyResponse.survey_id == survey_id)
+    rows = _rows(rollup_deltas(query.execution_options(yield_per=CHUNK_SIZE)))
+    cutoff = _minute_cutoff()
+    rows = [row for row in rows if row['bucket'] != 'minute' or row['bucket_start'] >= cutoff]
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(rollups), rows[start:start + CHUNK_SIZE])
+
+
+def _parse_time(value, name):
+    try:
+        moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise TimeseriesError(f'{name} must be an ISO 8601 timestamp')
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def parse_range(bucket, start=None, end=None, max_points=1440, now=None):
+    # 返回对齐到桶边界的 [start, end] 以及桶数；时间均为 UTC
+    if bucket not in BUCKETS:
+        raise TimeseriesError('bucket must be minute, hour or day')
+    step = BUCKETS[bucket]
+    end = truncate(_parse_time(end, 'end') if end else now or datetime.datetime.utcnow(), bucket)
+    if start:
+        start = truncate(_parse_time(start, 'start'), bucket)
+    else:
+        start = end - step * (DEFAULT_POINTS[bucket] - 1)
+    if start > end:
+        raise TimeseriesError('start must not be after end')
+    if bucket == 'minute' and start < _minute_cutoff(now):
+        raise TimeseriesError('Minute buckets before the retention window have been pruned; use hour or day')
+    points = (end - start) // step + 1
+    if points > max_points:
+        raise TimeseriesError(f'Range covers {points} buckets; at most {max_points} are allowed')
+    return start, end, points
+
+
+def load_timeseries(survey_id, bucket, start, end, points):
+    # 一次主键范围扫描读取区间内的非零桶，再补齐为连续的序列
+    counts = dict(db.session.query(ResponseRollup.bucket_start, ResponseRollup.count).filter(
+        ResponseRollup.survey_id == survey_id,
+        ResponseRollup.bucket == bucket,
+        ResponseRollup.bucket_start.between(start, end)
+    ).order_by(ResponseRollup.bucket_start))
+
+    step = BUCKETS[bucket]
+    series = []
+    for i in range(points):
+        moment = start + step * i
+        series.append({'start': moment.isoformat(), 'count': counts.get(moment, 0)})
+    return {
+        'survey_id': survey_id,
+        'bucket': bucket,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'total': sum(point['count'] for point in series),
+        'points': series
+    }
@@ -0,0 +1,270 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    # 进程内缓存：按最近使用淘汰，每个条目带过期时间
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    # 兼容 Redis 的后端，client 只需提供 get / set(ex=) / delete；值以 JSON 存储
+    def __init__(self, client, ttl=300, prefix='survey-system:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for the redis cache backend')
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        pass
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class SurveyCache:
+    # 缓存序列化后的调查定义，统计命中与未命中次数
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        if backend is None:
+            backend = self._create_backend(app.config)
+        self.backend = backend
+        self.reset_stats()
+        app.extensions['survey_cache'] = self
+
+    @staticmethod
+    def _create_backend(config):
+        name = config.get('SURVEY_CACHE_BACKEND', 'memory')
+        ttl = config.get('SURVEY_CACHE_TTL', 300)
+        if name == 'memory':
+            return LRUCache(max_size=config.get('SURVEY_CACHE_MAX_SIZE', 1024), ttl=ttl)
+        if name == 'redis':
+            return RedisCache.from_url(config['SURVEY_CACHE_REDIS_URL'], ttl=ttl)
+        if name in (None, 'null', 'none'):
+            return NullCache()
+        raise ValueError(f'Unknown survey cache backend: {name}')
+
+    def get_or_load(self, key, loader, is_fresh=None):
+        # is_fresh 用于校验缓存值与数据库中的版本一致；不一致（如其他进程修改后未能使本进程失效）时视为未命中并重新加载
+        value = self.backend.get(key)
+        if value is not None and (is_fresh is None or is_fresh(value)):
+            with self._lock:
+                self.hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def clear(self):
+        self.backend.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0
+        }
+
+
+class LocalVersions:
+    # 进程内的用户版本号：只能使本进程的缓存失效
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def incr(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+
+class RedisVersions:
+    # 多进程共享的用户版本号，client 需兼容 redis-py；键的过期时间不短于缓存条目的最长存活时间
+    def __init__(self, client, ttl=300, prefix='survey-system:principal-version:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for the redis auth cache backend')
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, user_id):
+        value = self.client.get(f'{self.prefix}{user_id}')
+        return 0 if value is None else int(value)
+
+    def incr(self, user_id):
+        pipe = self.client.pipeline()
+        pipe.incr(f'{self.prefix}{user_id}')
+        pipe.expire(f'{self.prefix}{user_id}', self.ttl)
+        pipe.execute()
+
+
+class PrincipalCache:
+    # 按 token 缓存已认证用户，条目的过期时间不超过 token 的 exp；
+    # 用户被修改或删除时递增其版本号，使该用户所有已缓存的 token 失效。
+    # AUTH_CACHE_BACKEND 为 memory 时版本号只在本进程内，其他 worker 进程最多在 AUTH_CACHE_TTL 秒后才失效；
+    # 多进程部署需要立即失效时使用 redis，版本号在所有进程间共享
+    def __init__(self, app=None):
+        self.cache = LRUCache()
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self.versions = LocalVersions()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('AUTH_CACHE_TTL', 60)
+        self.cache = LRUCache(max_size=app.config.get('AUTH_CACHE_MAX_SIZE', 4096), ttl=self.ttl)
+        self.versions = self._create_versions(app.config, self.ttl)
+        self.hits = 0
+        self.misses = 0
+        app.extensions['principal_cache'] = self
+
+    @staticmethod
+    def _create_versions(config, ttl):
+        name = config.get('AUTH_CACHE_BACKEND', 'memory')
+        if name == 'memory':
+            return LocalVersions()
+        if name == 'redis':
+            return RedisVersions.from_url(config['AUTH_CACHE_REDIS_URL'], ttl=ttl)
+        raise ValueError(f'Unknown auth cache backend: {name}')
+
+    def get(self, token):
+        entry = self.cache.get(token)
+        fresh = entry is not None and self.versions.get(entry[0]) == entry[1]
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if fresh:
+            return entry[2]
+        if entry is not None:
+            self.cache.delete(token)
+        return None
+
+    def version(self, user_id):
+        # 查询数据库之前取得版本号，查询期间发生的失效会让这次写入的条目立即过时
+        return self.versions.get(user_id)
+
+    def set(self, token, user_id, version, principal, expires_at):
+        ttl = min(self.ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        self.cache.set(token, (user_id, version, principal), ttl=ttl)
+
+    def invalidate_user(self, user_id):
+        self.versions.incr(user_id)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'backend': type(self.versions).__name__,
+            'size': len(self.cache),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,128 @@
+import hashlib
+import zlib
+from flask import request
+from app.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits 31：带 gzip 头尾的 deflate 流；头部不含时间戳，相同内容得到相同字节
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ResponseCompression:
+    # 按 Accept-Encoding 协商 br（安装了 brotli 时）或 gzip，压缩 COMPRESS_MIMETYPES 中的响应：
+    # 普通响应小于 COMPRESS_MIN_SIZE 时不压缩；流式响应（导出、全量响应列表）逐块压缩并在每块后 flush，
+    # 客户端可以边收边解压。text/event-stream 不压缩，以免事件被缓冲。
+    # 带 ETag 的响应（调查定义）按 (响应体摘要, 编码) 缓存压缩结果，内容未变时不重复压缩
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 5
+        self.mimetypes = frozenset()
+        self.cache = LRUCache(max_size=64, ttl=300)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        self.level = app.config.get('COMPRESS_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 5)
+        self.mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', ('application/json',))) - {'text/event-stream'}
+        # 以响应体摘要为键，ETag 计算方式变化或不同内容共用 ETag 时也不会返回错误的压缩结果；
+        # 过期时间只用于回收不再访问的旧版本
+        self.cache = LRUCache(max_size=app.config.get('COMPRESS_CACHE_SIZE', 64),
+                              ttl=app.config.get('COMPRESS_CACHE_TTL', 300))
+        app.extensions['response_compression'] = self
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def _stream(self, encoding):
+        return _BrotliStream(self.brotli_quality) if encoding == 'br' else _GzipStream(self.level)
+
+    def compress(self, data, encoding):
+        stream = self._stream(encoding)
+        return stream.process(data) + stream.finish()
+
+    def _compress_chunks(self, chunks, encoding):
+        stream = self._stream(encoding)
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                data = stream.process(chunk) + stream.flush()
+                if data:
+                    yield data
+            yield stream.finish()
+        finally:
+            # 原可迭代对象（如 stream_with_context 生成器）的清理逻辑仍需执行
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def _after_request(self, response):
+        if response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code < 200 or response.status_code in (204, 206, 304) or \
+                'Content-Encoding' in response.headers or response.direct_passthrough:
+            return response
+        encoding = request.accept_encodings.best_match(self.encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_chunks(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            if response.content_length is not None and response.content_length < self.min_size:
+                return response
+            data = response.get_data()
+            etag, weak = response.get_etag()
+            key = (hashlib.sha256(data).digest(), encoding) if etag and not weak else None
+            body = self.cache.get(key) if key else None
+            if body is None:
+                body = self.compress(data, encoding)
+                if key:
+                    self.cache.set(key, body)
+            response.set_data(body)
+
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后的字节与原表示不同，ETag 改为弱校验值（If-None-Match 按弱比较匹配）
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
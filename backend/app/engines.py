@@ -0,0 +1,129 @@
+import os
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+
+# 只读连接上不能修改的 pragma，只在主库连接上设置
+_WRITE_PRAGMAS = ('journal_mode', 'synchronous')
+
+
+class RoutingSession(Session):
+    # 在 read_replica.reads() 范围内，SELECT 语句改用只读连接；flush 和写语句始终使用主库
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        read_engine = self.info.get('read_engine')
+        if bind is None and read_engine is not None and not self._flushing \
+                and getattr(clause, 'is_select', False):
+            return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class SQLiteTuning:
+    # 文件型 SQLite 的连接设置：每个新连接执行 SQLITE_PRAGMAS（WAL、synchronous、busy_timeout、
+    # mmap_size、cache_size 等）；只读连接额外设置 query_only
+    def __init__(self, app=None, db=None):
+        self.pragmas = {}
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+        replica_bind = app.config.get('READ_REPLICA_BIND')
+        with app.app_context():
+            for bind_key, engine in db.engines.items():
+                if bind_key == replica_bind:
+                    self.listen_read_only(engine)
+                elif engine.dialect.name == 'sqlite':
+                    event.listen(engine, 'connect', self._on_connect)
+        app.extensions['sqlite_tuning'] = self
+
+    def listen_read_only(self, engine):
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', self._on_read_only_connect)
+
+    def _apply(self, dbapi_connection, pragmas):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._apply(dbapi_connection, self.pragmas)
+
+    def _on_read_only_connect(self, dbapi_connection, connection_record):
+        pragmas = {k: v for k, v in self.pragmas.items() if k not in _WRITE_PRAGMAS}
+        pragmas['query_only'] = 'ON'
+        self._apply(dbapi_connection, pragmas)
+
+
+class ReadReplica:
+    # 报表类 GET 接口的读路由：优先使用 SQLALCHEMY_BINDS 中配置的只读副本；
+    # 未配置副本时，文件型 SQLite 以只读 URI 再打开主库文件（WAL 下读不阻塞写），其他数据库直接使用主库
+    def __init__(self, app=None, db=None, tuning=None):
+        self.db = None
+        self.engine = None
+        self.source = 'primary'
+        self.fallbacks = 0
+        if app is not None:
+            self.init_app(app, db, tuning)
+
+    def init_app(self, app, db, tuning=None):
+        self.db = db
+        self.fallbacks = 0
+        bind = app.config.get('READ_REPLICA_BIND')
+        with app.app_context():
+            if bind in db.engines:
+                self.engine, self.source = db.engines[bind], 'replica'
+            else:
+                self.engine = self._read_only_primary(app.config, db.engine)
+                self.source = 'read-only primary' if self.engine is not None else 'primary'
+        if self.engine is not None and self.source != 'replica' and tuning is not None:
+            tuning.listen_read_only(self.engine)
+        app.extensions['read_replica'] = self
+
+    @staticmethod
+    def _read_only_primary(config, primary):
+        database = primary.url.database
+        if primary.dialect.name != 'sqlite' or not database or database == ':memory:':
+            return None
+        url = f'sqlite:///file:{os.path.abspath(database)}?mode=ro&uri=true'
+        return create_engine(url, **(config.get('READ_REPLICA_ENGINE_OPTIONS') or {}))
+
+    @contextmanager
+    def reads(self, engine=None):
+        # 在该范围内 db.session 的查询走只读连接；没有可用的只读连接时不做任何改变
+        engine = engine or self.engine
+        if engine is None:
+            yield
+            return
+        session = self.db.session
+        previous = session.info.get('read_engine')
+        session.info['read_engine'] = engine
+        try:
+            yield
+        finally:
+            session.info['read_engine'] = previous
+
+    def route(self, f):
+        # 视图装饰器：在只读连接上执行；只读连接出错（如副本不可用）时回滚并在主库上重试一次，
+        # 只用于没有写操作的 GET 接口，重试才是安全的
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if self.engine is None:
+                return f(*args, **kwargs)
+            try:
+                with self.reads():
+                    return f(*args, **kwargs)
+            except DBAPIError:
+                self.db.session.rollback()
+                self.fallbacks += 1
+                current_app.logger.warning('Read replica query failed, retrying on primary', exc_info=True)
+                return f(*args, **kwargs)
+        return decorated
+
+    def stats(self):
+        return {'source': self.source, 'fallbacks': self.fallbacks}
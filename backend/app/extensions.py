@@ -1,7 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
+from app.cache import SurveyCache, PrincipalCache
+from app.passwords import PasswordHasher
+from app.ingest import IngestionQueue
+from app.live import LiveUpdates
+from app.metrics import RequestMetrics
+from app.compression import ResponseCompression
+from app.ratelimit import RateLimiter
+from app.engines import RoutingSession, SQLiteTuning, ReadReplica
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+sqlite_tuning = SQLiteTuning()
+read_replica = ReadReplica()
 migrate = Migrate()
-cors = CORS()
\ No newline at end of file
+cors = CORS()
+survey_cache = SurveyCache()
+principal_cache = PrincipalCache()
+password_hasher = PasswordHasher()
+ingestion_queue = IngestionQueue()
+live_updates = LiveUpdates()
+request_metrics = RequestMetrics()
+response_compression = ResponseCompression()
+rate_limiter = RateLimiter()
\ No newline at end of file
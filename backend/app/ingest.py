@@ -0,0 +1,268 @@
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+PROCESSING = 'processing'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt TEXT NOT NULL UNIQUE,
+    survey_id INTEGER NOT NULL,
+    answers TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL,
+    survey_response_id INTEGER,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    claimed_at REAL,
+    processed_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_submissions_status_id ON submissions (status, id);
+"""
+
+# 旧版本创建的队列文件缺少的列
+_MIGRATIONS = (
+    ('attempts', 'ALTER TABLE submissions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0'),
+    ('available_at', 'ALTER TABLE submissions ADD COLUMN available_at REAL'),
+)
+
+
+class IngestionQueue:
+    # 可选的提交写入模式：/api/submit 校验后把提交追加到本地持久队列（独立的 SQLite WAL 文件），
+    # 立即返回 202 和回执号；后台线程批量取出并在一个事务中写入主数据库。
+    # 主数据库中同时写入 ingest_receipts，崩溃后重放队列时据此去重，保证每个回执只写入一次。
+    # 数据库暂时不可用导致的失败按指数退避重新排队，超过 INGEST_MAX_ATTEMPTS 次或其他错误才标记为 failed
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.path = None
+        self.batch_size = 500
+        self.interval = 0.2
+        self.lease = 60
+        self.max_attempts = 5
+        self.retry_backoff = 1.0
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.stop()
+        self.app = app
+        self.enabled = app.config.get('INGEST_MODE', 'sync') == 'queue'
+        self.path = app.config.get('INGEST_QUEUE_PATH')
+        self.batch_size = app.config.get('INGEST_BATCH_SIZE', 500)
+        self.interval = app.config.get('INGEST_FLUSH_INTERVAL', 0.2)
+        self.lease = app.config.get('INGEST_CLAIM_LEASE', 60)
+        self.max_attempts = app.config.get('INGEST_MAX_ATTEMPTS', 5)
+        self.retry_backoff = app.config.get('INGEST_RETRY_BACKOFF', 1.0)
+        app.extensions['ingestion_queue'] = self
+        if self.enabled:
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+                columns = {row['name'] for row in conn.execute('PRAGMA table_info(submissions)')}
+                for column, statement in _MIGRATIONS:
+                    if column not in columns:
+                        conn.execute(statement)
+            if app.config.get('INGEST_START_WRITER', True):
+                self.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # 队列是提交的唯一副本，必须在返回 202 前落盘
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.row_factory = sqlite3.Row
+        return _Closing(conn)
+
+    def enqueue(self, survey_id, answers):
+        receipt = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO submissions (receipt, survey_id, answers, status, enqueued_at) VALUES (?, ?, ?, ?, ?)',
+                (receipt, survey_id, json.dumps(answers, ensure_ascii=False), PENDING, time.time())
+            )
+        self._wakeup.set()
+        return receipt
+
+    def receipt_status(self, receipt):
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT receipt, status, attempts, survey_id, survey_response_id, error, enqueued_at, processed_at '
+                'FROM submissions WHERE receipt = ?', (receipt,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def stats(self):
+        with self._connect() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM submissions GROUP BY status').fetchall())
+            oldest = conn.execute(
+                'SELECT MIN(enqueued_at) FROM submissions WHERE status IN (?, ?)', (PENDING, PROCESSING)
+            ).fetchone()[0]
+        return {
+            'mode': 'queue' if self.enabled else 'sync',
+            'depth': counts.get(PENDING, 0) + counts.get(PROCESSING, 0),
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'processed': counts.get(DONE, 0),
+            'failed': counts.get(FAILED, 0),
+            'writer_running': bool(self._thread and self._thread.is_alive()),
+        }
+
+    def _claim(self):
+        # 认领一批待写入的提交（等待重试的需到达 available_at）；处理中但租约已过期的（写入进程崩溃）也会被重新认领
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                'SELECT id, receipt, survey_id, answers, attempts FROM submissions '
+                'WHERE (status = ? AND (available_at IS NULL OR available_at <= ?)) '
+                'OR (status = ? AND claimed_at < ?) ORDER BY id LIMIT ?',
+                (PENDING, now, PROCESSING, now - self.lease, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    'UPDATE submissions SET status = ?, claimed_at = ? WHERE id = ?',
+                    [(PROCESSING, now, row['id']) for row in rows]
+                )
+            conn.execute('COMMIT')
+        return rows
+
+    def _finish(self, results):
+        # results: [(receipt, status, survey_response_id, error)]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'UPDATE submissions SET status = ?, survey_response_id = ?, error = ?, processed_at = ?, '
+                'attempts = attempts + 1 WHERE receipt = ?',
+                [(status, response_id, error, now, receipt) for receipt, status, response_id, error in results]
+            )
+            conn.execute('COMMIT')
+
+    def _retry(self, retries):
+        # retries: [(receipt, attempts, error)]；放回待写入状态，第 n 次失败后等待 retry_backoff * 2^(n-1) 秒
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'UPDATE submissions SET status = ?, attempts = ?, available_at = ?, error = ?, claimed_at = NULL '
+                'WHERE receipt = ?',
+                [(PENDING, attempts, now + self.retry_backoff * 2 ** (attempts - 1), error, receipt)
+                 for receipt, attempts, error in retries]
+            )
+            conn.execute('COMMIT')
+
+    def drain_once(self):
+        # 处理一批提交，返回处理的条数；需要在应用上下文中调用
+        from app.extensions import db
+        from app.api.models import IngestReceipt
+        from app.api.submissions import write_submissions
+
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        # 崩溃恢复：主数据库中已有回执的提交说明上次已写入，只需补记状态
+        existing = dict(db.session.query(IngestReceipt.receipt, IngestReceipt.survey_response_id).filter(
+            IngestReceipt.receipt.in_([row['receipt'] for row in rows])
+        ).all())
+        results = [(receipt, DONE, response_id, None) for receipt, response_id in existing.items()]
+        pending = [row for row in rows if row['receipt'] not in existing]
+
+        batch = [(row['survey_id'], [tuple(a) for a in json.loads(row['answers'])]) for row in pending]
+        receipts = [row['receipt'] for row in pending]
+        retries = []
+        try:
+            response_ids = write_submissions(batch, receipts=receipts)
+            db.session.commit()
+            results.extend((receipt, DONE, response_id, None) for receipt, response_id in zip(receipts, response_ids))
+        except Exception:
+            db.session.rollback()
+            logger.exception('Batched ingestion failed, retrying submissions one by one')
+            for row, submission in zip(pending, batch):
+                receipt = row['receipt']
+                try:
+                    response_id, = write_submissions([submission], receipts=[receipt])
+                    db.session.commit()
+                    results.append((receipt, DONE, response_id, None))
+                except OperationalError as e:
+                    # 锁等待超时、连接中断等暂时性错误：稍后重试，次数用尽才标记为失败
+                    db.session.rollback()
+                    attempts = row['attempts'] + 1
+                    if attempts < self.max_attempts:
+                        retries.append((receipt, attempts, str(e)))
+                    else:
+                        results.append((receipt, FAILED, None, str(e)))
+                except Exception as e:
+                    db.session.rollback()
+                    results.append((receipt, FAILED, None, str(e)))
+
+        if results:
+            self._finish(results)
+        if retries:
+            self._retry(retries)
+        return len(rows)
+
+    def drain(self):
+        total = 0
+        with self.app.app_context():
+            while True:
+                count = self.drain_once()
+                total += count
+                if count < self.batch_size:
+                    return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Ingestion writer failed')
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+        # 退出前尽量写完已认领和待写入的提交
+        try:
+            self.drain()
+        except Exception:
+            logger.exception('Ingestion writer failed during shutdown')
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ingestion-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class _Closing:
+    # sqlite3 连接的上下文管理器只负责事务，这里在退出时关闭连接
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
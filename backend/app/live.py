@@ -0,0 +1,221 @@
+import json
+import logging
+import queue
+import threading
+from collections import Counter
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'survey-live:'
+
+
+class SubscriberLimitError(RuntimeError):
+    pass
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+class Subscription:
+    # 每个 SSE 连接一个有界队列；队列满时丢弃积压的增量并标记 overflowed，
+    # 由连接改发一次完整快照，发布方永远不会因为慢客户端而阻塞
+    def __init__(self, hub, survey_id, max_size):
+        self.hub = hub
+        self.survey_id = survey_id
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=max_size)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+            self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def get(self, timeout):
+        # 超时返回 None，连接关闭时返回 False
+        try:
+            message = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return False if message is None else message
+
+    def wake(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            self._drain()
+            self._queue.put_nowait(None)
+
+    def close(self):
+        self.hub._unsubscribe(self)
+
+
+class RedisBroker:
+    # 跨进程转发：publish 写入 Redis 频道，后台线程订阅所有调查频道并交给本进程分发
+    def __init__(self, client):
+        self.client = client
+        self._pubsub = None
+        self._thread = None
+
+    @classmethod
+    def from_url(cls, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for the redis live broker')
+        return cls(redis.Redis.from_url(url))
+
+    def publish(self, survey_id, message):
+        self.client.publish(CHANNEL_PREFIX + str(survey_id), json.dumps(message))
+
+    def start(self, dispatch):
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{CHANNEL_PREFIX + '*': lambda item: dispatch(
+            int(item['channel'].decode()[len(CHANNEL_PREFIX):]), json.loads(item['data'])
+        )})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+
+class LiveUpdates:
+    # 调查结果的实时推送：提交和删除响应时暂存计数增量，事务提交后按调查发布给订阅者；
+    # 默认在进程内分发，多进程部署时可配置 broker（如 redis）或在 init_app 中传入自定义实现
+    def __init__(self, app=None, broker=None):
+        self.broker = None
+        self.max_subscribers = 2
+        self.queue_size = 100
+        self.published = 0
+        self.overflows = 0
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, broker)
+
+    def init_app(self, app, broker=None, session=None):
+        self.close()
+        self.max_subscribers = app.config.get('LIVE_MAX_SUBSCRIBERS', 2)
+        self.queue_size = app.config.get('LIVE_QUEUE_SIZE', 100)
+        if broker is None:
+            broker = self._create_broker(app.config)
+        self.broker = broker
+        if broker is not None:
+            broker.start(self.dispatch)
+        if session is not None and not event.contains(session, 'after_commit', self._after_commit):
+            event.listen(session, 'after_commit', self._after_commit)
+            event.listen(session, 'after_rollback', self._after_rollback)
+        app.extensions['live_updates'] = self
+
+    @staticmethod
+    def _create_broker(config):
+        name = config.get('LIVE_BROKER', 'memory')
+        if name in (None, 'memory'):
+            return None
+        if name == 'redis':
+            return RedisBroker.from_url(config['LIVE_BROKER_REDIS_URL'])
+        raise ValueError(f'Unknown live broker: {name}')
+
+    def stage(self, session, counts, sign=1):
+        # counts: 结果计数表的增量 {(survey_id, question_id, option_id): n}，在事务提交后才发布
+        staged = session.info.setdefault('live_deltas', Counter())
+        for key, n in counts.items():
+            staged[key] += n * sign
+
+    def stage_refresh(self, session, survey_id):
+        # 问题或选项被修改、计数被重算时增量无法表达这些变化，事务提交后通知订阅者重新获取完整结果
+        session.info.setdefault('live_refresh', set()).add(survey_id)
+
+    def _after_commit(self, session):
+        staged = session.info.pop('live_deltas', None) or {}
+        refresh = session.info.pop('live_refresh', None) or set()
+        by_survey = {}
+        for (survey_id, question_id, option_id), n in staged.items():
+            # 需要刷新的调查会重新发送完整结果，不再单独发布增量
+            if n and survey_id not in refresh:
+                by_survey.setdefault(survey_id, []).append((question_id, option_id, n))
+        for survey_id, deltas in by_survey.items():
+            self.publish(survey_id, {
+                'survey_id': survey_id,
+                'total_delta': sum(n for q, o, n in deltas if q == 0 and o == 0),
+                'deltas': [
+                    {'question_id': q, 'option_id': o, 'delta': n}
+                    for q, o, n in deltas if q != 0
+                ]
+            })
+        for survey_id in sorted(refresh):
+            self.publish(survey_id, {'survey_id': survey_id, 'refresh': True})
+
+    def _after_rollback(self, session):
+        session.info.pop('live_deltas', None)
+        session.info.pop('live_refresh', None)
+
+    def publish(self, survey_id, message):
+        if self.broker is not None:
+            try:
+                self.broker.publish(survey_id, message)
+                return
+            except Exception:
+                logger.exception('Live broker publish failed, delivering locally only')
+        self.dispatch(survey_id, message)
+
+    def dispatch(self, survey_id, message):
+        with self._lock:
+            self.published += 1
+            subscribers = list(self._subscribers.get(survey_id, ()))
+        for subscription in subscribers:
+            was_overflowed = subscription.overflowed
+            subscription.put(message)
+            if subscription.overflowed and not was_overflowed:
+                with self._lock:
+                    self.overflows += 1
+
+    def subscribe(self, survey_id):
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise SubscriberLimitError('Too many live subscribers')
+            subscription = Subscription(self, survey_id, self.queue_size)
+            self._subscribers.setdefault(survey_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.survey_id)
+            if subscribers and subscription in subscribers:
+                subscribers.remove(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.survey_id]
+
+    def close(self):
+        # 停止 broker 并唤醒所有连接，使其尽快结束
+        if self.broker is not None:
+            self.broker.stop()
+        with self._lock:
+            subscribers = [s for group in self._subscribers.values() for s in group]
+        for subscription in subscribers:
+            subscription.wake()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'broker': type(self.broker).__name__ if self.broker else 'memory',
+                'subscribers': self._count,
+                'max_subscribers': self.max_subscribers,
+                'published': self.published,
+                'overflows': self.overflows
+            }
@@ -0,0 +1,204 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from flask import request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# 请求耗时（秒）和响应大小（字节）的直方图分桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# 当前请求的 SQL 计数；后台线程（异步写入、实时推送 broker）没有请求上下文，不参与统计
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestState:
+    __slots__ = ('endpoint', 'started', 'queries', 'db_time')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics:
+    # 按端点统计请求耗时、SQL 语句数、数据库耗时和响应大小：请求钩子记录耗时，
+    # 引擎的 cursor 事件累计当前请求的 SQL；以 Prometheus 文本格式导出，并可写入 Server-Timing 响应头。
+    # SLOW_QUERY_MS 大于 0 时，超过该耗时的语句连同发起它的端点写入 app.metrics 日志
+    def __init__(self, app=None, db=None, read_replica=None):
+        self.enabled = True
+        self.server_timing = True
+        self.slow_query_ms = 0
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._sizes = {}
+        self._queries = {}
+        self._slow = {}
+        if app is not None:
+            self.init_app(app, db, read_replica)
+
+    def init_app(self, app, db, read_replica=None):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', True)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', 0)
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        if read_replica is not None and read_replica.engine is not None:
+            engines.append(read_replica.engine)
+        for engine in engines:
+            if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_request(self):
+        request.environ['survey.metrics_token'] = _current.set(RequestState(request.endpoint or 'unmatched'))
+
+    def _after_request(self, response):
+        state = _current.get()
+        if state is None:
+            return response
+        elapsed = time.perf_counter() - state.started
+        key = (state.endpoint, request.method, response.status_code)
+        # 流式响应没有 Content-Length，不计入响应大小
+        size = response.content_length
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+            totals = self._queries.setdefault(state.endpoint, [0, 0.0])
+            totals[0] += state.queries
+            totals[1] += state.db_time
+            if size is not None:
+                histogram = self._sizes.get(state.endpoint)
+                if histogram is None:
+                    histogram = self._sizes[state.endpoint] = Histogram(SIZE_BUCKETS)
+                histogram.observe(size)
+        if self.server_timing:
+            # 流式响应（导出、SSE）只统计到视图返回为止
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={state.db_time * 1000:.2f};desc="{state.queries} queries", app;dur={elapsed * 1000:.2f}'
+            )
+        return response
+
+    def _teardown_request(self, exc):
+        token = request.environ.pop('survey.metrics_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info['metrics_started'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        state = _current.get()
+        started = conn.info.pop('metrics_started', None)
+        if state is None or started is None:
+            return
+        elapsed = time.perf_counter() - started
+        state.queries += 1
+        state.db_time += elapsed
+        if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms:
+            with self._lock:
+                self._slow[state.endpoint] = self._slow.get(state.endpoint, 0) + 1
+            logger.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, state.endpoint, ' '.join(statement.split()))
+
+    def render(self):
+        # Prometheus 文本格式（0.0.4）
+        with self._lock:
+            latency = {key: (h.counts[:], h.sum, h.count) for key, h in self._latency.items()}
+            sizes = {key: (h.counts[:], h.sum, h.count) for key, h in self._sizes.items()}
+            queries = {key: tuple(v) for key, v in self._queries.items()}
+            slow = dict(self._slow)
+
+        lines = [
+            '# HELP survey_http_request_duration_seconds Time spent handling a request until the view returned.',
+            '# TYPE survey_http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method, status), values in sorted(latency.items()):
+            lines.extend(self._histogram_lines(
+                'survey_http_request_duration_seconds', LATENCY_BUCKETS, values,
+                endpoint=endpoint, method=method, status=status
+            ))
+
+        lines += [
+            '# HELP survey_http_response_size_bytes Size of non-streamed response bodies.',
+            '# TYPE survey_http_response_size_bytes histogram',
+        ]
+        for endpoint, values in sorted(sizes.items()):
+            lines.extend(self._histogram_lines('survey_http_response_size_bytes', SIZE_BUCKETS, values, endpoint=endpoint))
+
+        lines += [
+            '# HELP survey_db_queries_total SQL statements executed while handling requests.',
+            '# TYPE survey_db_queries_total counter',
+        ]
+        lines.extend(f'survey_db_queries_total{_labels(endpoint=e)} {q}' for e, (q, _) in sorted(queries.items()))
+        lines += [
+            '# HELP survey_db_seconds_total Time spent executing SQL statements while handling requests.',
+            '# TYPE survey_db_seconds_total counter',
+        ]
+        lines.extend(f'survey_db_seconds_total{_labels(endpoint=e)} {t!r}' for e, (_, t) in sorted(queries.items()))
+        lines += [
+            '# HELP survey_db_slow_queries_total SQL statements slower than SLOW_QUERY_MS.',
+            '# TYPE survey_db_slow_queries_total counter',
+        ]
+        lines.extend(f'survey_db_slow_queries_total{_labels(endpoint=e)} {n}' for e, n in sorted(slow.items()))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram_lines(name, buckets, values, **labels):
+        counts, total, count = values
+        cumulative = 0
+        for bound, n in zip(buckets + ('+Inf',), counts):
+            cumulative += n
+            yield f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}'
+        yield f'{name}_sum{_labels(**labels)} {_format_number(total)}'
+        yield f'{name}_count{_labels(**labels)} {count}'
+
+    def reset(self):
+        with self._lock:
+            self._latency.clear()
+            self._sizes.clear()
+            self._queries.clear()
+            self._slow.clear()
@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusyError(RuntimeError):
+    pass
+
+
+class PasswordHasher:
+    # 在有界线程池中执行密码哈希（hashlib 的 scrypt/pbkdf2 计算时会释放 GIL），
+    # 并限制同时排队和执行的任务数，避免登录高峰占满所有请求 worker
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self.timeout = None
+        self._prefix = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT')
+        # 生成一次样本哈希，得到当前参数的规范前缀（如 pbkdf2:sha256:1000000）
+        self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_PENDING', workers * 4))
+        self._reset_stats()
+        app.extensions['password_hasher'] = self
+
+    def _reset_stats(self):
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            # 未绑定应用（例如单独使用模型）时直接同步计算
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusyError('Too many concurrent password hashing requests')
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        # 任务结束（包括等待超时后才结束）时才归还名额，保证名额数反映真实占用
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._finish(start))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingBusyError('Password hashing timed out')
+
+    def _finish(self, start):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - start
+        self._slots.release()
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # 存储的哈希参数与当前配置不一致时，需要在登录成功后重新哈希
+        prefix = self._prefix or generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != prefix
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                'method': self._prefix or self.method,
+                'completed': completed,
+                'rejected': self.rejected,
+                'in_flight': self.in_flight,
+                'average_ms': round(self.busy_seconds * 1000 / completed, 3) if completed else 0.0
+            }
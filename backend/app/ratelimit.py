@@ -0,0 +1,293 @@
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+import jwt
+from flask import jsonify, make_response, request
+
+# 去重记录在视图完成前的占位值
+IN_PROGRESS = 'in-progress'
+
+_LIMIT = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day|s|m|h|d)?\s*$')
+_UNITS = {'second': 1, 's': 1, 'minute': 60, 'm': 60, 'hour': 3600, 'h': 3600, 'day': 86400, 'd': 86400}
+
+
+def parse_limit(value):
+    # "10/minute"、"100/hour"、"5/30s" 等：返回 (桶容量, 每秒补充的令牌数)
+    match = _LIMIT.match(value or '')
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f'Invalid rate limit: {value!r}')
+    count, multiplier, unit = int(match.group(1)), match.group(2), match.group(3) or 'second'
+    period = int(multiplier or 1) * _UNITS[unit]
+    return count, count / period
+
+
+class MemoryLimiterStore:
+    # 进程内存储：多进程部署时每个进程各自计数，实际上限约为配置值乘以进程数
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        # 令牌桶：按经过的时间补充令牌，取出一个令牌返回 (True, 0)，否则返回 (False, 需等待的秒数)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            # 超出容量时淘汰最久未访问的桶（被淘汰的客户端相当于桶已回满）
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def add(self, key, value, ttl):
+        # 键不存在（或已过期）时写入并返回 True
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return False
+            self._set(key, value, now + ttl)
+            return True
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._set(key, value, time.monotonic() + ttl)
+
+    def _set(self, key, value, expires_at):
+        self._entries.pop(key, None)
+        self._entries[key] = (value, expires_at)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisLimiterStore:
+    # 多进程共享的存储，client 需兼容 redis-py；令牌桶的补充和扣减在 Lua 脚本中原子完成
+    CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, client, prefix='survey-system:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._consume = client.register_script(self.CONSUME_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for the redis rate limit store')
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def consume(self, key, capacity, rate):
+        allowed, tokens = self._consume(keys=[self.prefix + key], args=[capacity, rate, time.time()])
+        allowed = bool(int(allowed))
+        return allowed, 0 if allowed else (1 - float(tokens)) / rate
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(self.prefix + key, json.dumps(value), nx=True, ex=max(1, math.ceil(ttl))))
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, math.ceil(ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class RateLimiter:
+    # 按客户端限流和重复提交拦截，都在视图访问数据库之前完成：
+    # 带有效 Bearer token 的请求按用户计数（只校验签名，不查询数据库），否则按来源 IP 计数；
+    # @limit 使用 RATE_LIMITS 中以端点名配置的令牌桶，请求体带 survey_id 的（提交接口）按调查分别计数，超限返回 429 和 Retry-After；
+    # @idempotent 按 Idempotency-Key 请求头在 SUBMIT_DEDUPE_WINDOW 秒内拦截重复提交；未提供时只对已登录用户按请求体指纹去重——
+    # 同一 NAT 后的匿名用户共用 IP，答案相同的不同学生不能被当作重复提交。
+    # 已完成的提交直接重放原响应，仍在处理中的返回 409。被拒绝的请求按端点和原因计数
+    def __init__(self, app=None, store=None):
+        self.enabled = True
+        self.limits = {}
+        self.dedupe_window = 0
+        self.store = MemoryLimiterStore()
+        self._rejected = Counter()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, store)
+
+    def init_app(self, app, store=None):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.limits = {endpoint: parse_limit(value) for endpoint, value in app.config.get('RATE_LIMITS', {}).items()}
+        self.dedupe_window = app.config.get('SUBMIT_DEDUPE_WINDOW', 0)
+        self.store = store if store is not None else self._create_store(app.config)
+        self.reset_stats()
+        app.extensions['rate_limiter'] = self
+
+    @staticmethod
+    def _create_store(config):
+        name = config.get('RATE_LIMIT_STORE', 'memory')
+        if name == 'memory':
+            return MemoryLimiterStore(max_size=config.get('RATE_LIMIT_MAX_KEYS', 100000))
+        if name == 'redis':
+            return RedisLimiterStore.from_url(config['RATE_LIMIT_REDIS_URL'])
+        raise ValueError(f'Unknown rate limit store: {name}')
+
+    def client_key(self):
+        # 同一请求中限流和去重共用一次 token 解码的结果
+        key = request.environ.get('survey.rate_limit_client')
+        if key is None:
+            key = request.environ['survey.rate_limit_client'] = self._client_key()
+        return key
+
+    @staticmethod
+    def _client_key():
+        from app.api.auth import SECRET_KEY
+
+        token = request.headers.get('Authorization', '')
+        if token.startswith('Bearer '):
+            try:
+                data = jwt.decode(token[7:], SECRET_KEY, algorithms=['HS256'])
+                if 'user_id' in data:
+                    return f'user:{data["user_id"]}'
+            except jwt.InvalidTokenError:
+                pass
+        return f'ip:{request.remote_addr}'
+
+    def _count(self, reason):
+        with self._lock:
+            self._rejected[(request.endpoint, reason)] += 1
+
+    def _reject(self, reason, message, status, retry_after=None):
+        self._count(reason)
+        response = jsonify({'message': message})
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, status
+
+    def limit(self, f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            limit = self.limits.get(request.endpoint) if self.enabled else None
+            if limit is not None:
+                allowed, retry_after = self.store.consume(f'{request.endpoint}:{self.client_key()}{self._scope()}', *limit)
+                if not allowed:
+                    return self._reject('rate_limited', 'Too many requests, please try again later', 429, retry_after)
+            return f(*args, **kwargs)
+        return decorated
+
+    @staticmethod
+    def _scope():
+        # 同一来源对不同调查的提交分别计数；与 submit_survey 一样用 int() 解析，
+        # 1、"1"、"01"、" 1" 属于同一个桶，无法解析时不区分调查
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return ''
+        try:
+            return f':survey:{int(data.get("survey_id"))}'
+        except (TypeError, ValueError):
+            return ''
+
+    def _submission_key(self):
+        # 请求头中的幂等键按客户端隔离；没有幂等键时只对已登录用户使用规范化后的请求体指纹
+        client = self.client_key()
+        scope = f'{request.endpoint}:{client}'
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key:
+            return 'dedupe:' + hashlib.sha256(f'{scope}:key:{idempotency_key}'.encode('utf-8')).hexdigest()
+        data = request.get_json(silent=True)
+        if data is None or not client.startswith('user:'):
+            return None
+        body = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return 'dedupe:' + hashlib.sha256(f'{scope}:body:{body}'.encode('utf-8')).hexdigest()
+
+    def idempotent(self, f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = self._submission_key() if self.enabled and self.dedupe_window else None
+            if key is None:
+                return f(*args, **kwargs)
+            if not self.store.add(key, IN_PROGRESS, self.dedupe_window):
+                stored = self.store.get(key)
+                if stored is None or stored == IN_PROGRESS:
+                    return self._reject('duplicate', 'An identical submission is already being processed', 409)
+                self._count('duplicate')
+                response = jsonify(stored['body'])
+                response.status_code = stored['status']
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            try:
+                response = make_response(f(*args, **kwargs))
+            except BaseException:
+                self.store.delete(key)
+                raise
+            # 只记住成功的提交；失败的请求删除占位，允许客户端修正后重试
+            if response.status_code < 300 and response.is_json:
+                self.store.set(key, {'status': response.status_code, 'body': response.get_json()}, self.dedupe_window)
+            else:
+                self.store.delete(key)
+            return response
+        return decorated
+
+    def reset_stats(self):
+        with self._lock:
+            self._rejected.clear()
+
+    def stats(self):
+        with self._lock:
+            rejected = dict(self._rejected)
+        return {
+            'enabled': self.enabled,
+            'store': type(self.store).__name__,
+            'limits': {endpoint: {'burst': capacity, 'per_second': round(rate, 6)}
+                       for endpoint, (capacity, rate) in self.limits.items()},
+            'dedupe_window': self.dedupe_window,
+            'rejected': [{'endpoint': endpoint, 'reason': reason, 'count': count}
+                         for (endpoint, reason), count in sorted(rejected.items())]
+        }
+
+    def render(self):
+        # Prometheus 文本格式，附加在 /api/metrics 输出之后
+        with self._lock:
+            rejected = sorted(self._rejected.items())
+        lines = [
+            '# HELP survey_rejected_requests_total Requests rejected by rate limiting or duplicate submission checks.',
+            '# TYPE survey_rejected_requests_total counter',
+        ]
+        lines.extend(f'survey_rejected_requests_total{{endpoint="{endpoint}",reason="{reason}"}} {count}'
+                     for (endpoint, reason), count in rejected)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,105 @@
+import datetime
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+# 也接受旧的非标准写法
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+
+def default(value):
+    # 时间统一输出 ISO 8601（与 to_dict 中的 isoformat 一致），而不是 Flask 默认的 HTTP 日期格式；
+    # 这样列表接口可以直接把数据库中的 datetime 交给序列化器，无需逐行调用 isoformat
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class SurveyJSONProvider(DefaultJSONProvider):
+    # JSON_BACKEND：auto（安装了 orjson 时使用 orjson，否则使用标准库 json）、orjson 或 std。
+    # 请求的 Accept 优先选择 application/msgpack 且安装了 msgpack 时，jsonify 返回 MessagePack 编码的同一数据
+    default = staticmethod(default)
+    # 不排序键、不转义非 ASCII 字符：输出更小更快，字段顺序即各接口构造字典的顺序
+    sort_keys = False
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend not in ('auto', 'orjson', 'std'):
+            raise ValueError(f'Unknown JSON backend: {backend}')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('The orjson package is required for the orjson JSON backend')
+        self.backend = 'orjson' if backend != 'std' and orjson is not None else 'std'
+        self.msgpack = app.config.get('MSGPACK_ENABLED', True) and msgpack is not None
+
+    def _orjson_options(self, indent=None):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # orjson 不支持 json.dumps 的其他参数（如 separators 以外的自定义编码器），传入时回退到标准库
+        if self.backend == 'orjson' and set(kwargs) <= {'indent', 'separators'}:
+            return orjson.dumps(obj, default=self.default,
+                                option=self._orjson_options(kwargs.get('indent'))).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if wants_msgpack():
+            response = self._app.response_class(
+                msgpack.packb(obj, default=self.default, use_bin_type=True), mimetype=MSGPACK_MIMETYPE
+            )
+        else:
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            if self.backend == 'orjson':
+                body = orjson.dumps(obj, default=self.default, option=self._orjson_options(indent)) + b'\n'
+            else:
+                dump_args = {'indent': 2} if indent else {'separators': (',', ':')}
+                body = f'{super().dumps(obj, **dump_args)}\n'
+            response = self._app.response_class(body, mimetype=self.mimetype)
+        return vary_on_accept(response)
+
+
+def _provider():
+    return current_app.json if isinstance(current_app.json, SurveyJSONProvider) else None
+
+
+def wants_msgpack():
+    # 只有显式把 msgpack 排在 JSON 之前（或只接受 msgpack）时才返回 MessagePack，*/* 仍返回 JSON
+    provider = _provider()
+    if provider is None or not provider.msgpack or not has_request_context():
+        return False
+    return request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES) in MSGPACK_MIMETYPES
+
+
+def representation():
+    # 当前请求协商出的响应格式，参与 ETag 计算，使 JSON 和 MessagePack 响应各自有独立的缓存校验值
+    return 'msgpack' if wants_msgpack() else 'json'
+
+
+def vary_on_accept(response):
+    provider = _provider()
+    if provider is not None and provider.msgpack:
+        response.vary.add('Accept')
+    return response
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# baseline 相当于未设置任何 pragma 时 SQLite 的默认行为（回滚日志、每次提交 fsync）
+PROFILES = {
+    'baseline': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE': '-2000',
+    },
+    'tuned': {},
+}
+
+
+def run_profile(args):
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'submit-bench.sqlite')
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    survey = app.test_client().post('/api/surveys', json={
+        'title': 'Concurrent submit',
+        'questions': [
+            {'text': 'Single', 'type': 1, 'options': ['a', 'b', 'c']},
+            {'text': 'Multiple', 'type': 2, 'options': ['x', 'y', 'z']},
+            {'text': 'Text', 'type': 3},
+        ]
+    }).get_json()
+    single, multiple, text = survey['questions']
+    body = {
+        'survey_id': survey['id'],
+        'responses': {str(single['id']): single['options'][0]['id'], str(text['id']): 'benchmark'},
+        'selectedOptions': {str(multiple['id']): [o['id'] for o in multiple['options'][:2]]},
+    }
+
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        for _ in range(args.requests // args.threads):
+            status = client.post('/api/submit', json=body).status_code
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(statuses.values())
+    return {
+        'profile': args.profile,
+        'requests': total,
+        'errors': total - statuses.get(200, 0),
+        'submits_per_second': round(statuses.get(200, 0) / elapsed, 1),
+        'elapsed_s': round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare concurrent /api/submit throughput with and without SQLite tuning.')
+    parser.add_argument('--profile', choices=sorted(PROFILES))
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return 0
+
+    # 配置在导入时读取环境变量，所以每种配置在单独的进程中运行
+    results = []
+    for profile, env in PROFILES.items():
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--profile', profile,
+             '--requests', str(args.requests), '--threads', str(args.threads)],
+            env=dict(os.environ, **env)
+        )
+        results.append(json.loads(output.decode().strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+    return 1 if any(r['errors'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
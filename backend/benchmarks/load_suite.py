@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.survey_list import percentile
+
+SCENARIOS = ('submit', 'survey', 'published_surveys', 'survey_responses', 'survey_stats')
+
+# 各场景对应的端点名，用于从 /api/metrics 中读取 SQL 语句数和数据库耗时
+ENDPOINTS = {
+    'submit': 'api.submit_survey',
+    'survey': 'api.get_survey',
+    'published_surveys': 'api.get_published_surveys',
+    'survey_responses': 'api.get_survey_responses',
+    'survey_stats': 'api.get_survey_stats',
+}
+
+_METRIC = re.compile(r'^(survey_db_queries_total|survey_db_seconds_total|survey_http_request_duration_seconds_count)'
+                     r'\{endpoint="([^"]+)"[^}]*\} (\S+)$', re.M)
+
+
+class InProcessTarget:
+    # 在本进程内通过 Flask 测试客户端发请求，每个线程一个客户端
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code, response.get_json(silent=True)
+
+    def text(self, path):
+        response = self.app.test_client().get(path)
+        return response.get_data(as_text=True) if response.status_code == 200 else None
+
+
+class HttpTarget:
+    # 对已经运行的服务（如 gunicorn）发 HTTP 请求；多 worker 时 /api/metrics 只反映其中一个进程。
+    # 所有请求来自同一地址，服务端需设置 RATE_LIMIT_ENABLED=false，否则提交和登录会被限流
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except OSError:
+            return None, None
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+    def text(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=30) as response:
+                return response.read().decode()
+        except OSError:
+            return None
+
+
+def read_metrics(target):
+    # {endpoint: (请求数, SQL 语句数, 数据库秒数)}；未启用指标时返回空
+    text = target.text('/api/metrics')
+    if text is None:
+        return {}
+    totals = {}
+    for name, endpoint, value in _METRIC.findall(text):
+        requests, queries, seconds = totals.get(endpoint, (0, 0, 0.0))
+        if name == 'survey_db_queries_total':
+            queries = float(value)
+        elif name == 'survey_db_seconds_total':
+            seconds = float(value)
+        else:
+            requests += float(value)
+        totals[endpoint] = (requests, queries, seconds)
+    return totals
+
+
+def seed(args):
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + args.database
+    from app import create_app
+    from app.extensions import db
+    from app.api.models import Survey
+    from benchmarks.seed import seed_database
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        if Survey.query.count() == 0:
+            start = time.perf_counter()
+            seed_database(surveys=args.surveys, questions=args.questions, options=args.options,
+                          responses=args.responses, seed=args.seed)
+            print(f'Seeded {args.surveys} surveys / {args.responses} responses '
+                  f'in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    return app
+
+
+def build_requests(target, scenario, count, rng):
+    # 预先生成 (method, path, body) 列表，请求的调查在已发布的调查中随机选取
+    _, published = target.request('GET', '/api/published-surveys')
+    survey_ids = [s['id'] for s in published or []][:100]
+    if not survey_ids:
+        raise RuntimeError('No published surveys to benchmark against')
+
+    if scenario == 'survey':
+        return [('GET', f'/api/surveys/{rng.choice(survey_ids)}', None) for _ in range(count)]
+    if scenario == 'published_surveys':
+        return [('GET', '/api/published-surveys', None)] * count
+    if scenario == 'survey_responses':
+        return [('GET', f'/api/survey-responses/{rng.choice(survey_ids)}?limit=50', None) for _ in range(count)]
+    if scenario == 'survey_stats':
+        return [('GET', '/api/survey-stats', None)] * count
+
+    definitions = {}
+    for survey_id in survey_ids[:20]:
+        _, survey = target.request('GET', f'/api/surveys/{survey_id}')
+        if survey and survey.get('questions'):
+            definitions[survey_id] = survey['questions']
+    requests = []
+    for _ in range(count):
+        survey_id = rng.choice(list(definitions))
+        responses, selected = {}, {}
+        for question in definitions[survey_id]:
+            options = [o['id'] for o in question.get('options', [])]
+            if question['type'] == 3 or not options:
+                responses[str(question['id'])] = 'benchmark answer'
+            elif question['type'] == 2:
+                selected[str(question['id'])] = rng.sample(options, rng.randint(1, len(options)))
+            else:
+                responses[str(question['id'])] = rng.choice(options)
+        requests.append(('POST', '/api/submit',
+                         {'survey_id': survey_id, 'responses': responses, 'selectedOptions': selected}))
+    return requests
+
+
+def run_scenario(target, scenario, args, rng):
+    requests = build_requests(target, scenario, args.requests, rng)
+
+    def send(item):
+        method, path, body = item
+        start = time.perf_counter()
+        status, _ = target.request(method, path, body)
+        return (time.perf_counter() - start) * 1000, status is not None and status < 400
+
+    # 预热后读取一次指标，之后的差值只包含正式请求
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, requests[:args.warmup]))
+        before = read_metrics(target)
+        start = time.perf_counter()
+        results = list(executor.map(send, requests))
+        elapsed = time.perf_counter() - start
+    after = read_metrics(target)
+
+    samples = [ms for ms, ok in results if ok]
+    report = {
+        'requests': len(results),
+        'errors': sum(1 for _, ok in results if not ok),
+        'requests_per_second': round(len(results) / elapsed, 1),
+        'p50_ms': round(statistics.median(samples), 3) if samples else None,
+        'p95_ms': round(percentile(samples, 95), 3) if samples else None,
+        'p99_ms': round(percentile(samples, 99), 3) if samples else None,
+        'queries_per_request': None,
+        'db_ms_per_request': None,
+    }
+    endpoint = ENDPOINTS[scenario]
+    if endpoint in after:
+        requests_done, queries, seconds = (a - b for a, b in zip(after[endpoint], before.get(endpoint, (0, 0, 0.0))))
+        if requests_done:
+            report['queries_per_request'] = round(queries / requests_done, 2)
+            report['db_ms_per_request'] = round(seconds * 1000 / requests_done, 3)
+    return report
+
+
+def compare(results, baseline, tolerance):
+    # 与基线比较：吞吐下降、p95 或每请求 SQL 语句数上升超过 tolerance，都视为回退
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if not previous:
+            continue
+        if previous.get('requests_per_second') and \
+                current['requests_per_second'] < previous['requests_per_second'] * (1 - tolerance):
+            regressions.append({'scenario': scenario, 'metric': 'requests_per_second',
+                                'baseline': previous['requests_per_second'], 'current': current['requests_per_second']})
+        if previous.get('p95_ms') and current['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append({'scenario': scenario, 'metric': 'p95_ms',
+                                'baseline': previous['p95_ms'], 'current': current['p95_ms']})
+        if previous.get('queries_per_request') is not None and current['queries_per_request'] is not None and \
+                current['queries_per_request'] > previous['queries_per_request'] * (1 + tolerance):
+            regressions.append({'scenario': scenario, 'metric': 'queries_per_request',
+                                'baseline': previous['queries_per_request'], 'current': current['queries_per_request']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the hot survey API routes and compare against a baseline.')
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'load-suite-bench.sqlite'))
+    parser.add_argument('--surveys', type=int, default=500)
+    parser.add_argument('--questions', type=int, default=5)
+    parser.add_argument('--options', type=int, default=4)
+    parser.add_argument('--responses', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--base-url', help='Drive an already running server instead of an in-process app.')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=1000, help='Measured requests per scenario.')
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--output', help='Write the JSON report to this file (e.g. to store a new baseline).')
+    parser.add_argument('--baseline', help='Compare against a previously stored JSON report.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression, default 20%%.')
+    args = parser.parse_args()
+
+    if args.base_url:
+        target = HttpTarget(args.base_url)
+    else:
+        target = InProcessTarget(seed(args))
+
+    rng = random.Random(args.seed)
+    report = {
+        'config': {
+            'target': args.base_url or 'in-process',
+            'surveys': args.surveys, 'questions': args.questions, 'options': args.options,
+            'responses': args.responses, 'requests': args.requests, 'concurrency': args.concurrency,
+        },
+        'scenarios': {scenario: run_scenario(target, scenario, args, rng) for scenario in args.scenarios},
+    }
+
+    status = 1 if any(r['errors'] for r in report['scenarios'].values()) else 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(report['scenarios'], json.load(f), args.tolerance)
+        if report['regressions']:
+            status = 1
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.survey_list import measure
+
+
+def build_app(enabled):
+    from app import create_app
+    from config import config
+
+    config['testing'].METRICS_ENABLED = enabled
+    return create_app('testing')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the per-request overhead of the request metrics middleware.')
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'metrics-overhead-bench.sqlite'))
+    parser.add_argument('--surveys', type=int, default=200)
+    parser.add_argument('--responses', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + args.database
+    from app.extensions import db
+    from app.api.models import Survey
+    from benchmarks.seed import seed_database
+
+    app = build_app(False)
+    with app.app_context():
+        db.create_all()
+        if Survey.query.count() == 0:
+            seed_database(surveys=args.surveys, responses=args.responses)
+        survey_id = db.session.query(Survey.id).first()[0]
+
+    urls = [
+        '/api/surveys?limit=50',
+        f'/api/surveys/{survey_id}',
+        f'/api/surveys/{survey_id}/results',
+        f'/api/survey-responses/{survey_id}?limit=50',
+    ]
+    results = {}
+    # 先测关闭指标的应用，再测开启的应用；两者使用同一个数据库文件，各自先预热一轮
+    for label, enabled in (('disabled', False), ('enabled', True)):
+        client = (app if not enabled else build_app(True)).test_client()
+        for url in urls:
+            measure(client, url, 20)
+        results[label] = [measure(client, url, args.repeat) for url in urls]
+
+    report = []
+    for off, on in zip(results['disabled'], results['enabled']):
+        report.append({
+            'url': off['url'],
+            'p50_ms_disabled': off['p50_ms'],
+            'p50_ms_enabled': on['p50_ms'],
+            'overhead_ms': round(on['p50_ms'] - off['p50_ms'], 3),
+        })
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
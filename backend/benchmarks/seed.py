@@ -0,0 +1,99 @@
+import datetime
+import itertools
+import random
+from sqlalchemy import func, insert
+from app.extensions import db
+from app.api.models import Survey, Question, Option, SurveyResponse, QuestionResponse
+from app.api.tallies import rebuild_tallies
+from app.api.counters import reconcile_counters
+from app.api.timeseries import rebuild_rollups
+from app.api.search import rebuild_search_index
+
+CHUNK_SIZE = 10000
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert_chunks(table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(table), rows[start:start + CHUNK_SIZE])
+
+
+def seed_database(surveys=1000, questions=5, options=4, responses=100000, published_ratio=0.5, seed=42):
+    # 生成合成数据：surveys 个调查，每个调查 questions 道题（单选/多选/文本轮换），
+    # 选择题各 options 个选项，responses 条响应按偏斜分布分配给各调查
+    # 必须在应用上下文中调用；写入完成后重建结果计数表
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+
+    survey_id = _next_id(Survey)
+    question_id = _next_id(Question)
+    option_id = _next_id(Option)
+
+    survey_rows, question_rows, option_rows = [], [], []
+    definitions = []
+    for i in range(surveys):
+        created_at = now - datetime.timedelta(minutes=surveys - i)
+        survey_rows.append({
+            'id': survey_id, 'title': f'Benchmark survey {survey_id}', 'description': 'Synthetic benchmark data',
+            'is_published': rng.random() < published_ratio, 'created_at': created_at, 'updated_at': created_at
+        })
+        survey_questions = []
+        for q in range(questions):
+            question_type = q % 3 + 1
+            question_rows.append({
+                'id': question_id, 'survey_id': survey_id, 'text': f'Question {q + 1}',
+                'type': question_type, 'required': False, 'order': q
+            })
+            option_ids = []
+            if question_type != 3:
+                for o in range(options):
+                    option_rows.append({
+                        'id': option_id, 'question_id': question_id, 'text': f'Option {o + 1}', 'order': o
+                    })
+                    option_ids.append(option_id)
+                    option_id += 1
+            survey_questions.append((question_id, question_type, option_ids))
+            question_id += 1
+        definitions.append((survey_id, survey_questions))
+        survey_id += 1
+
+    _insert_chunks(Survey.__table__, survey_rows)
+    _insert_chunks(Question.__table__, question_rows)
+    _insert_chunks(Option.__table__, option_rows)
+
+    response_id = _next_id(SurveyResponse)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(definitions))))
+    response_rows, answer_rows = [], []
+    for n in range(responses):
+        survey_id, survey_questions = rng.choices(definitions, cum_weights=cum_weights)[0]
+        response_rows.append({
+            'id': response_id, 'survey_id': survey_id, 'user_id': None,
+            'created_at': now - datetime.timedelta(seconds=responses - n)
+        })
+        for question_id, question_type, option_ids in survey_questions:
+            if question_type == 3:
+                answer_rows.append({'survey_response_id': response_id, 'question_id': question_id,
+                                    'option_id': None, 'text_response': f'Answer {n}'})
+                continue
+            chosen = rng.sample(option_ids, rng.randint(1, 2)) if question_type == 2 else [rng.choice(option_ids)]
+            for opt_id in chosen:
+                answer_rows.append({'survey_response_id': response_id, 'question_id': question_id,
+                                    'option_id': opt_id, 'text_response': None})
+        response_id += 1
+
+        if len(response_rows) >= CHUNK_SIZE:
+            _insert_chunks(SurveyResponse.__table__, response_rows)
+            _insert_chunks(QuestionResponse.__table__, answer_rows)
+            response_rows, answer_rows = [], []
+
+    _insert_chunks(SurveyResponse.__table__, response_rows)
+    _insert_chunks(QuestionResponse.__table__, answer_rows)
+
+    rebuild_tallies()
+    reconcile_counters(repair=True)
+    rebuild_rollups()
+    rebuild_search_index()
+    db.session.commit()
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.survey_list import percentile
+
+
+def seed(database, surveys, responses):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + database
+    from app import create_app
+    from app.extensions import db
+    from app.api.models import Survey
+    from benchmarks.seed import seed_database
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        if Survey.query.count() == 0:
+            seed_database(surveys=surveys, responses=responses)
+        survey_id = db.session.query(Survey.id).filter(Survey.is_published.is_(True)).first()[0]
+    return survey_id
+
+
+def server_command(server, port, workers, threads):
+    if server == 'dev':
+        # 与 run.py 相同的开发服务器（debug 模式）；关闭重载器以便能干净地结束进程
+        return [sys.executable, '-m', 'flask', '--app', 'wsgi:app', 'run', '--debug', '--no-reload',
+                '--port', str(port)], \
+            {'FLASK_CONFIG': 'development'}
+    return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'wsgi:app'], \
+        {'FLASK_CONFIG': 'production', 'GUNICORN_WORKERS': str(workers),
+         'GUNICORN_THREADS': str(threads), 'GUNICORN_ACCESSLOG': '/dev/null'}
+
+
+def wait_until_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/api/health', timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not become ready')
+
+
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            ok = response.status == 200
+    except OSError:
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def load(base_url, paths, requests, concurrency):
+    urls = [base_url + paths[i % len(paths)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - start
+    samples = [ms for ms, ok in results if ok]
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(statistics.median(samples), 3) if samples else None,
+        'p95_ms': round(percentile(samples, 95), 3) if samples else None,
+    }
+
+
+def run_server(server, args, survey_id):
+    port = args.port + (0 if server == 'dev' else 1)
+    command, extra_env = server_command(server, port, args.workers, args.threads)
+    env = dict(os.environ, DEV_DATABASE_URL=os.environ['DATABASE_URL'], **extra_env)
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_ready(base_url)
+        paths = ['/api/published-surveys', f'/api/surveys/{survey_id}', '/api/surveys?limit=50']
+        load(base_url, paths, min(args.requests, 50), args.concurrency)
+        return dict(server=server, **load(base_url, paths, args.requests, args.concurrency))
+    finally:
+        # SIGTERM 触发 gunicorn 的优雅退出
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the dev server with the gunicorn production profile.')
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'serving-bench.sqlite'))
+    parser.add_argument('--surveys', type=int, default=200)
+    parser.add_argument('--responses', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=18000)
+    parser.add_argument('--servers', nargs='+', choices=['dev', 'gunicorn'], default=['dev', 'gunicorn'])
+    args = parser.parse_args()
+
+    survey_id = seed(args.database, args.surveys, args.responses)
+    results = [run_server(server, args, survey_id) for server in args.servers]
+    print(json.dumps(results, indent=2))
+    return 1 if any(r['errors'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def measure(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return {
+        'url': url,
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /api/surveys list endpoint.')
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'survey-list-bench.sqlite'))
+    parser.add_argument('--surveys', type=int, default=5000)
+    parser.add_argument('--responses', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--threshold-ms', type=float, default=100.0)
+    args = parser.parse_args()
+
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + args.database
+    from app import create_app
+    from app.extensions import db
+    from app.api.models import Survey
+    from benchmarks.seed import seed_database
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        if Survey.query.count() == 0:
+            start = time.perf_counter()
+            seed_database(surveys=args.surveys, responses=args.responses)
+            print(f'Seeded {args.surveys} surveys / {args.responses} responses '
+                  f'in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+    client = app.test_client()
+    results = [
+        measure(client, '/api/surveys?limit=50', args.repeat),
+        measure(client, '/api/surveys?limit=50&sort=updated_at&order=desc&is_published=true', args.repeat),
+        measure(client, '/api/surveys?limit=50&title=survey%2012', args.repeat),
+    ]
+    print(json.dumps(results, indent=2))
+
+    slow = [r for r in results if r['p95_ms'] > args.threshold_ms]
+    return 1 if slow else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import sys
+import time
+from sqlalchemy import event
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cost of editing one question of a long survey.')
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--options', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('TEST_DATABASE_URL', 'sqlite://')
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+    client = app.test_client()
+
+    survey = client.post('/api/surveys', json={
+        'title': 'Long survey',
+        'questions': [
+            {'text': f'Question {i}', 'type': 1, 'options': [f'Option {j}' for j in range(args.options)]}
+            for i in range(args.questions)
+        ]
+    }).get_json()
+
+    # 与前端编辑页一致：带上问题和选项的 id，只修改中间一道题的文本
+    questions = [{
+        'id': q['id'], 'text': q['text'], 'type': q['type'], 'required': q['required'],
+        'options': [{'id': o['id'], 'text': o['text']} for o in q['options']]
+    } for q in survey['questions']]
+    questions[len(questions) // 2]['text'] = 'Edited question'
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    start = time.perf_counter()
+    response = client.put(f"/api/surveys/{survey['id']}", json={'questions': questions})
+    elapsed = (time.perf_counter() - start) * 1000
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    changes = response.get_json()['changes']
+    print(json.dumps({
+        'questions': args.questions,
+        'options_per_question': args.options,
+        'elapsed_ms': round(elapsed, 3),
+        'rows_touched': changes['rows_touched'],
+        'write_statements': sum(1 for s in statements if s in ('INSERT', 'UPDATE', 'DELETE')),
+        'changes': changes,
+    }, indent=2))
+    return 0 if changes['rows_touched'] <= 1 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
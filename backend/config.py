@@ -3,19 +3,148 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 每个 SQLite 连接建立时执行的 pragma：WAL 让读写互不阻塞，WAL 下 synchronous=NORMAL 只在检查点时 fsync，
+    # busy_timeout 让并发写入排队等待而不是立即报 database is locked；cache_size 为负数时单位是 KiB
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL',
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE') or -64000),
+        'temp_store': 'MEMORY',
+    }
+    # 只读副本：设置 REPLICA_DATABASE_URL 后注册为 replica 绑定，报表类 GET 接口（统计、列表、结果、导出、响应）从副本读取；
+    # 未设置时文件型 SQLite 以只读方式打开主库文件，其他数据库回退到主库
+    READ_REPLICA_BIND = 'replica'
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    # 允许前端读取分页游标等自定义响应头
+    CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'ETag']
+    # 各接口的 Cache-Control 响应头，按 endpoint 名配置；no-cache 表示客户端每次都需用 ETag 重新验证
+    CACHE_CONTROL = {
+        'api.get_survey': os.environ.get('SURVEY_CACHE_CONTROL') or 'no-cache',
+        'api.get_published_surveys': os.environ.get('PUBLISHED_SURVEYS_CACHE_CONTROL') or 'no-cache',
+    }
+    # 批量提交接口单次允许的最大提交数
+    SUBMIT_BATCH_MAX_SIZE = int(os.environ.get('SUBMIT_BATCH_MAX_SIZE') or 1000)
+    # /api/survey-stats 默认统计最近多少小时的响应数；按小时的计数保留时长（小时），超出部分由 reconcile-counters 清理
+    SURVEY_STATS_RECENT_HOURS = int(os.environ.get('SURVEY_STATS_RECENT_HOURS') or 24)
+    SURVEY_COUNTER_RETENTION_HOURS = int(os.environ.get('SURVEY_COUNTER_RETENTION_HOURS') or 168)
+    # /api/surveys/<id>/timeseries 单次请求最多返回的时间桶数
+    TIMESERIES_MAX_POINTS = int(os.environ.get('TIMESERIES_MAX_POINTS') or 1440)
+    # 按分钟的时间桶保留时长（小时），更早的由 prune-rollups 删除；按小时和按天的桶一直保留
+    TIMESERIES_MINUTE_RETENTION_HOURS = int(os.environ.get('TIMESERIES_MINUTE_RETENTION_HOURS') or 48)
+    # 文本回答全文检索：auto（SQLite 支持时使用 FTS5，否则使用 answer_terms 倒排表）、fts5 或 terms；单页最多返回的结果数
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'auto'
+    SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT') or 100)
+    # 实时结果推送（SSE）：memory 为进程内分发，多进程部署时使用 redis 在进程间转发
+    LIVE_BROKER = os.environ.get('LIVE_BROKER') or 'memory'
+    LIVE_BROKER_REDIS_URL = os.environ.get('LIVE_BROKER_REDIS_URL') or 'redis://localhost:6379/0'
+    # 每个进程的最大订阅连接数以及每个连接最多积压的消息数。gthread worker 中每个订阅连接在整个 LIVE_STREAM_TIMEOUT 内
+    # 独占一个线程，默认取 GUNICORN_THREADS 减去为普通请求保留的 LIVE_RESERVED_THREADS 个线程，订阅者不会占满 worker
+    LIVE_RESERVED_THREADS = int(os.environ.get('LIVE_RESERVED_THREADS') or 2)
+    LIVE_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_SUBSCRIBERS') or
+                               max(1, int(os.environ.get('GUNICORN_THREADS') or 4) - LIVE_RESERVED_THREADS))
+    LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE') or 100)
+    # 心跳间隔与单个连接的最长持续时间（秒），到期后由 EventSource 自动重连
+    LIVE_HEARTBEAT = int(os.environ.get('LIVE_HEARTBEAT') or 15)
+    LIVE_STREAM_TIMEOUT = int(os.environ.get('LIVE_STREAM_TIMEOUT') or 300)
+    # 调查定义缓存：memory（进程内 LRU）、redis 或 null；多进程部署时应使用 redis 以便失效能同步到所有进程
+    SURVEY_CACHE_BACKEND = os.environ.get('SURVEY_CACHE_BACKEND') or 'memory'
+    SURVEY_CACHE_TTL = int(os.environ.get('SURVEY_CACHE_TTL') or 300)
+    SURVEY_CACHE_MAX_SIZE = int(os.environ.get('SURVEY_CACHE_MAX_SIZE') or 1024)
+    SURVEY_CACHE_REDIS_URL = os.environ.get('SURVEY_CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    # 已认证用户缓存（进程内），TTL 同时受 token 过期时间限制。用户修改或删除后的失效版本号：
+    # memory 只在本进程内生效，其他进程最多 AUTH_CACHE_TTL 秒后失效；redis 在所有进程间共享，立即失效
+    AUTH_CACHE_BACKEND = os.environ.get('AUTH_CACHE_BACKEND') or 'memory'
+    AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL') or 60)
+    AUTH_CACHE_MAX_SIZE = int(os.environ.get('AUTH_CACHE_MAX_SIZE') or 4096)
+    AUTH_CACHE_REDIS_URL = os.environ.get('AUTH_CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    # 密码哈希方法及参数（werkzeug 格式，如 scrypt:32768:8:1 或 pbkdf2:sha256:600000），
+    # 修改后用户下次登录时会自动按新参数重新哈希
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt'
+    # 哈希线程池大小、最多同时排队和执行的哈希任务数、单次等待超时（秒）
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 8)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)
+    # 提交写入模式：sync 为请求内直接写库；queue 为先写入本地持久队列并返回 202，由后台线程批量写库
+    INGEST_MODE = os.environ.get('INGEST_MODE') or 'sync'
+    INGEST_QUEUE_PATH = os.environ.get('INGEST_QUEUE_PATH') or \
+        os.path.join(os.path.dirname(__file__), 'ingest-queue.sqlite')
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE') or 500)
+    INGEST_FLUSH_INTERVAL = float(os.environ.get('INGEST_FLUSH_INTERVAL') or 0.2)
+    # 认领后超过该秒数仍未完成的提交视为写入进程已崩溃，会被重新认领
+    INGEST_CLAIM_LEASE = int(os.environ.get('INGEST_CLAIM_LEASE') or 60)
+    # 数据库暂时不可用（如 database is locked）时的最多尝试次数和首次重试的等待秒数（之后每次翻倍）
+    INGEST_MAX_ATTEMPTS = int(os.environ.get('INGEST_MAX_ATTEMPTS') or 5)
+    INGEST_RETRY_BACKOFF = float(os.environ.get('INGEST_RETRY_BACKOFF') or 1.0)
+    INGEST_START_WRITER = True
+    # 请求指标：/api/metrics 导出 Prometheus 文本格式，响应头附带 Server-Timing；
+    # SLOW_QUERY_MS 大于 0 时记录超过该耗时（毫秒）的 SQL 语句及其来源端点
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+    METRICS_SERVER_TIMING = (os.environ.get('METRICS_SERVER_TIMING') or 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 0)
+    # 响应序列化：JSON_BACKEND 为 auto（安装了 orjson 时使用 orjson）、orjson 或 std；
+    # 安装了 msgpack 时，Accept 优先选择 application/msgpack 的请求得到 MessagePack 响应
+    JSON_BACKEND = os.environ.get('JSON_BACKEND') or 'auto'
+    MSGPACK_ENABLED = (os.environ.get('MSGPACK_ENABLED') or 'true').lower() == 'true'
+    # 响应压缩：按 Accept-Encoding 选择 br（需安装 brotli）或 gzip；小于 COMPRESS_MIN_SIZE 字节的响应不压缩。
+    # COMPRESS_LEVEL 为 gzip 级别（1-9），COMPRESS_BROTLI_QUALITY 为 brotli 质量（0-11）；
+    # COMPRESS_CACHE_SIZE 为缓存的带 ETag 响应（调查定义）压缩结果条数，COMPRESS_CACHE_TTL 为其过期秒数
+    COMPRESS_ENABLED = (os.environ.get('COMPRESS_ENABLED') or 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY') or 5)
+    COMPRESS_CACHE_SIZE = int(os.environ.get('COMPRESS_CACHE_SIZE') or 64)
+    COMPRESS_CACHE_TTL = int(os.environ.get('COMPRESS_CACHE_TTL') or 300)
+    COMPRESS_MIMETYPES = ['application/json', 'application/msgpack', 'application/x-ndjson', 'text/csv', 'text/plain']
+    # 不带 limit 的 /api/survey-responses/<id> 以流式 JSON 数组输出，每次从数据库读取并输出的响应数；0 表示不使用流式输出
+    RESPONSES_STREAM_PAGE_SIZE = int(os.environ.get('RESPONSES_STREAM_PAGE_SIZE') or 1000)
+    # 限流：令牌桶按端点名配置，格式为 "次数/时间单位"（如 10/minute、100/hour、5/30s），容量即允许的突发次数；
+    # 带有效 token 的请求按用户计数，其余按来源 IP 计数，提交接口再按调查分别计数。RATE_LIMIT_STORE 为 memory（进程内）或 redis（多进程共享）。
+    # 教室、宿舍等 NAT 后的匿名用户共用一个 IP，默认值按一个班级同时提交、登录留出余量
+    RATE_LIMIT_ENABLED = (os.environ.get('RATE_LIMIT_ENABLED') or 'true').lower() == 'true'
+    RATE_LIMITS = {
+        'api.submit_survey': os.environ.get('SUBMIT_RATE_LIMIT') or '120/minute',
+        'api.submit_survey_batch': os.environ.get('SUBMIT_BATCH_RATE_LIMIT') or '10/minute',
+        'api.login': os.environ.get('LOGIN_RATE_LIMIT') or '60/minute',
+        'api.register': os.environ.get('REGISTER_RATE_LIMIT') or '100/hour',
+    }
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE') or 'memory'
+    RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL') or 'redis://localhost:6379/0'
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS') or 100000)
+    # 同一客户端在该秒数内重复使用相同的 Idempotency-Key（已登录用户也包括重复提交相同内容）时不再写库，
+    # 直接返回第一次的结果；0 表示关闭
+    SUBMIT_DEDUPE_WINDOW = int(os.environ.get('SUBMIT_DEDUPE_WINDOW') or 60)
+    # 前面有几层反向代理设置 X-Forwarded-For；0 表示直接使用连接的来源地址
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR') or 0)
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    # 开发服务器为每个请求新建线程，订阅连接不会占用固定的线程池
+    LIVE_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_SUBSCRIBERS') or 100)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.dirname(__file__), 'data-dev.sqlite')
 
 class TestingConfig(Config):
     TESTING = True
+    # 测试中使用低成本的哈希参数
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    # 测试和基准测试从同一地址高频提交，关闭限流和重复提交拦截
+    RATE_LIMIT_ENABLED = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.dirname(__file__), 'data.sqlite')
+    # 每个 worker 进程各自持有一个连接池；总连接数约为 workers * (pool_size + max_overflow)，
+    # 应小于数据库允许的最大连接数。pool_pre_ping 在取出连接时检测断开的连接
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 5),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 10),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() == 'true',
+    }
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,29 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py wsgi:app
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:8000'
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+# 多线程时使用 gthread worker，每个线程各自从连接池取连接，threads 不宜超过 pool_size + max_overflow。
+# 实时推送（/api/surveys/<id>/live）的每个 SSE 连接会一直占用一个线程，应用按 GUNICORN_THREADS - LIVE_RESERVED_THREADS 限制每个进程的订阅数；
+# 需要更多订阅者时调大 GUNICORN_THREADS（不要用命令行 --threads，应用读不到），或显式设置 LIVE_MAX_SUBSCRIBERS
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 60)
+# 收到 SIGTERM 后等待正在处理的请求完成的最长时间
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE') or 5)
+# 定期重启 worker，防止内存缓慢增长；jitter 避免所有 worker 同时重启
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 10000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 1000)
+# 不预加载应用：连接池、哈希线程池和写入线程都应在各 worker 进程中创建，而不是在 fork 前
+preload_app = False
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or '-'
+
+
+def worker_exit(server, worker):
+    app = getattr(worker, 'wsgi', None)
+    if app is None:
+        return
+    from app import shutdown_app
+    shutdown_app(app)
@@ -94,6 +94,13 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
+    # answer_fts 及其影子表由迁移手工维护，不参与自动生成
+    def include_name(name, type_, parent_names):
+        return not (type_ == 'table' and name.startswith('answer_fts'))
+
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
+
     connectable = get_engine()
 
     with connectable.connect() as connection:
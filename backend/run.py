@@ -6,7 +6,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
 
-app = create_app()
+# 开发服务器，仅用于本地调试；生产环境使用 wsgi.py + gunicorn.conf.py
+app = create_app(os.environ.get('FLASK_CONFIG') or 'development')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=app.config.get('DEBUG', False))
@@ -0,0 +1,66 @@
+import os
+import sys
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, shutdown_app
+from app.extensions import db
+from config import TestingConfig
+
+
+@pytest.fixture
+def config_overrides():
+    # 测试模块可以覆盖这个 fixture，为应用设置额外的配置项
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, config_overrides):
+    # 每个测试使用临时目录中的独立 SQLite 文件（只读副本、异步写入队列都依赖文件数据库）
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'test.sqlite'))
+    monkeypatch.setattr(TestingConfig, 'INGEST_QUEUE_PATH', str(tmp_path / 'ingest-queue.sqlite'))
+    for key, value in config_overrides.items():
+        monkeypatch.setattr(TestingConfig, key, value, raising=False)
+    app = create_app('testing')
+    with app.app_context():
+        # 只在主库建表：配置过 replica 绑定的应用会在共享的 db 上登记该绑定的 metadata
+        db.create_all(bind_key=None)
+    yield app
+    shutdown_app(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_survey(client):
+    # 创建一个包含单选、多选和文本题的调查，返回接口返回的调查定义
+    def create(title='Survey', publish=False):
+        response = client.post('/api/surveys', json={'title': title, 'description': 'd', 'questions': [
+            {'text': 'single', 'type': 1, 'required': True, 'options': ['a', 'b', '其他']},
+            {'text': 'multiple', 'type': 2, 'options': ['x', 'y', 'z']},
+            {'text': 'text', 'type': 3},
+        ]})
+        assert response.status_code == 201, response.data
+        survey = response.get_json()
+        if publish:
+            assert client.post(f'/api/surveys/{survey["id"]}/publish').status_code == 200
+        return survey
+    return create
+
+
+def submission(survey, single=0, multiple=(0,), text='answer', other=None):
+    # 按选项下标构造 /api/submit 的请求体
+    single_q, multiple_q, text_q = survey['questions']
+    body = {
+        'survey_id': survey['id'],
+        'responses': {str(single_q['id']): single_q['options'][single]['id'], str(text_q['id']): text},
+        'selectedOptions': {str(multiple_q['id']): [multiple_q['options'][i]['id'] for i in multiple]},
+    }
+    if other is not None:
+        body['otherTexts'] = {str(single_q['id']): other}
+    return body
@@ -0,0 +1,87 @@
+import pytest
+from tests.conftest import submission
+
+# (单选下标, 多选下标)：第 6 个响应没有选择任何多选项
+PICKS = [(0, (0,)), (0, (0, 1)), (1, (1,)), (1, (2,)), (2, (0, 2)), (0, ())]
+
+
+@pytest.fixture
+def survey(client, create_survey):
+    survey = create_survey()
+    for single, multiple in PICKS:
+        assert client.post('/api/submit', json=submission(survey, single, multiple)).status_code == 200
+    return survey
+
+
+def counts(question):
+    return [o['count'] for o in question['options']]
+
+
+def test_filter_by_option(client, survey):
+    single_q, multiple_q, _ = survey['questions']
+    results = client.get(
+        f'/api/surveys/{survey["id"]}/results?filter={single_q["id"]}:{single_q["options"][0]["id"]}'
+    ).get_json()
+    assert results['total_responses'] == 3
+    single_result, multiple_result, text_result = results['questions']
+    assert counts(single_result) == [3, 0, 0]
+    assert counts(multiple_result) == [2, 1, 0]
+    assert (multiple_result['respondents'], text_result['respondents']) == (2, 3)
+    assert results['filters'] == [
+        {'question_id': single_q['id'], 'option_ids': [single_q['options'][0]['id']], 'exclude': False}
+    ]
+
+
+def test_exclude_option(client, survey):
+    _, multiple_q, _ = survey['questions']
+    results = client.get(
+        f'/api/surveys/{survey["id"]}/results?exclude={multiple_q["id"]}:{multiple_q["options"][0]["id"]}'
+    ).get_json()
+    assert results['total_responses'] == 3
+    single_result, multiple_result, _ = results['questions']
+    assert counts(single_result) == [1, 2, 0]
+    assert counts(multiple_result) == [0, 1, 1]
+    assert multiple_result['respondents'] == 2
+
+
+def test_crosstab(client, survey):
+    single_q, multiple_q, text_q = survey['questions']
+    crosstab = client.get(
+        f'/api/surveys/{survey["id"]}/crosstab?row={single_q["id"]}&column={multiple_q["id"]}'
+    ).get_json()
+    assert crosstab['respondents'] == 5
+    assert crosstab['cells'] == [[2, 1, 0], [0, 1, 1], [1, 0, 1]]
+    # 多选题中一个响应可以落在多个单元格，合计按响应去重
+    assert crosstab['row_totals'] == [2, 2, 1]
+    assert crosstab['column_totals'] == [3, 2, 2]
+
+    response = client.get(f'/api/surveys/{survey["id"]}/crosstab?row={single_q["id"]}&column={text_q["id"]}')
+    assert response.status_code == 400
+
+
+def test_deleted_options_are_not_counted(client, survey):
+    single_q, multiple_q, text_q = survey['questions']
+    # 删除多选题的最后一个选项：第 4 个响应只选了它，不再算作该题的作答者
+    questions = [
+        {'id': single_q['id'], 'text': single_q['text'], 'type': 1, 'required': True,
+         'options': [{'id': o['id'], 'text': o['text']} for o in single_q['options']]},
+        {'id': multiple_q['id'], 'text': multiple_q['text'], 'type': 2,
+         'options': [{'id': o['id'], 'text': o['text']} for o in multiple_q['options'][:2]]},
+        {'id': text_q['id'], 'text': text_q['text'], 'type': 3},
+    ]
+    assert client.put(f'/api/surveys/{survey["id"]}', json={'questions': questions}).status_code == 200
+
+    unfiltered = client.get(f'/api/surveys/{survey["id"]}/results').get_json()
+    # 包含单选题全部选项的条件匹配所有响应，结果应与计数表一致
+    every_option = ','.join(str(o['id']) for o in single_q['options'])
+    filtered = client.get(f'/api/surveys/{survey["id"]}/results?filter={single_q["id"]}:{every_option}').get_json()
+    filtered.pop('filters')
+    assert filtered == unfiltered
+    assert unfiltered['questions'][1]['respondents'] == 4
+
+    crosstab = client.get(
+        f'/api/surveys/{survey["id"]}/crosstab?row={single_q["id"]}&column={multiple_q["id"]}'
+    ).get_json()
+    assert crosstab['respondents'] == 4
+    assert crosstab['cells'] == [[2, 1], [0, 1], [1, 0]]
+    assert crosstab['row_totals'] == [2, 1, 1]
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import create_app, shutdown_app
+from app.extensions import db, ingestion_queue, password_hasher
+from config import DevelopmentConfig, ProductionConfig, TestingConfig
+from tests.conftest import submission
+
+
+@pytest.fixture
+def isolated_configs(tmp_path, monkeypatch):
+    # 每个配置类使用临时目录中各自的数据库文件，库文件名即配置名
+    for name, cls in (('development', DevelopmentConfig), ('testing', TestingConfig), ('production', ProductionConfig)):
+        monkeypatch.setattr(cls, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / f'{name}.sqlite'))
+        monkeypatch.setattr(cls, 'INGEST_QUEUE_PATH', str(tmp_path / f'{name}-queue.sqlite'), raising=False)
+
+    def selected(config_name=None):
+        app = create_app(config_name)
+        try:
+            return app.config['SQLALCHEMY_DATABASE_URI'].rsplit('/', 1)[1].split('.')[0]
+        finally:
+            shutdown_app(app)
+    return selected
+
+
+@pytest.mark.parametrize('env, expected', [
+    ('testing', 'testing'),
+    ('production', 'production'),
+    ('development', 'development'),
+    ('no-such-config', 'development'),
+    (None, 'development'),
+])
+def test_config_selected_from_environment(isolated_configs, monkeypatch, env, expected):
+    if env is None:
+        monkeypatch.delenv('FLASK_CONFIG', raising=False)
+    else:
+        monkeypatch.setenv('FLASK_CONFIG', env)
+    assert isolated_configs() == expected
+
+
+def test_explicit_config_name_wins(isolated_configs, monkeypatch):
+    monkeypatch.setenv('FLASK_CONFIG', 'production')
+    assert isolated_configs('testing') == 'testing'
+
+
+def test_health(client):
+    response = client.get('/api/health')
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'ok', 'checks': {'database': 'ok'}}
+
+
+def test_health_reports_unavailable_database(app, client, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('unable to open database file'))
+
+    monkeypatch.setattr(db.session, 'execute', unavailable)
+    response = client.get('/api/health')
+    assert response.status_code == 503
+    assert response.get_json() == {'status': 'unavailable', 'checks': {'database': 'unavailable'}}
+
+
+@pytest.mark.parametrize('config_overrides', [{'INGEST_MODE': 'queue', 'INGEST_FLUSH_INTERVAL': 60}])
+def test_shutdown_drains_queue_and_stops_workers(app, client, create_survey):
+    survey = create_survey()
+    for i in range(3):
+        assert client.post('/api/submit', json=submission(survey, single=i)).status_code == 202
+    checks = client.get('/api/health').get_json()['checks']
+    assert checks['ingest_queue']['writer_running'] is True
+
+    shutdown_app(app)
+    stats = ingestion_queue.stats()
+    assert (stats['writer_running'], stats['depth'], stats['processed']) == (False, 0, 3)
+    # 线程池已停止，之后的哈希在调用线程中同步计算
+    assert password_hasher._executor is None
+    assert password_hasher.hash('secret').startswith('pbkdf2:sha256:1000$')
+    assert client.get(f'/api/surveys/{survey["id"]}/results').get_json()['total_responses'] == 3
@@ -0,0 +1,21 @@
+from app.extensions import db, principal_cache
+from app.api.auth import invalidate_user
+from app.api.models import User
+
+
+def test_invalidate_user_drops_cached_principal(app, client):
+    response = client.post('/api/register', json={'username': 'u', 'email': 'u@example.com', 'password': 'secret'})
+    user_id = response.get_json()['user']['id']
+    headers = {'Authorization': 'Bearer ' + response.get_json()['token']}
+    assert client.get('/api/users', headers=headers).status_code == 403
+
+    with app.app_context():
+        db.session.get(User, user_id).is_admin = True
+        db.session.commit()
+    # 未失效前仍使用缓存的认证信息
+    assert client.get('/api/users', headers=headers).status_code == 403
+
+    with app.app_context():
+        invalidate_user(user_id)
+    assert client.get('/api/users', headers=headers).status_code == 200
+    assert principal_cache.stats()['backend'] == 'LocalVersions'
@@ -0,0 +1,48 @@
+from app.extensions import survey_cache
+from tests.conftest import submission
+
+
+def cache_stats(client):
+    stats = client.get('/api/cache/stats').get_json()['surveys']
+    return stats['hits'], stats['misses']
+
+
+def test_survey_definition_miss_then_hit(client, create_survey):
+    survey = create_survey()
+    survey_cache.reset_stats()
+
+    first = client.get(f'/api/surveys/{survey["id"]}')
+    second = client.get(f'/api/surveys/{survey["id"]}')
+    assert first.get_json() == second.get_json()
+    assert cache_stats(client) == (1, 1)
+
+
+def test_update_invalidates_cached_definition(client, create_survey):
+    survey = create_survey(publish=True)
+    assert client.get(f'/api/surveys/{survey["id"]}').get_json()['title'] == 'Survey'
+    assert [s['title'] for s in client.get('/api/published-surveys').get_json()] == ['Survey']
+
+    survey_cache.reset_stats()
+    assert client.put(f'/api/surveys/{survey["id"]}', json={'title': 'Renamed'}).status_code == 200
+    assert client.get(f'/api/surveys/{survey["id"]}').get_json()['title'] == 'Renamed'
+    assert [s['title'] for s in client.get('/api/published-surveys').get_json()] == ['Renamed']
+    # 两个键都已被删除，各自重新加载一次；PUT 返回的定义已重新写入缓存，随后的 GET 命中
+    assert cache_stats(client) == (1, 2)
+
+
+def test_unpublish_and_delete_invalidate_published_list(client, create_survey):
+    first, second = create_survey('first', publish=True), create_survey('second', publish=True)
+    assert len(client.get('/api/published-surveys').get_json()) == 2
+
+    assert client.post(f'/api/surveys/{first["id"]}/unpublish').status_code == 200
+    assert [s['id'] for s in client.get('/api/published-surveys').get_json()] == [second['id']]
+    assert client.delete(f'/api/surveys/{second["id"]}').status_code == 200
+    assert client.get('/api/published-surveys').get_json() == []
+    assert client.get(f'/api/surveys/{second["id"]}').status_code == 404
+
+
+def test_response_count_is_not_cached(client, create_survey):
+    survey = create_survey()
+    assert client.get(f'/api/surveys/{survey["id"]}').get_json()['response_count'] == 0
+    assert client.post('/api/submit', json=submission(survey)).status_code == 200
+    assert client.get(f'/api/surveys/{survey["id"]}').get_json()['response_count'] == 1
@@ -0,0 +1,28 @@
+import gzip
+import pytest
+from app.extensions import response_compression
+
+
+@pytest.fixture
+def config_overrides():
+    return {'COMPRESS_MIN_SIZE': 0}
+
+
+def test_survey_definition_is_gzipped(client, create_survey):
+    survey = create_survey()
+    plain = client.get(f'/api/surveys/{survey["id"]}')
+    compressed = client.get(f'/api/surveys/{survey["id"]}', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+
+
+def test_cache_is_keyed_by_body_not_etag(app):
+    # 两个响应带相同的 ETag 但内容不同，不能共用缓存的压缩结果
+    bodies = [b'{"value": "first"}' * 100, b'{"value": "second"}' * 100]
+    compressed = []
+    for body in bodies:
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = app.response_class(body, mimetype='application/json')
+            response.set_etag('same')
+            compressed.append(response_compression._after_request(response).get_data())
+    assert [gzip.decompress(data) for data in compressed] == bodies
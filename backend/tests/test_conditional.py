@@ -0,0 +1,44 @@
+import datetime
+from sqlalchemy import update
+from app.extensions import db
+from app.api.models import Survey
+
+
+def change_outside_process(app, survey_id, title):
+    # 模拟其他进程修改调查：直接更新数据库，不经过本进程的 invalidate_survey
+    with app.app_context():
+        db.session.execute(update(Survey).where(Survey.id == survey_id).values(
+            title=title, updated_at=datetime.datetime.utcnow()
+        ))
+        db.session.commit()
+
+
+def test_survey_etag_matches_served_body(app, client, create_survey):
+    survey = create_survey(publish=True)
+    url = f'/api/surveys/{survey["id"]}'
+    first = client.get(url)
+    old_etag = first.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': old_etag}).status_code == 304
+
+    change_outside_process(app, survey['id'], 'changed elsewhere')
+    second = client.get(url, headers={'If-None-Match': old_etag})
+    assert second.status_code == 200
+    assert second.get_json()['title'] == 'changed elsewhere'
+    assert second.headers['ETag'] != old_etag
+    assert client.get(url, headers={'If-None-Match': second.headers['ETag']}).status_code == 304
+
+    # 压缩后的响应同样是新内容
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['ETag'].strip('W/') == second.headers['ETag']
+
+
+def test_published_list_etag_matches_served_body(app, client, create_survey):
+    survey = create_survey(publish=True)
+    first = client.get('/api/published-surveys')
+    old_etag = first.headers['ETag']
+
+    change_outside_process(app, survey['id'], 'renamed')
+    second = client.get('/api/published-surveys', headers={'If-None-Match': old_etag})
+    assert second.status_code == 200
+    assert [s['title'] for s in second.get_json()] == ['renamed']
+    assert client.get('/api/published-surveys', headers={'If-None-Match': second.headers['ETag']}).status_code == 304
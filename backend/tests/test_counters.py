@@ -0,0 +1,21 @@
+from app.api.counters import PUBLISHED_SURVEYS, reconcile_counters
+
+
+def published_count(client):
+    surveys = client.get('/api/surveys?is_published=true').get_json()
+    return len(surveys)
+
+
+def test_publishing_through_update_keeps_counter_in_step(app, client, create_survey):
+    first, second = create_survey('first'), create_survey('second')
+    assert client.put(f'/api/surveys/{first["id"]}', json={'is_published': True}).status_code == 200
+    assert client.put(f'/api/surveys/{second["id"]}', json={'is_published': True}).status_code == 200
+    # 重复设置相同的值不应再次计数
+    assert client.put(f'/api/surveys/{second["id"]}', json={'is_published': True}).status_code == 200
+    assert client.put(f'/api/surveys/{first["id"]}', json={'is_published': False}).status_code == 200
+
+    assert published_count(client) == 1
+    assert client.get('/api/survey-stats').get_json()['published_surveys'] == 1
+    with app.app_context():
+        drift, _ = reconcile_counters()
+    assert PUBLISHED_SURVEYS not in drift
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.extensions import db, read_replica
+from config import Config
+
+
+def pragmas(engine, *names):
+    # 丢弃连接池中的连接，从新打开的连接读取 pragma
+    engine.dispose()
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+
+def test_primary_connection_pragmas(app):
+    with app.app_context():
+        values = pragmas(db.engine, 'journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store',
+                         'query_only')
+    # synchronous 1 为 NORMAL，temp_store 2 为 MEMORY
+    assert values == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'cache_size': -64000,
+                      'temp_store': 2, 'query_only': 0}
+
+
+def test_read_only_connection_pragmas(app):
+    with app.app_context():
+        values = pragmas(read_replica.engine, 'journal_mode', 'busy_timeout', 'cache_size', 'query_only')
+        assert values == {'journal_mode': 'wal', 'busy_timeout': 5000, 'cache_size': -64000, 'query_only': 1}
+        with read_replica.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql('DELETE FROM surveys')
+
+
+@pytest.mark.parametrize('config_overrides', [
+    {'SQLITE_PRAGMAS': dict(Config.SQLITE_PRAGMAS, synchronous='FULL', busy_timeout=250)}
+])
+def test_configured_pragmas_are_applied(app):
+    with app.app_context():
+        assert pragmas(db.engine, 'synchronous', 'busy_timeout') == {'synchronous': 2, 'busy_timeout': 250}
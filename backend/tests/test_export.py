@@ -0,0 +1,24 @@
+import csv
+import io
+import json
+from tests.conftest import submission
+
+
+def test_csv_export_neutralises_formulas(client, create_survey):
+    survey = create_survey()
+    for text in ('=HYPERLINK("http://example.com")', '+1', '-1', '@SUM(A1)', 'plain'):
+        assert client.post('/api/submit', json=submission(survey, text=text)).status_code == 200
+
+    response = client.get(f'/api/surveys/{survey["id"]}/export?format=csv')
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+    assert [row[-1] for row in rows[1:]] == [
+        '\'=HYPERLINK("http://example.com")', "'+1", "'-1", "'@SUM(A1)", 'plain'
+    ]
+
+
+def test_ndjson_export_keeps_original_text(client, create_survey):
+    survey = create_survey()
+    assert client.post('/api/submit', json=submission(survey, text='=1+1')).status_code == 200
+    response = client.get(f'/api/surveys/{survey["id"]}/export?format=ndjson')
+    line = json.loads(response.get_data(as_text=True).splitlines()[0])
+    assert line['answers'][str(survey['questions'][2]['id'])] == '=1+1'
@@ -0,0 +1,127 @@
+import sqlite3
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.extensions import db, ingestion_queue
+from app.api.models import IngestReceipt
+from app.ingest import DONE, FAILED, PENDING
+from config import Config
+from tests.conftest import submission
+
+
+@pytest.fixture
+def config_overrides():
+    # 不启动后台写入线程，由测试显式调用 drain；打开外键检查，与 PostgreSQL 的行为一致
+    return {'INGEST_MODE': 'queue', 'INGEST_START_WRITER': False, 'INGEST_BATCH_SIZE': 10,
+            'INGEST_MAX_ATTEMPTS': 2, 'INGEST_RETRY_BACKOFF': 0,
+            'SQLITE_PRAGMAS': dict(Config.SQLITE_PRAGMAS, foreign_keys='ON')}
+
+
+def submit(client, survey, **kwargs):
+    response = client.post('/api/submit', json=submission(survey, **kwargs))
+    assert response.status_code == 202
+    return response.get_json()['receipt_id']
+
+
+def receipt(client, receipt_id):
+    return client.get(f'/api/submit/receipts/{receipt_id}').get_json()
+
+
+def results_total(client, survey):
+    return client.get(f'/api/surveys/{survey["id"]}/results').get_json()['total_responses']
+
+
+def test_enqueue_then_drain(client, create_survey):
+    survey = create_survey()
+    receipts = [submit(client, survey, single=i % 3) for i in range(3)]
+    assert client.get('/api/submit/queue').get_json()['depth'] == 3
+    assert receipt(client, receipts[0])['status'] == PENDING
+
+    assert ingestion_queue.drain() == 3
+    assert [(receipt(client, r)['status'], receipt(client, r)['attempts']) for r in receipts] == [(DONE, 1)] * 3
+    assert all(receipt(client, r)['survey_response_id'] for r in receipts)
+    assert client.get('/api/submit/queue').get_json()['depth'] == 0
+    assert results_total(client, survey) == 3
+
+
+def test_bad_item_falls_back_without_failing_the_batch(app, client, create_survey):
+    survey = create_survey()
+    good = submit(client, survey)
+    # 无效的问题 id 在写库时违反约束，整批失败后逐条重试，只有这一条被标记为失败
+    bad = ingestion_queue.enqueue(survey['id'], [(None, None, 'broken')])
+    also_good = submit(client, survey)
+
+    ingestion_queue.drain()
+    assert [receipt(client, r)['status'] for r in (good, bad, also_good)] == [DONE, FAILED, DONE]
+    assert receipt(client, bad)['error']
+    assert results_total(client, survey) == 2
+
+
+def test_transient_errors_are_retried(app, client, create_survey, monkeypatch):
+    import app.api.submissions as submissions
+
+    survey = create_survey()
+    receipt_id = submit(client, survey)
+    write_submissions = submissions.write_submissions
+    failures = []
+
+    def locked_once(*args, **kwargs):
+        # 第一次整批写入和随后的逐条写入都失败，之后恢复
+        if len(failures) < 2:
+            failures.append(1)
+            raise OperationalError('INSERT', {}, sqlite3.OperationalError('database is locked'))
+        return write_submissions(*args, **kwargs)
+
+    monkeypatch.setattr(submissions, 'write_submissions', locked_once)
+    ingestion_queue.drain()
+    status = receipt(client, receipt_id)
+    assert (status['status'], status['attempts']) == (PENDING, 1)
+    assert 'database is locked' in status['error']
+
+    ingestion_queue.drain()
+    status = receipt(client, receipt_id)
+    assert (status['status'], status['attempts']) == (DONE, 2)
+    assert results_total(client, survey) == 1
+
+
+def test_exhausted_retries_fail(client, create_survey, monkeypatch):
+    import app.api.submissions as submissions
+
+    def locked(*args, **kwargs):
+        raise OperationalError('INSERT', {}, sqlite3.OperationalError('database is locked'))
+
+    survey = create_survey()
+    receipt_id = submit(client, survey)
+    monkeypatch.setattr(submissions, 'write_submissions', locked)
+    ingestion_queue.drain()
+    ingestion_queue.drain()
+    status = receipt(client, receipt_id)
+    assert (status['status'], status['attempts']) == (FAILED, 2)
+
+
+def test_existing_queue_file_is_migrated(app, tmp_path):
+    path = tmp_path / 'old-queue.sqlite'
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE submissions (id INTEGER PRIMARY KEY AUTOINCREMENT, receipt TEXT NOT NULL UNIQUE, '
+                 'survey_id INTEGER NOT NULL, answers TEXT NOT NULL, status TEXT NOT NULL, survey_response_id INTEGER, '
+                 'error TEXT, enqueued_at REAL NOT NULL, claimed_at REAL, processed_at REAL)')
+    conn.close()
+
+    app.config['INGEST_QUEUE_PATH'] = str(path)
+    ingestion_queue.init_app(app)
+    conn = sqlite3.connect(path)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(submissions)')}
+    conn.close()
+    assert {'attempts', 'available_at'} <= columns
+
+
+def test_deleting_queued_responses_removes_receipts(app, client, create_survey):
+    survey, other = create_survey('first'), create_survey('second')
+    receipts = [submit(client, survey), submit(client, survey), submit(client, other)]
+    ingestion_queue.drain()
+    response_id = receipt(client, receipts[0])['survey_response_id']
+
+    assert client.delete(f'/api/survey-responses/{response_id}').status_code == 200
+    assert client.delete(f'/api/surveys/{other["id"]}').status_code == 200
+    with app.app_context():
+        remaining = [row.survey_response_id for row in db.session.query(IngestReceipt)]
+    assert remaining == [receipt(client, receipts[1])['survey_response_id']]
@@ -0,0 +1,60 @@
+import datetime
+import pytest
+from app.extensions import db
+from app.api.models import Survey
+
+
+def walk(client, **params):
+    # 按 X-Next-Cursor 依次取完所有页，返回每页的调查 id
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({'cursor': cursor} if cursor else {}))
+        response = client.get('/api/surveys', query_string=query)
+        assert response.status_code == 200, response.data
+        pages.append([s['id'] for s in response.get_json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return pages
+
+
+def test_page_boundaries(client, create_survey):
+    ids = [create_survey(f'survey {i}')['id'] for i in range(6)]
+    # 恰好取满最后一页时不返回下一页的 cursor
+    assert walk(client, limit=3) == [ids[:3], ids[3:]]
+    assert walk(client, limit=4) == [ids[:4], ids[4:]]
+    assert walk(client, limit=6) == [ids]
+    assert walk(client, limit=10) == [ids]
+    assert walk(client, limit=2, order='desc') == [ids[::-1][:2], ids[::-1][2:4], ids[::-1][4:]]
+
+
+def test_equal_sort_keys_are_ordered_by_id(app, client, create_survey):
+    ids = [create_survey('same' if i % 2 else 'other')['id'] for i in range(7)]
+    with app.app_context():
+        # 所有调查的创建时间相同，只能依靠 id 区分先后
+        moment = datetime.datetime(2024, 1, 1, 12, 0, 0)
+        db.session.query(Survey).update({Survey.created_at: moment})
+        db.session.commit()
+
+    titles = {i: 'same' if n % 2 else 'other' for n, i in enumerate(ids)}
+    by_title = sorted(ids, key=lambda i: (titles[i], i))
+    for limit in (1, 2, 3):
+        assert sum(walk(client, sort='title', limit=limit), []) == by_title
+        assert sum(walk(client, sort='title', order='desc', limit=limit), []) == by_title[::-1]
+        assert sum(walk(client, sort='created_at', limit=limit), []) == ids
+        assert sum(walk(client, sort='created_at', order='desc', limit=limit), []) == ids[::-1]
+
+
+@pytest.mark.parametrize('params', [
+    {'sort': 'description'},
+    {'order': 'sideways'},
+    {'limit': 0},
+    {'limit': -1},
+    {'cursor': 'not-a-cursor'},
+    {'cursor': 'WzFd'},
+    {'sort': 'created_at', 'cursor': 'WyJub3QgYSBkYXRlIiwgMV0='},
+])
+def test_invalid_parameters(client, create_survey, params):
+    create_survey()
+    response = client.get('/api/surveys', query_string=params)
+    assert response.status_code == 400
+    assert response.get_json()['message']
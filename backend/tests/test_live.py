@@ -0,0 +1,82 @@
+import json
+import pytest
+from app.extensions import live_updates
+from tests.conftest import submission
+
+
+def test_subscriber_cap_follows_thread_count(client, create_survey):
+    # 默认 GUNICORN_THREADS=4，保留 2 个线程给普通请求
+    survey = create_survey()
+    assert client.get('/api/live/stats').get_json()['max_subscribers'] == 2
+
+    subscriptions = [live_updates.subscribe(survey['id']) for _ in range(2)]
+    try:
+        response = client.get(f'/api/surveys/{survey["id"]}/live')
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
+
+
+def edit_questions(client, survey):
+    # 删除单选和多选题最后的选项
+    single_q, multiple_q, text_q = survey['questions']
+    questions = [
+        {'id': single_q['id'], 'text': single_q['text'], 'type': 1, 'required': True,
+         'options': [{'id': o['id'], 'text': o['text']} for o in single_q['options'][:2]]},
+        {'id': multiple_q['id'], 'text': multiple_q['text'], 'type': 2,
+         'options': [{'id': o['id'], 'text': o['text']} for o in multiple_q['options'][:2]]},
+        {'id': text_q['id'], 'text': text_q['text'], 'type': 3},
+    ]
+    assert client.put(f'/api/surveys/{survey["id"]}', json={'questions': questions}).status_code == 200
+
+
+def test_survey_edit_asks_subscribers_to_refresh(client, create_survey):
+    survey = create_survey()
+    subscription = live_updates.subscribe(survey['id'])
+    try:
+        assert client.post('/api/submit', json=submission(survey, single=2, multiple=(2,))).status_code == 200
+        message = subscription.get(1)
+        assert message['total_delta'] == 1
+
+        edit_questions(client, survey)
+        assert subscription.get(1) == {'survey_id': survey['id'], 'refresh': True}
+        assert subscription.get(0.01) is None
+
+        # 只修改标题、不修改问题时不需要刷新
+        assert client.put(f'/api/surveys/{survey["id"]}', json={'title': 'renamed'}).status_code == 200
+        assert subscription.get(0.01) is None
+    finally:
+        subscription.close()
+
+
+def events(chunks):
+    # 逐个读取 SSE 事件，返回 (事件名, 数据)
+    for chunk in chunks:
+        chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('event: '):
+            name, data = chunk.split('\n')[:2]
+            yield name[len('event: '):], json.loads(data[len('data: '):])
+
+
+@pytest.mark.parametrize('config_overrides', [{'LIVE_STREAM_TIMEOUT': 5, 'LIVE_HEARTBEAT': 5}])
+def test_stream_sends_snapshot_after_survey_edit(app, client, create_survey):
+    survey = create_survey()
+    assert client.post('/api/submit', json=submission(survey, single=2, multiple=(2,))).status_code == 200
+    response = client.get(f'/api/surveys/{survey["id"]}/live', buffered=False)
+    stream = events(response.response)
+    try:
+        name, initial = next(stream)
+        assert name == 'snapshot'
+        assert [len(q['options']) for q in initial['questions']] == [3, 3, 0]
+        assert initial['questions'][1]['respondents'] == 1
+
+        edit_questions(client, survey)
+        name, refreshed = next(stream)
+        assert name == 'snapshot'
+        assert [len(q['options']) for q in refreshed['questions']] == [2, 2, 0]
+        # 只选了被删除选项的响应不再计为作答
+        assert refreshed['questions'][1]['respondents'] == 0
+    finally:
+        response.close()
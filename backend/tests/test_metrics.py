@@ -0,0 +1,80 @@
+import re
+import pytest
+from app.extensions import request_metrics
+
+
+@pytest.fixture
+def config_overrides():
+    # 任何语句都算作慢查询，便于检查慢查询计数和日志
+    return {'SLOW_QUERY_MS': 1e-9}
+
+
+@pytest.fixture
+def scrape(client):
+    # 指标在进程内共享，每个测试从空白状态开始
+    request_metrics.reset()
+
+    def scrape():
+        response = client.get('/api/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        samples = {}
+        for line in response.get_data(as_text=True).splitlines():
+            if line and not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return response.get_data(as_text=True), samples
+    return scrape
+
+
+def test_metrics_after_request(client, create_survey, scrape, caplog):
+    survey = create_survey()
+    with caplog.at_level('WARNING', logger='app.metrics'):
+        assert client.get(f'/api/surveys/{survey["id"]}').status_code == 200
+    text, samples = scrape()
+
+    for name, kind in (
+        ('survey_http_request_duration_seconds', 'histogram'),
+        ('survey_http_response_size_bytes', 'histogram'),
+        ('survey_db_queries_total', 'counter'),
+        ('survey_db_seconds_total', 'counter'),
+        ('survey_db_slow_queries_total', 'counter'),
+    ):
+        assert f'# TYPE {name} {kind}' in text
+
+    labels = '{endpoint="api.get_survey",method="GET",status="200"'
+    assert samples['survey_http_request_duration_seconds_count' + labels + '}'] == 1
+    assert samples['survey_http_request_duration_seconds_bucket' + labels + ',le="+Inf"}'] == 1
+    assert samples['survey_http_response_size_bytes_count{endpoint="api.get_survey"}'] == 1
+    queries = samples['survey_db_queries_total{endpoint="api.get_survey"}']
+    assert queries >= 1
+    assert samples['survey_db_slow_queries_total{endpoint="api.get_survey"}'] == queries
+    assert 'in api.get_survey' in caplog.text
+
+    # 创建调查的请求记录为 201，不存在的路由记录为 unmatched
+    assert 'survey_http_request_duration_seconds_count{endpoint="api.create_survey",method="POST",status="201"}' in samples
+    assert client.get('/api/no-such-route').status_code == 404
+    _, samples = scrape()
+    assert samples['survey_http_request_duration_seconds_count{endpoint="unmatched",method="GET",status="404"}'] == 1
+
+
+def test_server_timing_header(client, create_survey, scrape):
+    survey = create_survey()
+    response = client.get(f'/api/surveys/{survey["id"]}')
+    match = re.fullmatch(
+        r'db;dur=(\d+\.\d\d);desc="(\d+) queries", app;dur=(\d+\.\d\d)', response.headers['Server-Timing']
+    )
+    assert match is not None
+    assert int(match.group(2)) >= 1
+    assert float(match.group(1)) <= float(match.group(3))
+
+    _, samples = scrape()
+    assert samples['survey_db_queries_total{endpoint="api.get_survey"}'] == int(match.group(2))
+
+
+@pytest.mark.parametrize('config_overrides', [{'METRICS_SERVER_TIMING': False}])
+def test_server_timing_can_be_disabled(client, create_survey, scrape):
+    survey = create_survey()
+    assert 'Server-Timing' not in client.get(f'/api/surveys/{survey["id"]}').headers
+    _, samples = scrape()
+    assert samples['survey_http_request_duration_seconds_count{endpoint="api.get_survey",method="GET",status="200"}'] == 1
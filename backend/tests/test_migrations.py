@@ -0,0 +1,38 @@
+import os
+from flask_migrate import stamp, upgrade
+from sqlalchemy import text
+from app.extensions import db
+from tests.test_tallies import recount, tally_rows
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def test_result_tallies_migration_backfills_existing_responses(app):
+    # 初始迁移之前的表由 create_all 建立；去掉计数表并回到上一个版本，只执行这一次升级
+    with app.app_context():
+        db.session.execute(text('DROP TABLE result_tallies'))
+        db.session.commit()
+        stamp(directory=MIGRATIONS, revision='640faf7d8620')
+        statements = [
+            "INSERT INTO surveys (id, title, is_published, created_at, updated_at) "
+            "VALUES (1, 's', 1, '2026-01-01', '2026-01-01')",
+            "INSERT INTO questions (id, survey_id, text, type, required, \"order\") VALUES (1, 1, 'single', 1, 1, 0)",
+            "INSERT INTO questions (id, survey_id, text, type, required, \"order\") VALUES (2, 1, 'text', 3, 0, 1)",
+            "INSERT INTO options (id, question_id, text, \"order\") VALUES (1, 1, 'a', 0)",
+            "INSERT INTO options (id, question_id, text, \"order\") VALUES (2, 1, 'b', 1)",
+        ]
+        for response_id, option_id in ((1, 1), (2, 1), (3, 2)):
+            statements.append(f"INSERT INTO survey_responses (id, survey_id, created_at) "
+                              f"VALUES ({response_id}, 1, '2026-01-01')")
+            statements.append(f"INSERT INTO question_responses (survey_response_id, question_id, option_id) "
+                              f"VALUES ({response_id}, 1, {option_id})")
+        statements.append("INSERT INTO question_responses (survey_response_id, question_id, text_response) "
+                          "VALUES (1, 2, 'hello')")
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+        upgrade(directory=MIGRATIONS, revision='3b9e1c2d7a41')
+
+    migrated = tally_rows(app)
+    assert migrated == {(1, 0, 0): 3, (1, 1, 0): 3, (1, 1, 1): 2, (1, 1, 2): 1, (1, 2, 0): 1}
+    assert migrated == recount(app)
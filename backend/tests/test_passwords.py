@@ -0,0 +1,103 @@
+import threading
+import time
+import pytest
+from werkzeug.security import generate_password_hash
+from app.extensions import db, password_hasher
+from app.api.models import User
+from app.passwords import HashingBusyError
+
+
+@pytest.fixture
+def config_overrides():
+    # 两个工作线程，最多三个任务同时排队或执行
+    return {'PASSWORD_HASH_WORKERS': 2, 'PASSWORD_HASH_MAX_PENDING': 3, 'PASSWORD_HASH_TIMEOUT': 5}
+
+
+class Blocker:
+    # 在后台线程中提交阻塞的任务占用名额，记录同时执行的任务数
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.threads = []
+
+    def task(self):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+
+    def occupy(self, count):
+        for _ in range(count):
+            thread = threading.Thread(target=password_hasher._run, args=(self.task,))
+            thread.start()
+            self.threads.append(thread)
+        deadline = time.monotonic() + 5
+        while password_hasher.stats()['in_flight'] < len(self.threads) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+@pytest.fixture
+def blocker(app):
+    blocker = Blocker()
+    yield blocker
+    blocker.release.set()
+    for thread in blocker.threads:
+        thread.join()
+
+
+def register(client, password='secret'):
+    return client.post('/api/register', json={'username': 'u', 'email': 'u@example.com', 'password': password})
+
+
+def test_login_rehashes_outdated_hash(app, client):
+    user_id = register(client).get_json()['user']['id']
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+        user.password_hash = generate_password_hash('secret', 'pbkdf2:sha256:500')
+        db.session.commit()
+
+    assert client.post('/api/login', json={'username': 'u', 'password': 'wrong'}).status_code == 401
+    with app.app_context():
+        assert db.session.get(User, user_id).password_hash.startswith('pbkdf2:sha256:500$')
+
+    assert client.post('/api/login', json={'username': 'u', 'password': 'secret'}).status_code == 200
+    with app.app_context():
+        rehashed = db.session.get(User, user_id).password_hash
+        assert rehashed.startswith('pbkdf2:sha256:1000$')
+    # 已是当前参数的哈希不会再次改写
+    assert client.post('/api/login', json={'username': 'u', 'password': 'secret'}).status_code == 200
+    with app.app_context():
+        assert db.session.get(User, user_id).password_hash == rehashed
+
+
+def test_pool_limits_concurrent_and_pending_tasks(app, blocker):
+    blocker.occupy(3)
+    assert password_hasher.stats()['in_flight'] == 3
+    # 两个工作线程同时执行，第三个任务在队列中等待
+    time.sleep(0.05)
+    assert blocker.peak == 2
+    with pytest.raises(HashingBusyError):
+        password_hasher.hash('secret')
+    assert password_hasher.stats()['rejected'] == 1
+
+
+def test_saturated_pool_returns_503(client, blocker):
+    blocker.occupy(3)
+    response = register(client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert client.get('/api/hashing/stats').get_json()['rejected'] == 1
+
+
+def test_released_slots_accept_new_work(app, client):
+    assert register(client).status_code == 201
+    for _ in range(5):
+        assert client.post('/api/login', json={'username': 'u', 'password': 'secret'}).status_code == 200
+    stats = password_hasher.stats()
+    assert (stats['in_flight'], stats['rejected']) == (0, 0)
+    assert stats['completed'] == 6
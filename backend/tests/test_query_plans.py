@@ -0,0 +1,19 @@
+from app.api.query_plans import ROUTES, check_query_plans
+from tests.conftest import submission
+
+
+def test_route_queries_use_indexes(app, client, create_survey):
+    survey = create_survey(publish=True)
+    for i in range(5):
+        assert client.post('/api/submit', json=submission(survey, single=i % 3, text=f'survey {i}')).status_code == 200
+
+    report = check_query_plans(app, survey['id'])
+    assert {entry['url'] for entry in report} == {route.format(survey_id=survey['id']) for route in ROUTES}
+    assert [entry['url'] for entry in report if entry['error']] == []
+    assert [(entry['url'], entry['full_scans']) for entry in report if entry['full_scans']] == []
+
+
+def test_route_without_queries_fails_the_check(app, create_survey):
+    survey = create_survey()
+    report = check_query_plans(app, survey['id'], routes=('/api/no-such-route',))
+    assert [entry['error'] for entry in report] == ['no statements captured']
@@ -0,0 +1,58 @@
+import pytest
+from tests.conftest import submission
+
+
+@pytest.fixture
+def config_overrides():
+    return {
+        'RATE_LIMIT_ENABLED': True,
+        'RATE_LIMITS': {'api.submit_survey': '3/minute', 'api.register': '100/hour'},
+        'SUBMIT_DEDUPE_WINDOW': 60,
+    }
+
+
+def token(client):
+    response = client.post('/api/register', json={'username': 'u', 'email': 'u@example.com', 'password': 'secret'})
+    assert response.status_code == 201
+    return {'Authorization': 'Bearer ' + response.get_json()['token']}
+
+
+def test_identical_anonymous_submissions_are_not_deduplicated(client, create_survey):
+    # 同一 NAT 后的不同学生提交了相同的答案，都应写入
+    survey = create_survey()
+    ids = [client.post('/api/submit', json=submission(survey)).get_json()['survey_response_id'] for _ in range(3)]
+    assert len(set(ids)) == 3
+
+
+def test_idempotency_key_replays_first_response(client, create_survey):
+    survey = create_survey()
+    headers = {'Idempotency-Key': 'abc'}
+    first = client.post('/api/submit', json=submission(survey), headers=headers)
+    second = client.post('/api/submit', json=submission(survey, single=1), headers=headers)
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.get_json() == first.get_json()
+
+
+def test_authenticated_duplicate_body_is_replayed(client, create_survey):
+    survey = create_survey()
+    headers = token(client)
+    first = client.post('/api/submit', json=submission(survey), headers=headers)
+    second = client.post('/api/submit', json=submission(survey), headers=headers)
+    assert second.headers.get('Idempotent-Replayed') == 'true'
+    assert second.get_json()['survey_response_id'] == first.get_json()['survey_response_id']
+
+
+def test_submit_limit_is_per_survey(client, create_survey):
+    first, second = create_survey('first'), create_survey('second')
+    statuses = [client.post('/api/submit', json=submission(first)).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    assert client.post('/api/submit', json=submission(second)).status_code == 200
+
+
+def test_survey_id_spellings_share_one_bucket(client, create_survey):
+    survey = create_survey()
+    statuses = []
+    for survey_id in (survey['id'], str(survey['id']), f'0{survey["id"]}', f' {survey["id"]}'):
+        body = dict(submission(survey), survey_id=survey_id)
+        statuses.append(client.post('/api/submit', json=body).status_code)
+    assert statuses == [200, 200, 200, 429]
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import event
+from app.extensions import read_replica
+
+
+@pytest.fixture
+def config_overrides(request, tmp_path):
+    # primary：未配置副本，使用只读方式打开的主库文件；replica：配置指向主库文件的副本绑定；
+    # broken：副本文件不存在，每次读取都失败并回退到主库
+    return {
+        'primary': {},
+        'replica': {'SQLALCHEMY_BINDS': {'replica': 'sqlite:///' + str(tmp_path / 'test.sqlite')}},
+        'broken': {'SQLALCHEMY_BINDS': {
+            'replica': f'sqlite:///file:{tmp_path / "missing" / "replica.sqlite"}?mode=ro&uri=true'
+        }},
+    }[request.param]
+
+
+def captured_selects(engine, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+@pytest.mark.parametrize('config_overrides, source', [('primary', 'read-only primary'), ('replica', 'replica')],
+                         indirect=['config_overrides'])
+def test_reports_read_from_replica(client, create_survey, source):
+    survey = create_survey()
+    assert client.get('/api/read-replica/stats').get_json() == {'source': source, 'fallbacks': 0}
+
+    response = None
+
+    def get_surveys():
+        nonlocal response
+        response = client.get('/api/surveys')
+
+    assert captured_selects(read_replica.engine, get_surveys)
+    assert [s['id'] for s in response.get_json()] == [survey['id']]
+
+
+@pytest.mark.parametrize('config_overrides', ['primary'], indirect=True)
+def test_writes_stay_on_primary(client, create_survey):
+    # 写接口不经过只读连接；只读连接上的写入会被 query_only 拒绝
+    survey = create_survey()
+    assert client.put(f'/api/surveys/{survey["id"]}', json={'title': 'Renamed'}).status_code == 200
+    with read_replica.engine.connect() as connection:
+        with pytest.raises(Exception):
+            connection.exec_driver_sql("UPDATE surveys SET title = 'x'")
+    assert client.get('/api/surveys').get_json()[0]['title'] == 'Renamed'
+
+
+@pytest.mark.parametrize('config_overrides', ['broken'], indirect=True)
+def test_unavailable_replica_falls_back_to_primary(client, create_survey):
+    survey = create_survey()
+    response = client.get('/api/surveys')
+    assert response.status_code == 200
+    assert [s['id'] for s in response.get_json()] == [survey['id']]
+    assert client.get('/api/read-replica/stats').get_json() == {'source': 'replica', 'fallbacks': 1}
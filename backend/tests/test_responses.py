@@ -0,0 +1,55 @@
+from app.api.query_plans import capture_statements
+from tests.conftest import submission
+
+
+def submit(client, survey, count, **kwargs):
+    for _ in range(count):
+        assert client.post('/api/submit', json=submission(survey, **kwargs)).status_code == 200
+
+
+def test_statement_count_does_not_grow_with_responses(app, client, create_survey):
+    survey = create_survey()
+    urls = [f'/api/survey-responses/{survey["id"]}?limit=50', f'/api/survey-responses/{survey["id"]}']
+    submit(client, survey, 2)
+    small = [len(capture_statements(app, url)) for url in urls]
+    submit(client, survey, 40, multiple=(0, 1, 2))
+    large = [len(capture_statements(app, url)) for url in urls]
+    assert small == large
+    assert all(count <= 6 for count in large)
+
+
+def test_cursor_pagination(client, create_survey):
+    survey = create_survey()
+    submit(client, survey, 5)
+    url = f'/api/survey-responses/{survey["id"]}'
+    all_ids = [r['id'] for r in client.get(url).get_json()]
+    assert len(all_ids) == 5
+
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, query_string={'limit': 2, **({'cursor': cursor} if cursor else {})})
+        pages.append([r['id'] for r in response.get_json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        assert int(cursor) == pages[-1][-1]
+    assert pages == [all_ids[0:2], all_ids[2:4], all_ids[4:5]]
+    # 恰好取完的页没有下一页游标
+    assert 'X-Next-Cursor' not in client.get(url, query_string={'limit': 5}).headers
+    assert client.get(url, query_string={'limit': 0}).status_code == 400
+
+
+def test_other_answers_are_rendered(client, create_survey):
+    survey = create_survey()
+    assert client.post('/api/submit', json=submission(survey, single=2, other='my own')).status_code == 200
+    assert client.post('/api/submit', json=submission(survey, single=0, other='extra')).status_code == 200
+    assert client.post('/api/submit', json=submission(survey, single=1, text='free text')).status_code == 200
+
+    rendered = [
+        {qr['question_text']: qr['response'] for qr in response['question_responses']}
+        for response in client.get(f'/api/survey-responses/{survey["id"]}?limit=10').get_json()
+    ]
+    # 选择"其他"时只显示填写的内容，其他选项附带文本时显示为"选项: 文本"
+    assert [r['single'] for r in rendered] == ['my own', 'a: extra', 'b']
+    assert [r['multiple'] for r in rendered] == ['x', 'x', 'x']
+    assert rendered[2]['text'] == 'free text'
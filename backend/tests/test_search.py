@@ -0,0 +1,32 @@
+import pytest
+from tests.conftest import submission
+
+
+@pytest.fixture(params=['fts5', 'terms'])
+def config_overrides(request):
+    return {'SEARCH_BACKEND': request.param}
+
+
+def search(client, survey, query):
+    response = client.get(f'/api/surveys/{survey["id"]}/search', query_string={'q': query})
+    assert response.status_code == 200, response.data
+    return response.get_json()['results']
+
+
+def test_search_finds_text_answers(client, create_survey):
+    survey = create_survey()
+    for text in ('The delivery was late', '服务态度很好', 'late again'):
+        assert client.post('/api/submit', json=submission(survey, text=text)).status_code == 200
+
+    assert sorted(r['text'] for r in search(client, survey, 'late')) == ['The delivery was late', 'late again']
+    assert [r['text'] for r in search(client, survey, '态度')] == ['服务态度很好']
+    assert search(client, survey, 'missing') == []
+
+
+def test_numeric_text_answer_is_indexed(client, create_survey):
+    # 非字符串的文本回答按其文本形式保存和索引，而不是在建立索引时报错
+    survey = create_survey()
+    response = client.post('/api/submit', json=submission(survey, text=42))
+    assert response.status_code == 200, response.data
+    results = search(client, survey, '42')
+    assert [r['text'] for r in results] == ['42']
@@ -0,0 +1,106 @@
+import datetime
+import json
+import pytest
+from app import serialization
+from app.serialization import SurveyJSONProvider
+
+MSGPACK_ACCEPT = {'Accept': 'application/msgpack, application/json;q=0.5'}
+
+
+@pytest.fixture
+def provider(app, monkeypatch):
+    # 按给定配置和可用的库重新安装应用的 JSON provider；orjson=None / msgpack=None 模拟未安装
+    def install(**options):
+        for name in ('orjson', 'msgpack'):
+            if name in options:
+                monkeypatch.setattr(serialization, name, options.pop(name))
+        for key, value in options.items():
+            monkeypatch.setitem(app.config, key, value)
+        monkeypatch.setattr(app, 'json', SurveyJSONProvider(app))
+        return app.json
+    return install
+
+
+def test_auto_backend_prefers_orjson(provider):
+    pytest.importorskip('orjson')
+    assert provider().backend == 'orjson'
+    assert provider(JSON_BACKEND='std').backend == 'std'
+
+
+def test_backends_produce_the_same_body(client, create_survey, provider):
+    pytest.importorskip('orjson')
+    survey = create_survey('调查 "quoted"')
+    bodies = {}
+    for backend in ('orjson', 'std'):
+        provider(JSON_BACKEND=backend)
+        response = client.get(f'/api/surveys/{survey["id"]}')
+        assert response.status_code == 200
+        assert response.content_type == 'application/json'
+        bodies[backend] = response.data
+    assert bodies['orjson'] == bodies['std']
+    # 不转义非 ASCII 字符，时间为 ISO 8601
+    assert '调查'.encode('utf-8') in bodies['std']
+    assert json.loads(bodies['std'])['created_at'] == survey['created_at']
+
+
+@pytest.mark.parametrize('backend', ['auto', 'orjson', 'std'])
+def test_round_trip(app, provider, backend):
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+    json_provider = provider(JSON_BACKEND=backend)
+    payload = {'title': '其他', 'count': 3, 'share': 0.25, 'nested': [None, True, {'k': 'v'}]}
+    assert json_provider.loads(json_provider.dumps(payload)) == payload
+    moment = datetime.datetime(2024, 5, 6, 7, 8, 9, 123456)
+    assert json_provider.loads(json_provider.dumps({'at': moment})) == {'at': moment.isoformat()}
+    with app.test_request_context():
+        response = json_provider.response(payload)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == payload
+
+
+def test_falls_back_without_orjson(client, create_survey, provider):
+    json_provider = provider(orjson=None)
+    assert json_provider.backend == 'std'
+    survey = create_survey()
+    assert client.get(f'/api/surveys/{survey["id"]}').get_json()['id'] == survey['id']
+    with pytest.raises(RuntimeError):
+        provider(JSON_BACKEND='orjson')
+    with pytest.raises(ValueError):
+        provider(JSON_BACKEND='simplejson')
+
+
+def test_msgpack_negotiation(client, create_survey, provider):
+    msgpack = pytest.importorskip('msgpack')
+    provider()
+    survey = create_survey('其他')
+    url = f'/api/surveys/{survey["id"]}'
+
+    as_json = client.get(url)
+    as_msgpack = client.get(url, headers=MSGPACK_ACCEPT)
+    assert as_msgpack.content_type == 'application/msgpack'
+    assert msgpack.unpackb(as_msgpack.data, raw=False) == as_json.get_json()
+    assert 'Accept' in as_msgpack.vary and 'Accept' in as_json.vary
+    # 两种格式的 ETag 互不相同，条件请求按各自的格式命中
+    assert as_msgpack.headers['ETag'] != as_json.headers['ETag']
+    cached = client.get(url, headers={**MSGPACK_ACCEPT, 'If-None-Match': as_msgpack.headers['ETag']})
+    assert cached.status_code == 304
+    assert client.get(url, headers={'If-None-Match': as_msgpack.headers['ETag']}).status_code == 200
+
+    # 旧写法同样协商为 MessagePack；*/* 和 JSON 优先时仍返回 JSON
+    assert client.get(url, headers={'Accept': 'application/x-msgpack'}).content_type == 'application/msgpack'
+    assert client.get(url, headers={'Accept': '*/*'}).content_type == 'application/json'
+    assert client.get(
+        url, headers={'Accept': 'application/json, application/msgpack;q=0.5'}
+    ).content_type == 'application/json'
+
+
+@pytest.mark.parametrize('options', [{'msgpack': None}, {'MSGPACK_ENABLED': False}])
+def test_msgpack_unavailable_returns_json(client, create_survey, provider, options):
+    assert provider(**options).msgpack is False
+    survey = create_survey()
+    response = client.get(f'/api/surveys/{survey["id"]}', headers=MSGPACK_ACCEPT)
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert response.get_json()['id'] == survey['id']
+    # 不协商格式时响应不随 Accept 变化
+    assert 'Accept' not in response.vary
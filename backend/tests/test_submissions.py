@@ -0,0 +1,43 @@
+import pytest
+from app.api.models import QuestionResponse
+from tests.conftest import submission
+
+
+def text_question(survey):
+    return str(survey['questions'][2]['id'])
+
+
+@pytest.mark.parametrize('text', [True, ['a'], {'a': 1}])
+def test_invalid_text_answer_is_rejected(client, create_survey, text):
+    survey = create_survey()
+    response = client.post('/api/submit', json=submission(survey, text=text))
+    assert response.status_code == 400
+    assert text_question(survey) in response.get_json()['message']
+
+
+def test_numeric_text_answer_is_stored_as_text(app, client, create_survey):
+    survey = create_survey()
+    assert client.post('/api/submit', json=submission(survey, text=3.5)).status_code == 200
+    with app.app_context():
+        texts = [r.text_response for r in QuestionResponse.query.filter_by(question_id=survey['questions'][2]['id'])]
+    assert texts == ['3.5']
+
+
+def test_invalid_other_text_is_rejected(client, create_survey):
+    survey = create_survey()
+    response = client.post('/api/submit', json=submission(survey, single=2, other={'text': 'x'}))
+    assert response.status_code == 400
+
+
+def test_malformed_batch_item_reports_per_item_error(client, create_survey):
+    survey = create_survey()
+    response = client.post('/api/submit/batch', json={'submissions': [
+        submission(survey),
+        submission(survey, text=['not', 'text']),
+        submission(survey, single=2, other=42),
+    ]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['accepted'], data['rejected']) == (2, 1)
+    assert [result['status'] for result in data['results']] == ['ok', 'error', 'ok']
+    assert data['results'][1]['index'] == 1
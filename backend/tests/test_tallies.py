@@ -0,0 +1,94 @@
+from collections import Counter
+from app.extensions import db
+from app.api.models import ResultTally
+from app.api.tallies import rebuild_tallies
+from tests.conftest import submission
+
+
+def tally_rows(app):
+    with app.app_context():
+        return {
+            (row.survey_id, row.question_id, row.option_id): row.count
+            for row in db.session.query(ResultTally).filter(ResultTally.count != 0)
+        }
+
+
+def recount(app):
+    # 从问题回答全量重算计数表，返回重算后的行
+    with app.app_context():
+        rebuild_tallies()
+        db.session.commit()
+    return tally_rows(app)
+
+
+def test_results_match_submissions(client, create_survey):
+    survey = create_survey()
+    single_q, multiple_q, _ = survey['questions']
+    picks = [(0, (0,)), (1, (0, 2)), (1, (1,)), (2, (0, 1, 2)), (0, ())]
+    for single, multiple in picks:
+        assert client.post('/api/submit', json=submission(survey, single, multiple)).status_code == 200
+
+    results = client.get(f'/api/surveys/{survey["id"]}/results').get_json()
+    assert results['total_responses'] == len(picks)
+    single_result, multiple_result, text_result = results['questions']
+    assert [o['count'] for o in single_result['options']] == [2, 2, 1]
+    assert single_result['respondents'] == 5
+
+    expected = Counter(i for _, multiple in picks for i in multiple)
+    assert [o['count'] for o in multiple_result['options']] == [expected[0], expected[1], expected[2]]
+    # 没有选择任何多选项的响应不计入该题的作答人数
+    assert multiple_result['respondents'] == 4
+    assert text_result['respondents'] == 5
+
+
+def test_incremental_tallies_match_recount(app, client, create_survey):
+    first, second = create_survey('first'), create_survey('second')
+    for i in range(12):
+        survey = first if i % 3 else second
+        body = submission(survey, i % 3, [j for j in range(3) if (i >> j) & 1], other='mine' if i % 3 == 2 else None)
+        assert client.post('/api/submit', json=body).status_code == 200
+    batch = [submission(first, 1, (2,)), submission(second, 0, (0, 1))]
+    assert client.post('/api/submit/batch', json={'submissions': batch}).get_json()['accepted'] == 2
+
+    incremental = tally_rows(app)
+    assert incremental == recount(app)
+
+
+def test_deleting_responses_keeps_tallies_consistent(app, client, create_survey):
+    survey = create_survey()
+    ids = [client.post('/api/submit', json=submission(survey, i % 3, (i % 3,))).get_json()['survey_response_id']
+           for i in range(6)]
+    assert client.delete(f'/api/survey-responses/{ids[0]}').status_code == 200
+    assert client.delete(f'/api/survey-responses/{ids[4]}').status_code == 200
+
+    incremental = tally_rows(app)
+    assert incremental == recount(app)
+    assert incremental[(survey['id'], 0, 0)] == 4
+
+
+def test_deleting_options_keeps_tallies_consistent(app, client, create_survey):
+    survey = create_survey()
+    single_q, multiple_q, text_q = survey['questions']
+    ids = [client.post('/api/submit', json=submission(survey, i % 3, (i % 3,))).get_json()['survey_response_id']
+           for i in range(6)]
+
+    # 删除单选和多选题的最后一个选项
+    questions = [
+        {'id': single_q['id'], 'text': single_q['text'], 'type': 1, 'required': True,
+         'options': [{'id': o['id'], 'text': o['text']} for o in single_q['options'][:2]]},
+        {'id': multiple_q['id'], 'text': multiple_q['text'], 'type': 2,
+         'options': [{'id': o['id'], 'text': o['text']} for o in multiple_q['options'][:2]]},
+        {'id': text_q['id'], 'text': text_q['text'], 'type': 3},
+    ]
+    assert client.put(f'/api/surveys/{survey["id"]}', json={'questions': questions}).status_code == 200
+
+    incremental = tally_rows(app)
+    assert incremental == recount(app)
+    results = client.get(f'/api/surveys/{survey["id"]}/results').get_json()
+    single_result, multiple_result, _ = results['questions']
+    assert [o['count'] for o in single_result['options']] == [2, 2]
+    assert (single_result['respondents'], multiple_result['respondents']) == (4, 4)
+
+    # 删除只选了已删除选项的响应，计数与重算仍然一致
+    assert client.delete(f'/api/survey-responses/{ids[2]}').status_code == 200
+    assert tally_rows(app) == recount(app)
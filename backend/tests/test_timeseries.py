@@ -0,0 +1,34 @@
+import datetime
+from app.extensions import db
+from app.api.models import ResponseRollup
+from tests.conftest import submission
+
+
+def minute_starts(app, survey_id):
+    with app.app_context():
+        return sorted(row.bucket_start for row in ResponseRollup.query.filter_by(survey_id=survey_id, bucket='minute'))
+
+
+def test_prune_rollups_drops_old_minute_buckets(app, client, create_survey):
+    survey = create_survey()
+    assert client.post('/api/submit', json=submission(survey)).status_code == 200
+    old = datetime.datetime.utcnow().replace(second=0, microsecond=0) - datetime.timedelta(days=3)
+    with app.app_context():
+        for bucket in ('minute', 'hour', 'day'):
+            db.session.add(ResponseRollup(survey_id=survey['id'], bucket=bucket, bucket_start=old, count=1))
+        db.session.commit()
+    assert len(minute_starts(app, survey['id'])) == 2
+
+    result = app.test_cli_runner().invoke(args=['api', 'prune-rollups'])
+    assert 'Pruned 1 minute bucket(s).' in result.output
+    assert len(minute_starts(app, survey['id'])) == 1
+    with app.app_context():
+        assert ResponseRollup.query.filter(ResponseRollup.bucket != 'minute', ResponseRollup.bucket_start == old).count() == 2
+
+
+def test_minute_series_before_retention_is_rejected(client, create_survey):
+    survey = create_survey()
+    start = (datetime.datetime.utcnow() - datetime.timedelta(days=3)).isoformat()
+    response = client.get(f'/api/surveys/{survey["id"]}/timeseries?bucket=minute&start={start}')
+    assert response.status_code == 400
+    assert client.get(f'/api/surveys/{survey["id"]}/timeseries?bucket=minute').status_code == 200
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+# 生产环境入口：gunicorn -c gunicorn.conf.py wsgi:app
+# 也可以直接使用工厂函数：gunicorn 'app:create_app("production")'
+app = create_app(os.environ.get('FLASK_CONFIG') or 'production')